@@ -0,0 +1,239 @@
+# Request parsing, validation and response building shared by the threaded Flask app
+# (BL.routes) and the asyncio ASGI app (BL.async_routes). Handlers call these and only
+# differ in how they wait on I/O. Invalid requests raise ValueError with the message
+# the handler returns in its 400 response.
+import base64
+import binascii
+from datetime import datetime
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from bson.objectid import ObjectId
+from werkzeug.datastructures import ContentRange
+from werkzeug.sansio.http import is_resource_modified
+
+from DAL.archive import ARCHIVE_FORMATS
+
+MEME_TYPES = ("custom_image", "solid_background", "gradient")
+# Stored memes never change, so browsers and CDNs may keep them for a year
+MEME_MAX_AGE = 365 * 24 * 60 * 60
+# Largest page of GET /memes
+MAX_PAGE_SIZE = 500
+
+
+class WriteRequest(NamedTuple):
+    """
+    Images to store from a POST /mongodb body.
+    """
+    images: List[bytes]
+    image_format: str
+    # Whether the body held a list of images, which are saved with one bulk write
+    batch: bool
+
+
+def parse_meme_type(meme_type: Optional[str]) -> str:
+    """
+    Validate a requested meme type, custom_image if none is given.
+
+    Raises:
+        ValueError: If meme_type is not one of MEME_TYPES
+    """
+    meme_type = meme_type or 'custom_image'
+    if meme_type not in MEME_TYPES:
+        raise ValueError(f"Invalid meme type. Choose one of {', '.join(MEME_TYPES)}.")
+    return meme_type
+
+
+def parse_batch_count(args, maximum: int) -> int:
+    """
+    Parse the count of memes of a batch request, 10 by default.
+
+    Raises:
+        ValueError: If count is not an integer between 1 and maximum
+    """
+    try:
+        count = int(args.get('count', 10))
+    except ValueError:
+        raise ValueError("count must be an integer")
+    if not 1 <= count <= maximum:
+        raise ValueError(f"count must be between 1 and {maximum}")
+    return count
+
+
+def parse_page(args) -> Tuple[int, Optional[str]]:
+    """
+    Parse the page size, clamped to 1..MAX_PAGE_SIZE, and the cursor of a meme listing.
+
+    Raises:
+        ValueError: If limit is not an integer
+    """
+    try:
+        limit = min(max(int(args.get('limit', 50)), 1), MAX_PAGE_SIZE)
+    except ValueError:
+        raise ValueError("limit must be an integer")
+    return limit, args.get('after')
+
+
+def parse_write_request(data: Optional[dict]) -> WriteRequest:
+    """
+    Decode the base64 image, or list of images, in the Document of a POST /mongodb body.
+
+    Raises:
+        ValueError: If there is no Document or an image is not valid base64
+    """
+    if not data or 'Document' not in data:
+        raise ValueError("Please provide connection information")
+    batch = isinstance(data['Document'], list)
+    documents = data['Document'] if batch else [data['Document']]
+    try:
+        images = [base64.b64decode(document, validate=True) for document in documents]
+    except (binascii.Error, TypeError, ValueError):
+        raise ValueError("Document must be a base64 encoded image or a list of them")
+    return WriteRequest(images, data.get('format', 'png'), batch)
+
+
+def parse_delete_request(data: Optional[dict]):
+    """
+    Return the meme id, or list of meme ids, in the Delete of a DELETE /mongodb body.
+
+    Raises:
+        ValueError: If there is no Delete or it holds something other than meme ids
+    """
+    if not data or 'Delete' not in data:
+        raise ValueError("Please provide connection information")
+    meme_ids = data['Delete']
+    if not all(isinstance(meme_id, str) and ObjectId.is_valid(meme_id)
+               for meme_id in (meme_ids if isinstance(meme_ids, list) else [meme_ids])):
+        raise ValueError("Delete must be a meme id or a list of them")
+    return meme_ids
+
+
+def meme_summary(meme: dict, url: str) -> dict:
+    """Describe a listed meme with links to its images, at url, instead of inline bytes."""
+    return {
+        '_id': meme['_id'],
+        'created_at': meme['created_at'].isoformat() if meme.get('created_at') else None,
+        'format': meme.get('format', 'png'),
+        'url': url,
+        'thumbnail_url': f'{url}?size=thumbnail'
+    }
+
+
+def batch_summary(results: List[dict], elapsed: float) -> dict:
+    """Body of a batch response: the ids of the memes saved and the time it took."""
+    meme_ids = [result['meme_id'] for result in results if result.get('meme_id')]
+    return {
+        'meme_ids': meme_ids,
+        'count': len(meme_ids),
+        'elapsed_ms': round(elapsed * 1000, 2)
+    }
+
+
+def job_summary(job) -> dict:
+    """Body of a job status response, with the meme id instead of the whole save result."""
+    data = job.to_dict()
+    data['meme_id'] = job.result.get('meme_id') if isinstance(job.result, dict) else None
+    return data
+
+
+def export_options(args, renditions: Iterable[str], full_rendition: str) -> dict:
+    """
+    Parse the query string of an export: format (tar or zip), from and to
+    (ISO 8601 creation times, to exclusive), renditions (comma-separated,
+    full_rendition for the original image) and metadata (0 to leave out the meme documents).
+
+    Args:
+        args: Query string arguments
+        renditions: Names of the renditions that may be exported
+        full_rendition: Name of the original image, exported by default
+
+    Returns:
+        dict: Keyword arguments of MongoModule.export_archive
+
+    Raises:
+        ValueError: If an option is invalid
+    """
+    archive_format = args.get('format', 'tar')
+    if archive_format not in ARCHIVE_FORMATS:
+        raise ValueError(f"format must be one of {', '.join(ARCHIVE_FORMATS)}")
+
+    bounds = {}
+    for name, key in (('from', 'start'), ('to', 'end')):
+        try:
+            bounds[key] = datetime.fromisoformat(args[name]) if args.get(name) else None
+        except ValueError:
+            raise ValueError(f"{name} must be an ISO 8601 date or time")
+
+    exportable = list(renditions)
+    requested = [name for name in args.get('renditions', full_rendition).split(',') if name]
+    unknown = [name for name in requested if name not in exportable]
+    if unknown or not requested:
+        raise ValueError(f"renditions must be a comma-separated list of {', '.join(exportable)}")
+
+    return {'archive_format': archive_format, **bounds, 'renditions': requested,
+            'include_metadata': args.get('metadata', '1') != '0'}
+
+
+def export_headers(options: dict) -> Dict[str, str]:
+    """Headers of an export response, naming the download after its date range."""
+    bounds = [options[key].date().isoformat() if options[key] else '' for key in ('start', 'end')]
+    name = 'memes' + ('-' + '-to-'.join(bounds) if any(bounds) else '')
+    return {'Content-Disposition': f'attachment; filename="{name}.{options["archive_format"]}"'}
+
+
+def meme_etag(content_hash: str, stored_format: str, image_format: str) -> str:
+    """ETag of a meme image served as image_format, distinct for every transcoded variant."""
+    return content_hash if stored_format == image_format else f'{content_hash}-{image_format}'
+
+
+def not_modified(headers, etag: str, last_modified: Optional[datetime]) -> bool:
+    """Whether the conditional headers of a request show the client has the current image."""
+    return not is_resource_modified(http_if_none_match=headers.get('If-None-Match'),
+                                    http_if_modified_since=headers.get('If-Modified-Since'),
+                                    etag=etag, last_modified=last_modified)
+
+
+def add_cache_headers(response, etag: str, last_modified: Optional[datetime]):
+    """Mark meme bytes as immutable and attach their validators."""
+    response.set_etag(etag)
+    if last_modified is not None:
+        response.last_modified = last_modified
+    response.cache_control.public = True
+    response.cache_control.max_age = MEME_MAX_AGE
+    response.cache_control.immutable = True
+    response.vary.add('Accept')
+    return response
+
+
+def stream_range(request_range, length: int) -> Optional[Tuple[int, int, int]]:
+    """
+    Resolve the Range of a request for a streamed image of length bytes.
+
+    Only a single byte range is honored.
+
+    Returns:
+        Optional[tuple]: start, stop and the response status, 200 or 206,
+                         or None if the range cannot be satisfied
+    """
+    if request_range is None:
+        return 0, length, 200
+    byte_range = request_range.range_for_length(length)
+    if byte_range is None:
+        return None
+    start, stop = byte_range
+    return start, stop, 206
+
+
+def stream_headers(response, reader, start: int, stop: int):
+    """Describe the bytes [start, stop) of reader streamed in response, with its validators."""
+    response.content_length = stop - start
+    response.accept_ranges = 'bytes'
+    if response.status_code == 206:
+        response.content_range = ContentRange('bytes', start, stop, reader.length)
+    return add_cache_headers(response, reader.content_hash, reader.created_at)
+
+
+def range_not_satisfiable(response, length: int):
+    """Turn response into the 416 answer to a Range outside an image of length bytes."""
+    response.status_code = 416
+    response.content_range = ContentRange('bytes', None, None, length)
+    return response
@@ -0,0 +1,437 @@
+# Asyncio variant of BL.routes exposing the same routes as an ASGI app:
+#     hypercorn BL.async_routes:app --bind 0.0.0.0:5173
+# Gemini calls, background downloads and MongoDB reads are awaited, so one process
+# keeps many requests in flight. Rendering, saves and other blocking work run in a
+# thread pool. Modules, caches, metrics and jobs are shared with BL.routes, and
+# request parsing and validation with it through BL.api.
+import asyncio
+import contextvars
+import functools
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from quart import Quart, Response, g, request, json, jsonify, stream_with_context, url_for
+from quart_cors import cors
+
+from BL import api
+from BL.modules import AsyncGeminiModule, AsyncBackgroundImageModule, CachedMemeImage, QueueFullError
+from BL.routes import metrics, http_request_seconds, affirmation_sources, sentiment_retries, memes_created, \
+    sentiment_module, gemini_module, affirmation_pool, background_module, mem_module, rendition_module, \
+    encoding_module, meme_cache, mongo_module, mongo_view, meme_jobs, meme_inventory, image_path, \
+    MEME_BATCH_MAX, create_memes, readiness_state, start_warm_up, invalidate_meme, \
+    configure_logging
+from DAL.archive import ARCHIVE_FORMATS
+from DAL.async_mongo_module import AsyncMongoModule
+from DAL.mongo_module import MongoModule
+
+
+app = Quart(__name__)
+app = cors(
+    app,
+    allow_origin=["http://localhost:3000", "http://localhost:5173"],
+    allow_methods=["GET", "POST", "OPTIONS"],
+    allow_headers=["Content-Type", "Authorization"]
+)
+
+# Rendering, encoding and blocking library calls, kept off the event loop
+executor = ThreadPoolExecutor(
+    max_workers=int(os.environ.get('MEME_ASYNC_WORKERS', min(32, (os.cpu_count() or 1) + 4))),
+    thread_name_prefix='meme-async'
+)
+
+async_gemini_module = AsyncGeminiModule(gemini_module, executor)
+async_background_module = AsyncBackgroundImageModule(background_module, executor)
+async_mongo_module = AsyncMongoModule(mongo_module, executor=executor)
+
+metrics.instrument(async_gemini_module, {'get_affirmation_text': 'gemini', 'get_affirmation_batch': 'gemini_batch'})
+metrics.instrument(async_background_module, {'fetch': 'download'})
+metrics.instrument(async_mongo_module, {'save_meme': 'mongo_save', 'open_meme_image': 'mongo_open',
+                                        'meme_exists': 'mongo_exists'})
+
+
+async def run_blocking(function, *args):
+    """Run a blocking call in the executor, keeping the request's metrics context."""
+    context = contextvars.copy_context()
+    return await asyncio.get_running_loop().run_in_executor(executor, functools.partial(context.run, function, *args))
+
+
+async def next_affirmation() -> str:
+    # Take a pooled affirmation if one is ready, the pool never makes the loop wait
+    affirmation = affirmation_pool.get_affirmation(timeout=0)
+
+    if affirmation is not None:
+        affirmation_sources.inc(source='pool')
+    else:
+        affirmation_sources.inc(source='gemini')
+        affirmation = await async_gemini_module.get_affirmation_text()
+
+        while affirmation and not await run_blocking(sentiment_module.is_positive, affirmation):
+            sentiment_retries.inc()
+            affirmation = await async_gemini_module.get_affirmation_text()
+
+    return affirmation
+
+
+def render_meme(affirmation: str, meme_type: str, background=None) -> dict:
+    """Render a meme, on background if given, and encode every rendition."""
+    if background is not None:
+        meme_image = mem_module.create_meme_with_background(affirmation, background)
+    else:
+        meme_image = mem_module.create_meme(affirmation, meme_type, image_path)
+
+    return {
+        name: encoding_module.encode(image)
+        for name, image in rendition_module.render(meme_image).items()
+    }
+
+
+async def create_meme(meme_type: str = "custom_image"):
+    with metrics.timer('create_meme'):
+        with metrics.timer('affirmation'):
+            affirmation = await next_affirmation()
+        memes_created.inc(meme_type=meme_type)
+
+        # Download the background on the loop, then render off it
+        background = None
+        if meme_type == "custom_image":
+            background = await async_background_module.get_background(image_path, mem_module.image_size)
+        renditions = await run_blocking(render_meme, affirmation, meme_type, background)
+
+        image_binary = renditions.pop(rendition_module.full_name)
+
+        return await async_mongo_module.save_meme(image_binary, renditions, encoding_module.canonical_format,
+                                                  affirmation)
+
+
+@app.before_serving
+async def _start():
+    start_warm_up()
+
+
+@app.after_serving
+async def _stop():
+    await async_background_module.aclose()
+    executor.shutdown(wait=False)
+
+
+@app.before_request
+async def _start_request_metrics():
+    g.metrics_token = metrics.start_request()
+    g.request_start = time.perf_counter()
+
+
+@app.after_request
+async def _finish_request_metrics(response):
+    token = g.pop('metrics_token', None)
+    if token is None:
+        return response
+    elapsed = time.perf_counter() - g.request_start
+    timings = metrics.finish_request(token)
+
+    endpoint = request.url_rule.rule if request.url_rule else 'unmatched'
+    http_request_seconds.observe(elapsed, endpoint=endpoint, method=request.method, status=response.status_code)
+    response.headers['Server-Timing'] = metrics.server_timing(timings, total=elapsed)
+    return response
+
+
+@app.teardown_request
+async def _discard_request_metrics(exc):
+    # Requests that failed before after_request still release their timing list
+    token = g.pop('metrics_token', None)
+    if token is not None:
+        metrics.finish_request(token)
+
+
+@app.route('/metrics', methods=['GET'])
+async def get_metrics():
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+
+@app.route('/ready', methods=['GET'])
+async def ready():
+    # Readiness probes start the warm-up, and retry it after a failure
+    start_warm_up()
+    state = readiness_state()
+    return jsonify(state), 200 if state['ready'] else 503
+
+
+@app.route('/')
+async def base():
+    return Response(
+        response=json.dumps({"Status": "UP"}),
+        status=200,
+        mimetype='application/json'
+    )
+
+
+def _mongo_view(data: dict) -> AsyncMongoModule:
+    return AsyncMongoModule(mongo_view(data), executor=executor)
+
+
+async def _iterate_blocking(iterator, close):
+    """Yield the items of a blocking iterator, advancing it in the executor, and close it at the end."""
+    try:
+        while (item := await run_blocking(next, iterator, None)) is not None:
+            yield item
+    finally:
+        await run_blocking(close)
+
+
+@app.route('/memes', methods=['GET'])
+async def get_memes():
+    # Connection information is optional, the default database is listed without it
+    data = await request.get_json(silent=True)
+    mongo_api = _mongo_view(data) if data else async_mongo_module
+
+    try:
+        limit, after = api.parse_page(request.args)
+        # Fetch one extra meme to learn whether there is a next page
+        memes = mongo_api.iter_memes(after=after, limit=limit + 1)
+        first = await anext(memes, None)
+    except ValueError as e:
+        return Response(response=json.dumps({"Error": str(e)}),
+                        status=400,
+                        mimetype='application/json')
+
+    @stream_with_context
+    async def generate():
+        yield '{"items": ['
+        count, last, meme = 0, None, first
+        while meme is not None:
+            if count == limit:
+                break
+            summary = api.meme_summary(meme, url_for('get_meme_by_id', meme_id=meme['_id']))
+            yield (',' if count else '') + json.dumps(summary)
+            count, last = count + 1, meme
+            meme = await anext(memes, None)
+        has_more = meme is not None
+        await memes.aclose()
+        next_cursor = MongoModule.encode_cursor(last) if has_more else None
+        yield '], "next": ' + json.dumps(next_cursor) + '}'
+
+    return Response(generate(),
+                    status=200,
+                    mimetype='application/json')
+
+
+@app.route('/memes/export', methods=['GET'])
+async def export_memes():
+    try:
+        options = api.export_options(request.args, rendition_module.renditions, rendition_module.full_name)
+    except ValueError as e:
+        return Response(response=json.dumps({"Error": str(e)}),
+                        status=400,
+                        mimetype='application/json')
+
+    # The archive is written by the synchronous driver, one piece at a time in the executor
+    archive = mongo_module.export_archive(**options)
+    return Response(_iterate_blocking(archive, archive.close),
+                    status=200,
+                    mimetype=ARCHIVE_FORMATS[options['archive_format']]['mimetype'],
+                    headers=api.export_headers(options))
+
+
+@app.route('/memes/<meme_id>', methods=['GET'])
+async def get_meme_by_id(meme_id):
+    rendition = request.args.get('size', rendition_module.full_name)
+    image_format = encoding_module.negotiate(request.accept_mimetypes)
+
+    cached = meme_cache.get(meme_id, rendition)
+    # A delete handled by another worker only cleared that worker's cache
+    if cached is not None and not await async_mongo_module.meme_exists(meme_id):
+        invalidate_meme(meme_id)
+        cached = None
+    if cached is None:
+        reader = await async_mongo_module.open_meme_image(meme_id, rendition)
+        if reader is None:
+            return Response(
+                response=json.dumps({"Error": "Meme not found"}),
+                status=404,
+                mimetype='application/json'
+            )
+
+        # Stored bytes are streamed, filling the cache on the way; only transcodes need them whole
+        if reader.format == image_format:
+            return await _stream_meme_image(reader, meme_id, rendition)
+        try:
+            cached = CachedMemeImage(await run_blocking(reader.read_all), reader.format,
+                                     reader.content_hash, reader.created_at)
+        finally:
+            await run_blocking(reader.close)
+        meme_cache.put(meme_id, rendition, cached)
+
+    etag = api.meme_etag(cached.content_hash, cached.format, image_format)
+    if api.not_modified(request.headers, etag, cached.created_at):
+        return api.add_cache_headers(Response(b'', status=304), etag, cached.created_at)
+
+    # Variants other than the stored format are transcoded once and cached
+    image_binary = await run_blocking(encoding_module.get_variant, (meme_id, rendition), image_format,
+                                      lambda: (cached.data, cached.format))
+
+    response = Response(image_binary, mimetype=encoding_module.mimetype(image_format))
+    api.add_cache_headers(response, etag, cached.created_at)
+    return await response.make_conditional(request, accept_ranges=True, complete_length=len(image_binary))
+
+
+async def _stream_meme_image(reader, meme_id, rendition):
+    """
+    Stream a stored image in chunks read in the executor, honoring a single byte range,
+    and cache it if it is sent whole.
+    """
+    if api.not_modified(request.headers, reader.content_hash, reader.created_at):
+        await run_blocking(reader.close)
+        return api.add_cache_headers(Response(b'', status=304), reader.content_hash, reader.created_at)
+
+    byte_range = api.stream_range(request.range, reader.length)
+    if byte_range is None:
+        await run_blocking(reader.close)
+        return api.range_not_satisfiable(Response(b''), reader.length)
+    start, stop, status = byte_range
+    chunks = reader.iter_chunks(start, stop)
+    if status == 200:
+        chunks = meme_cache.fill(meme_id, rendition, reader, chunks)
+
+    response = Response(_iterate_blocking(chunks, reader.close), status=status,
+                        mimetype=encoding_module.mimetype(reader.format))
+    return api.stream_headers(response, reader, start, stop)
+
+
+@app.route('/api/cache-stats', methods=['GET'])
+async def get_cache_stats():
+    return jsonify({
+        'memes': meme_cache.stats(),
+        'encoded_variants': encoding_module.cache.stats()
+    })
+
+
+@app.route('/api/dedup-report', methods=['GET'])
+async def get_dedup_report():
+    return jsonify(await run_blocking(mongo_module.dedup_report))
+
+
+@app.route('/mongodb', methods=['POST'])
+async def mongo_write():
+    data = await request.get_json(silent=True)
+    try:
+        write = api.parse_write_request(data)
+    except ValueError as e:
+        return Response(response=json.dumps({"Error": str(e)}),
+                        status=400,
+                        mimetype='application/json')
+    mongo_api = _mongo_view(data)
+    if write.batch:
+        # Batches keep the bulk insert path of the threaded app
+        response = await run_blocking(mongo_api.mongo_module.save_memes,
+                                      [{'image_binary': image} for image in write.images], write.image_format)
+    else:
+        response = await mongo_api.save_meme(write.images[0], image_format=write.image_format)
+    return Response(response=json.dumps(response),
+                    status=200,
+                    mimetype='application/json')
+
+
+@app.route('/api/meme', methods=['GET', 'OPTIONS'])
+async def get_new_meme():
+    if request.method == 'OPTIONS':
+        # Handle preflight request
+        return '', 204
+
+    try:
+        meme_type = api.parse_meme_type(request.args.get('type'))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    try:
+        # Hand out a ready meme, and generate one while waiting only when the stock ran out
+        meme_id = await run_blocking(meme_inventory.claim, meme_type) if meme_inventory is not None else None
+        if meme_id is not None:
+            return jsonify({'status': 'Successfully Inserted', 'meme_id': meme_id, 'source': 'inventory'})
+        data = await create_meme(meme_type)
+        return jsonify({**data, 'source': 'generated'})
+    except Exception as e:
+        print(f"Meme Generation Error: {e}")
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route('/api/memes/batch', methods=['GET', 'POST', 'OPTIONS'])
+async def create_meme_batch():
+    if request.method == 'OPTIONS':
+        # Handle preflight request
+        return '', 204
+
+    try:
+        meme_type = api.parse_meme_type(request.args.get('type'))
+        count = api.parse_batch_count(request.args, MEME_BATCH_MAX)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    start = time.perf_counter()
+    try:
+        # Rendering already runs over the batch process pool
+        results = await run_blocking(create_memes, count, meme_type)
+    except Exception as e:
+        print(f"Meme Generation Error: {e}")
+        return jsonify({"error": str(e)}), 500
+
+    return jsonify(api.batch_summary(results, time.perf_counter() - start))
+
+
+@app.route('/api/meme/jobs', methods=['POST', 'OPTIONS'])
+async def submit_meme_job():
+    if request.method == 'OPTIONS':
+        # Handle preflight request
+        return '', 204
+
+    data = await request.get_json(silent=True) or {}
+    try:
+        meme_type = api.parse_meme_type(data.get('meme_type'))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    try:
+        job = meme_jobs.submit(meme_type=meme_type)
+    except QueueFullError as e:
+        response = jsonify({"error": str(e)})
+        response.status_code = 503
+        response.retry_after = 5
+        return response
+
+    status_url = url_for('get_meme_job', job_id=job.id)
+    response = jsonify({'job_id': job.id, 'status': job.status, 'status_url': status_url})
+    response.status_code = 202
+    response.location = status_url
+    return response
+
+
+@app.route('/api/meme/jobs/<job_id>', methods=['GET'])
+async def get_meme_job(job_id):
+    job = meme_jobs.get(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify(api.job_summary(job))
+
+
+@app.route('/mongodb', methods=['DELETE'])
+async def mongo_delete():
+    data = await request.get_json(silent=True)
+    try:
+        meme_ids = api.parse_delete_request(data)
+    except ValueError as e:
+        return Response(response=json.dumps({"Error": str(e)}),
+                        status=400,
+                        mimetype='application/json')
+    mongo_api = _mongo_view(data).mongo_module
+    # Delete is a meme id, or a list of them
+    if isinstance(meme_ids, list):
+        response = await run_blocking(mongo_api.delete_memes, meme_ids)
+    else:
+        response = await run_blocking(mongo_api.delete_meme, meme_ids)
+    return Response(response=json.dumps(response),
+                    status=200,
+                    mimetype='application/json')
+
+
+if __name__ == "__main__":
+    configure_logging()
+    app.run(port=5173, host='0.0.0.0')
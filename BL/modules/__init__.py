@@ -1,4 +1,20 @@
 from .gemini_module import GeminiModule
 from .sentiment_module import SentimentModule
 from .image_module import MemeImageModule
+from .gradient_module import GradientModule
+from .affirmation_pool_module import AffirmationPoolModule
+from .cache_module import LRUCache
+from .background_module import BackgroundImageModule
+from .text_layout_module import TextLayoutModule, TextLayout
+from .text_overlay_module import TextOverlayModule, TextOverlay
+from .rendition_module import RenditionModule
+from .encoding_module import EncodingModule
+from .meme_cache_module import MemeCacheModule, CachedMemeImage
+from .job_module import JobQueueModule, Job, QueueFullError
+from .batch_module import BatchRenderModule
+from .metrics_module import MetricsModule
+from .async_gemini_module import AsyncGeminiModule
+from .async_background_module import AsyncBackgroundImageModule
+from .inventory_module import MemeInventoryModule
+from .retention_module import MemeRetentionModule
 from DAL.mongo_module import MongoModule
@@ -0,0 +1,183 @@
+import threading
+from collections import deque
+from typing import Optional
+
+import logging as log
+
+
+class AffirmationPoolModule:
+    """
+    A bounded, deduplicated pool of pre-approved affirmations refilled in the background.
+
+    Affirmations are requested from Gemini in batches, filtered through the
+    SentimentModule in bulk and queued so callers can draw one without waiting
+    on the LLM.
+    """
+
+    def __init__(self, gemini_module, sentiment_module, max_size=50,
+                 low_water_mark=10, batch_size=20, max_failed_refills=3):
+        """
+        Initialize the AffirmationPoolModule.
+
+        Args:
+            gemini_module (GeminiModule): Source of affirmation batches
+            sentiment_module (SentimentModule): Filter that rejects non-positive affirmations
+            max_size (int): Maximum number of affirmations kept in the pool
+            low_water_mark (int): Pool size at or below which a refill is triggered
+            batch_size (int): Number of affirmations requested per Gemini call
+            max_failed_refills (int): Consecutive empty batches before a refill round gives up
+        """
+        if low_water_mark >= max_size:
+            raise ValueError("low_water_mark must be smaller than max_size")
+
+        self.gemini_module = gemini_module
+        self.sentiment_module = sentiment_module
+        self.max_size = max_size
+        self.low_water_mark = low_water_mark
+        self.batch_size = batch_size
+        self.max_failed_refills = max_failed_refills
+
+        self._pool = deque()
+        self._seen = set()
+        self._condition = threading.Condition()
+        self._refill_requested = False
+        self._refilling = False
+        # Completed refill rounds, successful or not, so waiters learn when one ends
+        self._refill_rounds = 0
+        self._closed = False
+        self._thread = None
+
+    def start(self) -> None:
+        """
+        Start the background refill thread if it is not already running.
+        """
+        with self._condition:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._closed = False
+            self._refill_requested = True
+            self._thread = threading.Thread(target=self._run, name='affirmation-pool', daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        """
+        Stop the background refill thread.
+        """
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def get_affirmation(self, timeout: Optional[float] = 0.0) -> Optional[str]:
+        """
+        Draw an affirmation from the pool.
+
+        Args:
+            timeout (float): Seconds to wait for a refill when the pool is empty.
+                             0 returns immediately, None waits indefinitely
+
+        Returns:
+            Optional[str]: An affirmation, or None if the pool stayed empty
+        """
+        self.start()
+        with self._condition:
+            if not self._pool and timeout != 0:
+                self._request_refill()
+                # A round in progress or the one just requested; if it ends empty there is nothing to wait for
+                rounds = self._refill_rounds
+                self._condition.wait_for(lambda: self._pool or self._closed or self._refill_rounds > rounds,
+                                         timeout=timeout)
+
+            affirmation = self._pool.popleft() if self._pool else None
+            if affirmation is not None:
+                # Allow the text back in once it has left the pool
+                self._seen.discard(affirmation)
+
+            if len(self._pool) <= self.low_water_mark:
+                self._request_refill()
+
+            return affirmation
+
+    def add_affirmations(self, affirmations) -> int:
+        """
+        Filter affirmations by sentiment and add the positive, unseen ones to the pool.
+
+        Args:
+            affirmations (list): Candidate affirmation texts
+
+        Returns:
+            int: Number of affirmations added
+        """
+        candidates = []
+        with self._condition:
+            for text in affirmations:
+                if text and text.strip() and text not in self._seen and text not in candidates:
+                    candidates.append(text)
+
+        analyses = self.sentiment_module.analyze_many(candidates) if candidates else []
+        approved = [text for text, analysis in zip(candidates, analyses) if analysis['is_positive']]
+
+        added = 0
+        with self._condition:
+            for text in approved:
+                if len(self._pool) >= self.max_size:
+                    break
+                if text in self._seen:
+                    continue
+                self._pool.append(text)
+                self._seen.add(text)
+                added += 1
+            if added:
+                self._condition.notify_all()
+        return added
+
+    def refill(self) -> int:
+        """
+        Fetch batches from Gemini until the pool is full or Gemini stops producing usable text.
+
+        Returns:
+            int: Number of affirmations added
+        """
+        added = 0
+        failures = 0
+        while len(self) < self.max_size and failures < self.max_failed_refills:
+            batch = self.gemini_module.get_affirmation_batch(self.batch_size)
+            batch_added = self.add_affirmations(batch)
+            added += batch_added
+            failures = 0 if batch_added else failures + 1
+        log.debug(f'Affirmation pool refilled with {added} affirmations')
+        return added
+
+    def _request_refill(self) -> None:
+        if not self._refilling:
+            self._refill_requested = True
+            self._condition.notify_all()
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._refill_requested or self._closed)
+                if self._closed:
+                    return
+                self._refill_requested = False
+                self._refilling = True
+            try:
+                self.refill()
+            except Exception as e:
+                log.error(f"Error refilling affirmation pool: {e}")
+            finally:
+                with self._condition:
+                    self._refilling = False
+                    self._refill_rounds += 1
+                    # Wake waiters so they can give up instead of sleeping out their timeout
+                    self._condition.notify_all()
+
+    def __len__(self) -> int:
+        with self._condition:
+            return len(self._pool)
+
+    def __repr__(self) -> str:
+        """Return a string representation of the AffirmationPoolModule."""
+        return f"AffirmationPoolModule(size={len(self)}, max_size={self.max_size})"
@@ -0,0 +1,104 @@
+import asyncio
+import logging as log
+from concurrent.futures import Executor
+from typing import Optional, Tuple
+
+from PIL import Image
+
+from .background_module import BackgroundImageModule
+
+
+class AsyncBackgroundImageModule:
+    """
+    Async counterpart of BackgroundImageModule for serving on an event loop.
+
+    Downloads go through a pooled httpx.AsyncClient so a slow image source
+    does not hold a thread per request. Decoding and resizing run in an
+    executor, and the results land in the cache of the wrapped
+    BackgroundImageModule, which keeps serving prefetched images.
+    """
+
+    def __init__(self, background_module: BackgroundImageModule, executor: Optional[Executor] = None):
+        """
+        Initialize the AsyncBackgroundImageModule.
+
+        Args:
+            background_module (BackgroundImageModule): Provider whose cache, prefetch queues,
+                pool size, timeout and retries are used
+            executor (Executor): Runs decoding and resizing. If None, the loop's default executor
+        """
+        self.background_module = background_module
+        self.executor = executor
+        self._client = None
+
+    @property
+    def client(self):
+        # Created on first use so it binds to the running event loop. httpx is only
+        # imported here, so the threaded app does not pay for it at startup
+        if self._client is None:
+            import httpx
+            self._client = httpx.AsyncClient(
+                timeout=self.background_module.timeout,
+                limits=httpx.Limits(max_connections=self.background_module.pool_size),
+                transport=httpx.AsyncHTTPTransport(retries=self.background_module.retries),
+                follow_redirects=True
+            )
+        return self._client
+
+    async def get_background(self, image_url: str, image_size: Tuple[int, int]) -> Image.Image:
+        """
+        Return a background for image_url resized to image_size.
+
+        Like BackgroundImageModule.get_background, a prefetched image is
+        preferred, otherwise one is downloaded, and a random cached one is
+        reused only if the download fails.
+
+        Args:
+            image_url (str): URL of the image source
+            image_size (tuple): Target size (width, height)
+
+        Returns:
+            PIL.Image: A private copy of the background that callers may draw on
+        """
+        ready = self.background_module.get_ready(image_url, image_size)
+        if ready is not None:
+            return ready
+
+        try:
+            return (await self.fetch(image_url, image_size)).copy()
+        except Exception as e:
+            cached = self.background_module.get_cached(image_url, image_size)
+            if cached is None:
+                raise
+            log.warning(f"Reusing a cached background, downloading from {image_url} failed: {e}")
+            return cached
+
+    async def fetch(self, image_url: str, image_size: Tuple[int, int]) -> Image.Image:
+        """
+        Download, decode and resize a fresh image and add it to the cache.
+
+        Args:
+            image_url (str): URL of the image source
+            image_size (tuple): Target size (width, height)
+
+        Returns:
+            PIL.Image: The cached background. Callers must copy it before drawing
+        """
+        response = await self.client.get(image_url)
+        response.raise_for_status()
+        return await asyncio.get_running_loop().run_in_executor(
+            self.executor, self.background_module.add_download,
+            image_url, str(response.url), tuple(image_size), response.content
+        )
+
+    async def aclose(self) -> None:
+        """
+        Close the HTTP client.
+        """
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def __repr__(self) -> str:
+        """Return a string representation of the AsyncBackgroundImageModule."""
+        return f"AsyncBackgroundImageModule({self.background_module!r})"
@@ -0,0 +1,68 @@
+# modules/async_gemini_module.py
+
+import asyncio
+from concurrent.futures import Executor
+from typing import List, Optional
+
+from .gemini_module import GeminiModule
+
+
+class AsyncGeminiModule:
+    """Async counterpart of GeminiModule for serving on an event loop.
+
+    Shares the prompts, the parsing and the lazily created model of a
+    GeminiModule. Models with generate_content_async, like
+    genai.GenerativeModel, are awaited directly. Other models run in an executor.
+    """
+
+    def __init__(self, gemini_module: GeminiModule, executor: Optional[Executor] = None):
+        """Initialize the async Gemini service.
+
+        Args:
+            gemini_module (GeminiModule): The service whose model and prompts are used
+            executor (Executor): Runs models without an async API. If None, the loop's default executor
+        """
+        self.gemini_module = gemini_module
+        self.executor = executor
+
+    async def _generate(self, prompt: str):
+        model = self.gemini_module.model
+        generate = getattr(model, 'generate_content_async', None)
+        if generate is not None:
+            return await generate(prompt)
+        return await asyncio.get_running_loop().run_in_executor(self.executor, model.generate_content, prompt)
+
+    async def get_affirmation_text(self) -> Optional[str]:
+        """Generate a positive affirmation quote using Gemini.
+
+        Returns:
+            Optional[str]: The generated affirmation text, or None if an error occurs
+        """
+        try:
+            response = await self._generate(self.gemini_module.AFFIRMATION_PROMPT)
+            return response.text.strip()
+
+        except Exception as e:
+            print(f"Error generating affirmation: {str(e)}")
+            return None
+
+    async def get_affirmation_batch(self, count: int = 10) -> List[str]:
+        """Generate several positive affirmation quotes in a single Gemini call.
+
+        Args:
+            count (int): Number of affirmations to ask for
+
+        Returns:
+            List[str]: The parsed affirmations, or an empty list if an error occurs
+        """
+        try:
+            response = await self._generate(self.gemini_module.BATCH_AFFIRMATION_PROMPT.format(count=count))
+            return self.gemini_module.parse_affirmations(response.text)
+
+        except Exception as e:
+            print(f"Error generating affirmations: {str(e)}")
+            return []
+
+    def __repr__(self) -> str:
+        """Return a string representation of the AsyncGeminiModule."""
+        return f"AsyncGeminiModule({self.gemini_module!r})"
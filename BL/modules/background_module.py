@@ -0,0 +1,323 @@
+import glob
+import hashlib
+import io
+import os
+import queue
+import random
+import threading
+from typing import Optional, Tuple
+
+import logging as log
+import requests
+from PIL import Image
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from .cache_module import LRUCache
+
+
+def _image_nbytes(image: Image.Image) -> int:
+    return image.width * image.height * len(image.getbands())
+
+
+def _digest(value: str) -> str:
+    return hashlib.sha1(value.encode('utf-8')).hexdigest()[:16]
+
+
+class BackgroundImageModule:
+    """
+    A provider of downloaded, decoded and resized background images.
+
+    Downloads share one pooled HTTP session. Decoded backgrounds are kept in a
+    byte-bounded in-memory LRU with an optional on-disk tier, and a prefetch
+    queue per source URL keeps fresh images ready so rendering does not wait
+    on the network.
+    """
+
+    def __init__(self, max_cache_bytes=64 * 1024 * 1024, cache_dir=None,
+                 max_disk_bytes=256 * 1024 * 1024, prefetch_size=4,
+                 pool_size=10, timeout=10.0, retries=2):
+        """
+        Initialize the BackgroundImageModule.
+
+        Args:
+            max_cache_bytes (int): Size bound of the in-memory cache of decoded images
+            cache_dir (str): Directory of the on-disk cache tier. If None, only memory is used
+            max_disk_bytes (int): Size bound of the on-disk cache tier
+            prefetch_size (int): Number of fresh images kept ready per source URL. 0 disables prefetching
+            pool_size (int): Maximum number of pooled connections per host
+            timeout (float): Timeout in seconds for each download
+            retries (int): Number of retries for failed downloads
+        """
+        self.cache_dir = cache_dir
+        self.max_disk_bytes = max_disk_bytes
+        self.prefetch_size = prefetch_size
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.retries = retries
+
+        self.cache = LRUCache(max_items=None, max_bytes=max_cache_bytes, sizeof=_image_nbytes)
+        self.session = self._create_session()
+
+        self._queues = {}
+        self._prefetchers = {}
+        self._lock = threading.Lock()
+        self._closed = threading.Event()
+        self._disk_lock = threading.Lock()
+
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    def _create_session(self) -> requests.Session:
+        session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=self.pool_size,
+            pool_maxsize=self.pool_size,
+            max_retries=Retry(total=self.retries, backoff_factor=0.2,
+                              status_forcelist=(500, 502, 503, 504))
+        )
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        return session
+
+    def reset_session(self) -> None:
+        """
+        Replace the HTTP session, e.g. in a freshly forked worker process.
+        """
+        self.session = self._create_session()
+
+    def get_background(self, image_url: str, image_size: Tuple[int, int]) -> Image.Image:
+        """
+        Return a background for image_url resized to image_size.
+
+        A prefetched image is preferred, otherwise a fresh one is downloaded.
+        Only if the download fails, a random background cached from the same
+        URL is reused.
+
+        Args:
+            image_url (str): URL of the image source
+            image_size (tuple): Target size (width, height)
+
+        Returns:
+            PIL.Image: A private copy of the background that callers may draw on
+        """
+        ready = self.get_ready(image_url, image_size)
+        if ready is not None:
+            return ready
+
+        try:
+            return self.fetch(image_url, image_size).copy()
+        except Exception as e:
+            cached = self.get_cached(image_url, image_size)
+            if cached is None:
+                raise
+            log.warning(f"Reusing a cached background, downloading from {image_url} failed: {e}")
+            return cached
+
+    def get_ready(self, image_url: str, image_size: Tuple[int, int]) -> Optional[Image.Image]:
+        """
+        Return a prefetched background without downloading, or None if none is ready.
+
+        Args:
+            image_url (str): URL of the image source
+            image_size (tuple): Target size (width, height)
+
+        Returns:
+            Optional[PIL.Image]: A private copy of the background that callers may draw on
+        """
+        image_size = tuple(image_size)
+        self.prefetch(image_url, image_size)
+
+        prefetched = self._queues.get((image_url, image_size))
+        if prefetched is not None:
+            try:
+                return prefetched.get_nowait().copy()
+            except queue.Empty:
+                pass
+        return None
+
+    def get_cached(self, image_url: str, image_size: Tuple[int, int]) -> Optional[Image.Image]:
+        """
+        Return a random background cached from image_url, for when it cannot be downloaded.
+
+        Args:
+            image_url (str): URL of the image source
+            image_size (tuple): Target size (width, height)
+
+        Returns:
+            Optional[PIL.Image]: A private copy of the background, or None if none is cached
+        """
+        cached = self._get_cached(image_url, tuple(image_size))
+        return cached.copy() if cached is not None else None
+
+    def fetch(self, image_url: str, image_size: Tuple[int, int]) -> Image.Image:
+        """
+        Download, decode and resize a fresh image and add it to the cache.
+
+        Args:
+            image_url (str): URL of the image source
+            image_size (tuple): Target size (width, height)
+
+        Returns:
+            PIL.Image: The cached background. Callers must copy it before drawing
+        """
+        response = self.session.get(image_url, timeout=self.timeout)
+        response.raise_for_status()
+        return self.add_download(image_url, response.url, image_size, response.content)
+
+    def add_download(self, image_url: str, final_url: str, image_size: Tuple[int, int],
+                     content: bytes) -> Image.Image:
+        """
+        Decode and resize downloaded image bytes and add the result to the cache.
+
+        Args:
+            image_url (str): URL of the image source
+            final_url (str): URL the download ended at after redirects
+            image_size (tuple): Target size (width, height)
+            content (bytes): The encoded image
+
+        Returns:
+            PIL.Image: The cached background. Callers must copy it before drawing
+        """
+        image_size = tuple(image_size)
+        with Image.open(io.BytesIO(content)) as img:
+            img = img.convert('RGB')
+            if img.size != image_size:
+                img = img.resize(image_size, Image.Resampling.LANCZOS)
+
+        key = (image_url, final_url, image_size)
+        self.cache.put(key, img)
+        self._write_disk(key, img)
+        return img
+
+    def prefetch(self, image_url: str, image_size: Tuple[int, int]) -> None:
+        """
+        Start keeping a queue of fresh backgrounds for image_url, if not already doing so.
+        """
+        if self.prefetch_size <= 0 or self._closed.is_set():
+            return
+
+        image_size = tuple(image_size)
+        source = (image_url, image_size)
+        with self._lock:
+            thread = self._prefetchers.get(source)
+            if thread is not None and thread.is_alive():
+                return
+            self._queues.setdefault(source, queue.Queue(maxsize=self.prefetch_size))
+            thread = threading.Thread(target=self._prefetch_loop, args=source,
+                                      name='background-prefetch', daemon=True)
+            self._prefetchers[source] = thread
+            thread.start()
+
+    def close(self) -> None:
+        """
+        Stop prefetching and close the HTTP session.
+        """
+        self._closed.set()
+        with self._lock:
+            threads = list(self._prefetchers.values())
+            self._prefetchers.clear()
+        for source_queue in self._queues.values():
+            # Unblock prefetchers waiting on a full queue
+            while True:
+                try:
+                    source_queue.get_nowait()
+                except queue.Empty:
+                    break
+        for thread in threads:
+            thread.join(timeout=self.timeout)
+        self.session.close()
+
+    def _prefetch_loop(self, image_url: str, image_size: Tuple[int, int]) -> None:
+        source_queue = self._queues[(image_url, image_size)]
+        failures = 0
+        while not self._closed.is_set():
+            try:
+                image = self.fetch(image_url, image_size)
+                failures = 0
+            except Exception as e:
+                failures += 1
+                log.error(f"Error prefetching background from {image_url}: {e}")
+                # Back off so an unreachable source does not spin
+                self._closed.wait(min(30.0, 0.5 * 2 ** failures))
+                continue
+
+            while not self._closed.is_set():
+                try:
+                    source_queue.put(image, timeout=1.0)
+                    break
+                except queue.Full:
+                    continue
+
+    def _get_cached(self, image_url: str, image_size: Tuple[int, int]) -> Optional[Image.Image]:
+        keys = [key for key in self.cache.keys() if key[0] == image_url and key[2] == image_size]
+        random.shuffle(keys)
+        for key in keys:
+            image = self.cache.get(key)
+            if image is not None:
+                return image
+
+        image = self._read_disk(image_url, image_size)
+        if image is not None:
+            self.cache.put((image_url, image_url, image_size), image)
+        return image
+
+    def _disk_path(self, key) -> str:
+        image_url, final_url, (width, height) = key
+        return os.path.join(self.cache_dir, f'{_digest(image_url)}-{width}x{height}-{_digest(final_url)}.raw')
+
+    def _write_disk(self, key, image: Image.Image) -> None:
+        if not self.cache_dir:
+            return
+        path = self._disk_path(key)
+        try:
+            with self._disk_lock:
+                tmp_path = f'{path}.{os.getpid()}.tmp'
+                with open(tmp_path, 'wb') as f:
+                    f.write(image.tobytes())
+                os.replace(tmp_path, path)
+                self._evict_disk()
+        except OSError as e:
+            log.error(f"Error writing background cache file {path}: {e}")
+
+    def _read_disk(self, image_url: str, image_size: Tuple[int, int]) -> Optional[Image.Image]:
+        if not self.cache_dir:
+            return None
+        width, height = image_size
+        pattern = os.path.join(self.cache_dir, f'{_digest(image_url)}-{width}x{height}-*.raw')
+        with self._disk_lock:
+            paths = glob.glob(pattern)
+            random.shuffle(paths)
+            for path in paths:
+                try:
+                    with open(path, 'rb') as f:
+                        image = Image.frombytes('RGB', image_size, f.read())
+                    os.utime(path)
+                    return image
+                except (OSError, ValueError) as e:
+                    log.error(f"Error reading background cache file {path}: {e}")
+        return None
+
+    def _evict_disk(self) -> None:
+        entries = []
+        total = 0
+        for path in glob.glob(os.path.join(self.cache_dir, '*.raw')):
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+
+        for _, size, path in sorted(entries):
+            if total <= self.max_disk_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+
+    def __repr__(self) -> str:
+        """Return a string representation of the BackgroundImageModule."""
+        return f"BackgroundImageModule(cached={len(self.cache)}, cache_dir={self.cache_dir!r})"
@@ -0,0 +1,115 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from .background_module import BackgroundImageModule
+from .encoding_module import EncodingModule
+from .image_module import MemeImageModule
+from .rendition_module import RenditionModule
+
+# Modules used by process pool workers, created once per worker process
+_worker_state = {}
+# Start method of the workers, see BatchRenderModule
+_START_METHOD = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+
+
+def _init_worker(config: dict) -> None:
+    # Without prefetching every 'custom_image' meme downloads its own background
+    background_module = BackgroundImageModule(prefetch_size=0)
+    _worker_state['mem_module'] = MemeImageModule(font_path=config['font_path'],
+                                                  background_module=background_module)
+    _worker_state['rendition_module'] = RenditionModule(config['renditions'])
+    _worker_state['encoding_module'] = EncodingModule(canonical_format=config['image_format'])
+    _worker_state['image_url'] = config['image_url']
+
+
+def _render_one(job: Tuple[str, str]) -> Dict[str, bytes]:
+    meme_type, text = job
+    meme_image = _worker_state['mem_module'].create_meme(text, meme_type, _worker_state['image_url'])
+    encoding_module = _worker_state['encoding_module']
+    return {
+        name: encoding_module.encode(image)
+        for name, image in _worker_state['rendition_module'].render(meme_image).items()
+    }
+
+
+class BatchRenderModule:
+    """
+    A service that renders and encodes many memes at once over a process pool.
+
+    Rendering is CPU bound and holds the GIL, so a batch is spread across
+    worker processes. Each worker builds its fonts and modules once, and only
+    the texts go out and the encoded bytes come back. Workers are started
+    from a fork server, or spawned where there is none: the pool is created
+    while the app runs threads, and a child forked from a multithreaded
+    process can deadlock on a lock one of them held.
+    """
+
+    def __init__(self, processes=None, image_url='https://picsum.photos/200',
+                 renditions: Optional[Dict[str, Tuple[int, int]]] = None,
+                 image_format='png', font_path=None, chunksize=1):
+        """
+        Initialize the BatchRenderModule.
+
+        Args:
+            processes (int): Number of worker processes. None uses the CPU count
+            image_url (str): Background image URL for 'custom_image' memes
+            renditions (dict): Rendition name to (width, height). Defaults to DEFAULT_RENDITIONS
+            image_format (str): Format the renditions are encoded in
+            font_path (str): Font used by the workers. None finds a system font
+            chunksize (int): Number of memes sent to a worker at a time
+        """
+        self.processes = processes or os.cpu_count() or 1
+        self.chunksize = chunksize
+        self.full_name = RenditionModule(renditions).full_name
+        self.image_format = image_format
+        self._config = {
+            'image_url': image_url,
+            'renditions': renditions,
+            'image_format': image_format,
+            'font_path': font_path
+        }
+
+        self._pool = None
+        self._lock = threading.Lock()
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        # The pool is started on first use so importing the module spawns nothing
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=self.processes,
+                                                 mp_context=multiprocessing.get_context(_START_METHOD),
+                                                 initializer=_init_worker,
+                                                 initargs=(self._config,))
+            return self._pool
+
+    def render(self, texts: Sequence[str], meme_type: str = 'custom_image') -> List[Dict[str, bytes]]:
+        """
+        Render and encode one meme per text.
+
+        Args:
+            texts (list): The texts to put on the memes
+            meme_type (str): 'custom_image', 'solid_background' or 'gradient'
+
+        Returns:
+            list: For each text, in order, a dict of rendition name to encoded bytes
+        """
+        if not texts:
+            return []
+        jobs = [(meme_type, text) for text in texts]
+        return list(self._get_pool().map(_render_one, jobs, chunksize=self.chunksize))
+
+    def close(self) -> None:
+        """
+        Shut down the worker processes.
+        """
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown()
+
+    def __repr__(self) -> str:
+        """Return a string representation of the BatchRenderModule."""
+        return f"BatchRenderModule(processes={self.processes}, image_format='{self.image_format}')"
@@ -0,0 +1,127 @@
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+
+class LRUCache:
+    """
+    A thread-safe least-recently-used cache bounded by item count and/or total size.
+    """
+
+    _MISSING = object()
+
+    def __init__(self, max_items: Optional[int] = 1024, max_bytes: Optional[int] = None,
+                 sizeof: Callable[[Any], int] = len):
+        """
+        Initialize the LRUCache.
+
+        Args:
+            max_items (int): Maximum number of entries. None means unbounded
+            max_bytes (int): Maximum total size of the entries. None means unbounded
+            sizeof (callable): Returns the size of a value, used with max_bytes
+        """
+        self.max_items = max_items
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+
+        self._entries = OrderedDict()
+        self._sizes = {}
+        self._lock = threading.Lock()
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """
+        Return the cached value for key and mark it as recently used.
+
+        Args:
+            key: The cache key
+            default: Value returned when the key is not cached
+        """
+        with self._lock:
+            value = self._entries.get(key, self._MISSING)
+            if value is self._MISSING:
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        """
+        Store a value, evicting the least recently used entries if a bound is exceeded.
+
+        Values larger than max_bytes on their own are not cached.
+        """
+        size = self.sizeof(value) if self.max_bytes is not None else 0
+        if self.max_bytes is not None and size > self.max_bytes:
+            return
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = value
+            self._sizes[key] = size
+            self.current_bytes += size
+
+            while self._entries and (
+                    (self.max_items is not None and len(self._entries) > self.max_items) or
+                    (self.max_bytes is not None and self.current_bytes > self.max_bytes)):
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        """
+        Remove key from the cache and return its value.
+        """
+        with self._lock:
+            if key not in self._entries:
+                return default
+            return self._remove(key)
+
+    def clear(self) -> None:
+        """
+        Remove every entry. Counters are kept.
+        """
+        with self._lock:
+            self._entries.clear()
+            self._sizes.clear()
+            self.current_bytes = 0
+
+    def keys(self) -> list:
+        """
+        Return a snapshot of the keys from least to most recently used.
+        """
+        with self._lock:
+            return list(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Return hit/miss counters and current occupancy.
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'size': len(self._entries),
+                'max_items': self.max_items,
+                'bytes': self.current_bytes,
+                'max_bytes': self.max_bytes
+            }
+
+    def _remove(self, key: Hashable) -> Any:
+        self.current_bytes -= self._sizes.pop(key)
+        return self._entries.pop(key)
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            return key in self._entries
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
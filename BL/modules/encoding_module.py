@@ -0,0 +1,179 @@
+import io
+import threading
+from typing import Callable, Dict, Hashable, Optional, Sequence, Tuple
+
+from PIL import Image
+
+from .cache_module import LRUCache
+
+FORMATS = {
+    'png': {
+        'mimetype': 'image/png',
+        'pil_format': 'PNG',
+        'options': {'optimize': False, 'compress_level': 6}
+    },
+    'jpeg': {
+        'mimetype': 'image/jpeg',
+        'pil_format': 'JPEG',
+        'options': {'quality': 85, 'optimize': True, 'progressive': True}
+    },
+    'webp': {
+        'mimetype': 'image/webp',
+        'pil_format': 'WEBP',
+        'options': {'quality': 80, 'method': 4}
+    }
+}
+
+
+class EncodingModule:
+    """
+    A service for encoding meme images and serving them in a negotiated format.
+
+    Memes are stored in one canonical format. Other formats are transcoded on
+    demand and kept in a byte-bounded LRU so each variant is encoded at most once.
+    """
+
+    def __init__(self, canonical_format='png', options: Optional[Dict[str, dict]] = None,
+                 preference: Sequence[str] = ('webp', 'jpeg', 'png'),
+                 max_cache_bytes=64 * 1024 * 1024):
+        """
+        Initialize the EncodingModule.
+
+        Args:
+            canonical_format (str): Format memes are stored in
+            options (dict): Per-format Pillow save options overriding the defaults,
+                            e.g. {'jpeg': {'quality': 75}}
+            preference (list): Formats offered to clients, most preferred first
+            max_cache_bytes (int): Size bound of the cache of transcoded variants
+        """
+        for fmt in [canonical_format, *preference]:
+            if fmt not in FORMATS:
+                raise ValueError(f"Unsupported format '{fmt}'. Choose one of {', '.join(FORMATS)}.")
+
+        self.canonical_format = canonical_format
+        self.preference = list(preference)
+        self.options = {fmt: dict(spec['options']) for fmt, spec in FORMATS.items()}
+        for fmt, overrides in (options or {}).items():
+            self.options[fmt].update(overrides)
+
+        self.cache = LRUCache(max_items=None, max_bytes=max_cache_bytes)
+        self._inflight = {}
+        self._inflight_lock = threading.Lock()
+
+    @staticmethod
+    def mimetype(fmt: str) -> str:
+        """Return the MIME type of a format."""
+        return FORMATS[fmt]['mimetype']
+
+    def encode(self, image: Image.Image, fmt: Optional[str] = None) -> bytes:
+        """
+        Encode an image.
+
+        Args:
+            image (PIL.Image): The image to encode
+            fmt (str): Target format. If None, the canonical format is used
+
+        Returns:
+            bytes: The encoded image
+        """
+        fmt = fmt or self.canonical_format
+        if fmt == 'jpeg' and image.mode not in ('RGB', 'L'):
+            image = image.convert('RGB')
+
+        buffer = io.BytesIO()
+        image.save(buffer, format=FORMATS[fmt]['pil_format'], **self.options[fmt])
+        return buffer.getvalue()
+
+    def transcode(self, image_binary: bytes, fmt: str) -> bytes:
+        """
+        Re-encode already encoded image bytes into another format.
+        """
+        with Image.open(io.BytesIO(image_binary)) as image:
+            image.load()
+            return self.encode(image, fmt)
+
+    def negotiate(self, accept_mimetypes) -> str:
+        """
+        Pick the format to serve for an Accept header.
+
+        Only formats the client names explicitly are considered, so clients
+        sending a bare */* keep getting the canonical format.
+
+        Args:
+            accept_mimetypes: The request's werkzeug MIMEAccept, e.g. request.accept_mimetypes
+
+        Returns:
+            str: The acceptable format with the highest quality, ties broken by
+                 preference, or the canonical format
+        """
+        best_format, best_quality = self.canonical_format, 0
+        for fmt in self.preference:
+            quality = max((q for value, q in (accept_mimetypes or [])
+                           if value.lower() == self.mimetype(fmt)), default=0)
+            if quality > best_quality:
+                best_format, best_quality = fmt, quality
+        return best_format
+
+    def get_variant(self, key: Hashable, fmt: str,
+                    load: Callable[[], Optional[Tuple[bytes, str]]]) -> Optional[bytes]:
+        """
+        Return the image identified by key encoded in fmt.
+
+        Args:
+            key: Identifies the stored image, e.g. (meme_id, rendition)
+            fmt (str): Requested format
+            load (callable): Returns the stored (bytes, format), or None if the image does
+                             not exist. Not called when the variant is already cached
+
+        Returns:
+            Optional[bytes]: The encoded variant, or None if the image does not exist
+        """
+        if fmt == self.canonical_format:
+            # Usually stored as-is, so skip the cache rather than holding a second copy
+            loaded = load()
+            if loaded is None:
+                return None
+            source, source_format = loaded
+            if source_format == fmt:
+                return source
+            return self._transcode_cached((key, fmt), fmt, lambda: loaded)
+
+        variant = self.cache.get((key, fmt))
+        if variant is not None:
+            return variant
+        return self._transcode_cached((key, fmt), fmt, load)
+
+    def _transcode_cached(self, cache_key, fmt: str, load) -> Optional[bytes]:
+        # Let only one thread transcode a given variant, the others wait for its result
+        with self._inflight_lock:
+            lock = self._inflight.setdefault(cache_key, threading.Lock())
+        with lock:
+            try:
+                variant = self.cache.get(cache_key)
+                if variant is not None:
+                    return variant
+
+                loaded = load()
+                if loaded is None:
+                    return None
+                source, source_format = loaded
+                if source_format == fmt:
+                    return source
+
+                variant = self.transcode(source, fmt)
+                self.cache.put(cache_key, variant)
+                return variant
+            finally:
+                with self._inflight_lock:
+                    self._inflight.pop(cache_key, None)
+
+    def invalidate(self, key: Hashable) -> None:
+        """
+        Drop every cached variant of the image identified by key.
+        """
+        for fmt in FORMATS:
+            self.cache.pop((key, fmt))
+
+    def __repr__(self) -> str:
+        """Return a string representation of the EncodingModule."""
+        return f"EncodingModule(canonical_format='{self.canonical_format}', preference={self.preference})"
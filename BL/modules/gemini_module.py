@@ -1,21 +1,29 @@
 # modules/gemini_module.py
 
-import google.generativeai as genai
-from typing import Optional
+import re
+import threading
+from typing import List, Optional
 
 
 class GeminiModule:
     """Service class for interacting with Google's Gemini AI model."""
 
-    def __init__(self, api_key: str):
+    # Strips list numbering, bullets and wrapping quotes from batch responses
+    _LIST_PREFIX = re.compile(r'^\s*(?:\d+[.)]|[-*\u2022])\s*')
+
+    def __init__(self, api_key: str, model=None, model_name: str = 'gemini-pro'):
         """Initialize the Gemini service with API key.
 
         Args:
             api_key (str): The API key for Gemini authentication
+            model: Object with a generate_content(prompt) method. If None, a
+                   genai.GenerativeModel is created on first use
+            model_name (str): Name of the Gemini model to create
         """
         self.api_key = api_key
-        genai.configure(api_key=self.api_key)
-        self.model = genai.GenerativeModel('gemini-pro')
+        self.model_name = model_name
+        self._model = model
+        self._model_lock = threading.Lock()
 
         # Define the prompt as a class constant
         self.AFFIRMATION_PROMPT = """
@@ -24,6 +32,32 @@ class GeminiModule:
         Respond with just the affirmation text.
         """.strip()
 
+        self.BATCH_AFFIRMATION_PROMPT = """
+        Please provide {count} different, powerful positive affirmation quotes that can 
+        inspire and motivate someone. Make each one brief, meaningful, and uplifting. 
+        Respond with one affirmation per line and nothing else.
+        """.strip()
+
+    @property
+    def model(self):
+        """The Gemini model, configured on first use since google.generativeai is slow to import."""
+        if self._model is None:
+            with self._model_lock:
+                if self._model is None:
+                    import google.generativeai as genai
+                    genai.configure(api_key=self.api_key)
+                    self._model = genai.GenerativeModel(self.model_name)
+        return self._model
+
+    @model.setter
+    def model(self, model) -> None:
+        self._model = model
+
+    def reset(self) -> None:
+        """Drop the Gemini client so it is configured again on first use, e.g. in a forked worker."""
+        self._model_lock = threading.Lock()
+        self._model = None
+
     def get_affirmation_text(self) -> Optional[str]:
         """Generate a positive affirmation quote using Gemini.
 
@@ -38,6 +72,40 @@ class GeminiModule:
             print(f"Error generating affirmation: {str(e)}")
             return None
 
+    def get_affirmation_batch(self, count: int = 10) -> List[str]:
+        """Generate several positive affirmation quotes in a single Gemini call.
+
+        Args:
+            count (int): Number of affirmations to ask for
+
+        Returns:
+            List[str]: The parsed affirmations, or an empty list if an error occurs
+        """
+        try:
+            response = self.model.generate_content(self.BATCH_AFFIRMATION_PROMPT.format(count=count))
+            return self.parse_affirmations(response.text)
+
+        except Exception as e:
+            print(f"Error generating affirmations: {str(e)}")
+            return []
+
+    @classmethod
+    def parse_affirmations(cls, text: str) -> List[str]:
+        """Split a multi-line Gemini response into individual affirmations.
+
+        Args:
+            text (str): The raw response text
+
+        Returns:
+            List[str]: Non-empty affirmations with numbering and quotes removed
+        """
+        affirmations = []
+        for line in text.splitlines():
+            line = cls._LIST_PREFIX.sub('', line).strip().strip('"\u201c\u201d').strip()
+            if line:
+                affirmations.append(line)
+        return affirmations
+
     def __repr__(self) -> str:
         """Return a string representation of the GeminiService."""
         return f"GeminiService(api_key='{self.api_key[:5]}...')"
\ No newline at end of file
@@ -0,0 +1,137 @@
+import math
+from functools import lru_cache
+from typing import Optional, Sequence, Tuple
+
+import numpy as np
+from PIL import Image
+
+
+@lru_cache(maxsize=32)
+def _linear_ramp(image_size: Tuple[int, int], angle: float) -> np.ndarray:
+    """
+    Build a normalized [0, 1) ramp for a linear gradient at the given angle.
+
+    Axis-aligned angles produce a (height, 1) or (1, width) array that is
+    broadcast later, so the common vertical gradient never materializes a
+    full frame of ratios.
+    """
+    width, height = image_size
+    theta = math.radians(angle)
+    dx = round(math.cos(theta), 12)
+    dy = round(math.sin(theta), 12)
+
+    xs = (np.arange(width, dtype=np.float64) / width).reshape(1, width)
+    ys = (np.arange(height, dtype=np.float64) / height).reshape(height, 1)
+
+    if dx == 0:
+        ramp = ys * dy
+    elif dy == 0:
+        ramp = xs * dx
+    else:
+        ramp = xs * dx + ys * dy
+
+    # Shift and scale so the ramp starts at 0 in the corner the gradient starts from
+    ramp = (ramp - (min(dx, 0.0) + min(dy, 0.0))) / (abs(dx) + abs(dy))
+    ramp.flags.writeable = False
+    return ramp
+
+
+@lru_cache(maxsize=32)
+def _radial_ramp(image_size: Tuple[int, int], center: Tuple[float, float]) -> np.ndarray:
+    """
+    Build a normalized [0, 1] ramp holding the distance from center to each pixel.
+    """
+    width, height = image_size
+    cx, cy = center
+
+    xs = (np.arange(width, dtype=np.float64) / width - cx).reshape(1, width)
+    ys = (np.arange(height, dtype=np.float64) / height - cy).reshape(height, 1)
+
+    ramp = np.sqrt(xs * xs + ys * ys)
+    max_distance = ramp.max()
+    if max_distance > 0:
+        ramp /= max_distance
+    ramp.flags.writeable = False
+    return ramp
+
+
+class GradientModule:
+    """
+    A NumPy-broadcast engine for rendering gradient backgrounds.
+    """
+
+    def __init__(self, image_size=(800, 600)):
+        """
+        Initialize the GradientModule.
+
+        Args:
+            image_size (tuple): Size of generated backgrounds (width, height)
+        """
+        self.image_size = tuple(image_size)
+
+    def get_ramp(self, kind: str = 'linear', angle: float = 90.0,
+                 center: Tuple[float, float] = (0.5, 0.5)) -> np.ndarray:
+        """
+        Return the cached normalized ramp for the given gradient kind.
+
+        Args:
+            kind (str): 'linear' or 'radial'
+            angle (float): Direction of a linear gradient in degrees, 90 is top to bottom
+            center (tuple): Relative (x, y) center of a radial gradient
+
+        Returns:
+            np.ndarray: Read-only ramp broadcastable to (height, width)
+        """
+        if kind == 'linear':
+            return _linear_ramp(self.image_size, float(angle))
+        if kind == 'radial':
+            return _radial_ramp(self.image_size, (float(center[0]), float(center[1])))
+        raise ValueError("Invalid gradient kind. Choose 'linear' or 'radial'.")
+
+    def render(self, colors: Sequence[Tuple[int, int, int]],
+               positions: Optional[Sequence[float]] = None,
+               kind: str = 'linear', angle: float = 90.0,
+               center: Tuple[float, float] = (0.5, 0.5)) -> Image.Image:
+        """
+        Render a gradient through the given color stops.
+
+        Args:
+            colors (list): Two or more RGB color tuples
+            positions (list): Stop positions in [0, 1]. If None, stops are evenly spaced
+            kind (str): 'linear' or 'radial'
+            angle (float): Direction of a linear gradient in degrees
+            center (tuple): Relative (x, y) center of a radial gradient
+
+        Returns:
+            PIL.Image: The gradient image
+        """
+        if len(colors) < 2:
+            raise ValueError("A gradient needs at least two colors")
+        if positions is None:
+            positions = np.linspace(0.0, 1.0, len(colors))
+        if len(positions) != len(colors):
+            raise ValueError("positions and colors must have the same length")
+
+        stops = np.asarray(positions, dtype=np.float64)
+        palette = np.asarray(colors, dtype=np.float64)
+        ramp = self.get_ramp(kind, angle, center)
+
+        if len(stops) == 2:
+            span = stops[1] - stops[0]
+            local = (ramp - stops[0]) / span if span > 0 else np.zeros_like(ramp)
+            local = np.clip(local, 0.0, 1.0)[..., np.newaxis]
+            blended = palette[0] * (1 - local) + palette[1] * local
+        else:
+            # Locate the segment each ratio falls into and its local position within it
+            segment = np.clip(np.searchsorted(stops, ramp, side='right') - 1, 0, len(stops) - 2)
+            start = stops[segment]
+            span = stops[segment + 1] - start
+            local = np.divide(ramp - start, span, out=np.zeros_like(ramp), where=span > 0)
+            local = np.clip(local, 0.0, 1.0)[..., np.newaxis]
+            blended = palette[segment] * (1 - local) + palette[segment + 1] * local
+
+        blended = blended.astype(np.uint8)
+
+        width, height = self.image_size
+        image_array = np.ascontiguousarray(np.broadcast_to(blended, (height, width, 3)))
+        return Image.fromarray(image_array)
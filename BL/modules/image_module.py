@@ -1,11 +1,11 @@
-from PIL import Image, ImageDraw, ImageFont
-import random
-import os
-import numpy as np
-import requests
 from PIL import Image
-import io
-import PIL
+import random
+
+from .background_module import BackgroundImageModule
+from .gradient_module import GradientModule
+from .text_layout_module import TextLayoutModule
+from .text_overlay_module import TextOverlayModule
+from .rendition_module import resize_if_needed
 
 class MemeImageModule:
     """
@@ -15,103 +15,55 @@ class MemeImageModule:
     image_size = None
 
     def __init__(self, font_path=None, image_size=(800, 600),
-                 default_font_size=50, text_color=(255, 255, 255)):
+                 default_font_size=50, text_color=(255, 255, 255),
+                 background_module=None, min_font_size=20):
         """
         Initialize the MemeImageService.
 
         Args:
             font_path (str): Path to a TTF font file. If None, uses default
             image_size (tuple): Default size for generated images (width, height)
-            default_font_size (int): Default font size for text
+            default_font_size (int): Default font size for text, also the largest size used
             text_color (tuple): RGB color tuple for text
+            background_module (BackgroundImageModule): Provider of downloaded backgrounds.
+                If None, a default in-memory provider is created
+            min_font_size (int): Smallest font size used to fit long text
         """
         self.image_size = image_size
         self.text_color = text_color
         self.default_font_size = default_font_size
-
-        # Try to use Arial or fall back to default
-        try:
-            if font_path:
-                self.font = ImageFont.truetype(font_path, size=default_font_size)
-            else:
-                # Try to find a system font
-                system_fonts = [
-                    '/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf',  # Linux
-                    '/System/Library/Fonts/Arial.ttf',  # MacOS
-                    'C:\\Windows\\Fonts\\Arial.ttf'  # Windows
-                ]
-                for font_path in system_fonts:
-                    if os.path.exists(font_path):
-                        self.font = ImageFont.truetype(font_path, size=default_font_size)
-                        break
-                else:
-                    self.font = ImageFont.load_default()
-        except Exception:
-            self.font = ImageFont.load_default()
+        self.gradient_module = GradientModule(image_size)
+        self.background_module = background_module or BackgroundImageModule()
+
+        # Fonts are loaded once per size and shared with the layout engine
+        self.text_layout_module = TextLayoutModule(
+            font_path,
+            min_font_size=min(min_font_size, default_font_size),
+            max_font_size=default_font_size
+        )
+        self.font = self.text_layout_module.get_font(default_font_size)
+        self.text_overlay_module = TextOverlayModule(self.text_layout_module)
 
     def _wrap_text(self, text: str, max_width: int) -> list:
         """
-        Wrap text to fit within a given width.
-        """
-        words = text.split()
-        lines = []
-        current_line = []
-
-        for word in words:
-            current_line.append(word)
-            # Check if current line width exceeds max_width
-            line = ' '.join(current_line)
-            bbox = self.font.getbbox(line)
-            if bbox[2] > max_width:
-                if len(current_line) == 1:
-                    lines.append(line)
-                    current_line = []
-                else:
-                    current_line.pop()
-                    lines.append(' '.join(current_line))
-                    current_line = [word]
-
-        if current_line:
-            lines.append(' '.join(current_line))
-
+        Wrap text to fit within a given width at the default font size.
+        """
+        lines, _ = self.text_layout_module.wrap(text, max_width, self.default_font_size)
         return lines
 
     def _add_text_to_image(self, image: Image.Image, text: str) -> Image.Image:
         """
         Add text to an image with proper wrapping and positioning.
         """
-        draw = ImageDraw.Draw(image)
-
-        # Calculate maximum width for text
-        max_width = int(image.width * 0.7)  # 90% of image width
-
-        # Wrap text
-        lines = self._wrap_text(text, max_width)
-
-        # Calculate total text height
-        line_spacing = self.default_font_size * 1.2
-        total_text_height = len(lines) * line_spacing
-
-        # Calculate starting Y position to center text vertically
-        current_y = (image.height - total_text_height) / 2
-
-        # Draw each line
-        for line in lines:
-            # Get line width for centering
-            bbox = self.font.getbbox(line)
-            text_width = bbox[2] - bbox[0]
-            x = (image.width - text_width) / 2
+        # Calculate the text box: 70% of the width, 90% of the height
+        max_width = int(image.width * 0.7)
+        max_height = image.height * 0.9
 
-            # Add subtle text shadow for better readability
-            shadow_offset = 3
-            draw.text((x + shadow_offset, current_y + shadow_offset),
-                      line, font=self.font, fill=(0, 0, 0))
+        # The shadowed text block is rendered once per text and reused across backgrounds
+        overlay = self.text_overlay_module.get_overlay(text, self.text_color, max_width, max_height)
+        overlay.composite(image)
 
-            # Draw main text
-            draw.text((x, current_y), line, font=self.font, fill=self.text_color)
-            current_y += line_spacing
-
-        return image.resize((800, 600), PIL.Image.Resampling.LANCZOS)
+        return resize_if_needed(image, (800, 600))
 
     def create_meme_with_solid_background(self, text: str, background_color=None) -> Image.Image:
         """
@@ -136,40 +88,55 @@ class MemeImageModule:
         return MemeImageModule._add_text_to_image(self,image, text)
 
     def create_meme_with_downloaded_image(self, text: str, image_url: str) -> Image.Image:
-        response = requests.get(image_url)
-        response.raise_for_status()
-
-        with Image.open(io.BytesIO(response.content)) as img:
-            # Use LANCZOS (best for downscaling) or specific size
-            resized_img = img.resize(
-                (self.image_size[0], self.image_size[1]),
-                Image.Resampling.LANCZOS
-            )
+        """
+        Create a meme on a background downloaded from image_url.
+
+        Args:
+            text (str): The text to put on the image
+            image_url (str): URL of the background image
 
-            # Add text to the image
-            resized_img = MemeImageModule._add_text_to_image(self, resized_img, text)
+        Returns:
+            PIL.Image: The generated meme image
+        """
+        # Already decoded and resized to image_size by the provider
+        background = self.background_module.get_background(image_url, self.image_size)
 
-        return resized_img
+        return MemeImageModule.create_meme_with_background(self, text, background)
 
-    def create_gradient_background(self) -> Image.Image:
+    def create_meme_with_background(self, text: str, background: Image.Image) -> Image.Image:
         """
-        Create a background with a gradient effect.
+        Create a meme on a background that was already fetched, e.g. by an async downloader.
+
+        Args:
+            text (str): The text to put on the image
+            background (PIL.Image): Background of image_size, drawn on in place
+
+        Returns:
+            PIL.Image: The generated meme image
         """
-        # Create gradient colors
-        color1 = (random.randint(0, 255), random.randint(0, 255), random.randint(0, 255))
-        color2 = (random.randint(0, 255), random.randint(0, 255), random.randint(0, 255))
+        return MemeImageModule._add_text_to_image(self, background, text)
 
-        # Create gradient array
-        width, height = self.image_size
-        image_array = np.zeros((height, width, 3), dtype=np.uint8)
+    def create_gradient_background(self, colors=None, positions=None,
+                                   kind='linear', angle=90.0) -> Image.Image:
+        """
+        Create a background with a gradient effect.
 
-        for y in range(height):
-            ratio = y / height
-            for x in range(width):
-                for i in range(3):
-                    image_array[y, x, i] = int(color1[i] * (1 - ratio) + color2[i] * ratio)
+        Args:
+            colors (list): RGB color tuples to blend through. If None, two random colors are used
+            positions (list): Stop positions in [0, 1] for each color. If None, evenly spaced
+            kind (str): 'linear' or 'radial'
+            angle (float): Direction of a linear gradient in degrees, 90 is top to bottom
 
-        return Image.fromarray(image_array)
+        Returns:
+            PIL.Image: The gradient background
+        """
+        if colors is None:
+            # Create gradient colors
+            color1 = (random.randint(0, 255), random.randint(0, 255), random.randint(0, 255))
+            color2 = (random.randint(0, 255), random.randint(0, 255), random.randint(0, 255))
+            colors = [color1, color2]
+
+        return self.gradient_module.render(colors, positions=positions, kind=kind, angle=angle)
 
     def create_meme_with_gradient(self, text: str) -> Image.Image:
         """
@@ -184,3 +151,24 @@ class MemeImageModule:
         image = MemeImageModule.create_gradient_background(self)
         return MemeImageModule._add_text_to_image(self, image, text)
 
+
+    def create_meme(self, text: str, meme_type: str = "custom_image", image_url: str = None) -> Image.Image:
+        """
+        Create a meme of the given type.
+
+        Args:
+            text (str): The text to put on the image
+            meme_type (str): 'custom_image', 'solid_background' or 'gradient'
+            image_url (str): Background image URL, required for 'custom_image'
+
+        Returns:
+            PIL.Image: The generated meme image
+        """
+        if meme_type == "custom_image":
+            return MemeImageModule.create_meme_with_downloaded_image(self, text, image_url)
+        elif meme_type == "solid_background":
+            return MemeImageModule.create_meme_with_solid_background(self, text)
+        elif meme_type == "gradient":
+            return MemeImageModule.create_meme_with_gradient(self, text)
+        else:
+            raise ValueError("Invalid meme type. Choose 'custom_image', 'gradient', or 'solid_background'.")
@@ -0,0 +1,190 @@
+import threading
+from typing import Callable, Dict, Optional, Sequence
+
+import logging as log
+
+
+class MemeInventoryModule:
+    """
+    A stock of memes per meme type that were generated, rendered and stored ahead of demand.
+
+    The stock lives in MongoDB, so every process serving the same database
+    shares it and a meme is claimed atomically by exactly one request. A
+    background thread tops each meme type up to target_size with the regular
+    create_meme pipeline whenever a claim leaves it at or below
+    low_water_mark, a claim finds it empty, or every poll_interval seconds to
+    catch up with claims made by other processes.
+    """
+
+    def __init__(self, create_meme: Callable[[str], dict], mongo_module,
+                 meme_types: Sequence[str] = ("custom_image", "solid_background", "gradient"),
+                 target_size: int = 5, low_water_mark: int = 2, poll_interval: float = 30.0,
+                 max_failures: int = 3):
+        """
+        Initialize the MemeInventoryModule.
+
+        Args:
+            create_meme (callable): Generates and stores a meme of the given type and returns
+                                    its save result with status and meme_id
+            mongo_module (MongoModule): Database holding the inventory
+            meme_types (list): Meme types kept in stock
+            target_size (int): Number of memes kept ready per meme type
+            low_water_mark (int): Stock at or below which a claim triggers replenishment
+            poll_interval (float): Seconds between stock checks when nothing triggers one
+            max_failures (int): Consecutive failed generations after which a replenishment round gives up
+        """
+        if low_water_mark >= target_size:
+            raise ValueError("low_water_mark must be smaller than target_size")
+
+        self.create_meme = create_meme
+        self.mongo_module = mongo_module
+        self.meme_types = tuple(meme_types)
+        self.target_size = target_size
+        self.low_water_mark = low_water_mark
+        self.poll_interval = poll_interval
+        self.max_failures = max_failures
+
+        # Last known stock per meme type, kept up to date by claims and replenishment
+        self._levels = {meme_type: 0 for meme_type in self.meme_types}
+        self._stats = {meme_type: {'hits': 0, 'misses': 0, 'replenished': 0, 'failures': 0}
+                       for meme_type in self.meme_types}
+        self._condition = threading.Condition()
+        self._replenish_requested = False
+        self._closed = False
+        self._thread = None
+
+    def start(self) -> None:
+        """
+        Start the background replenisher if it is not already running.
+        """
+        with self._condition:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._closed = False
+            self._replenish_requested = True
+            self._thread = threading.Thread(target=self._run, name='meme-inventory', daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        """
+        Stop the background replenisher, letting a meme being generated finish.
+        """
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def claim(self, meme_type: str) -> Optional[str]:
+        """
+        Take a ready meme of meme_type out of the inventory.
+
+        Args:
+            meme_type (str): Type of the meme
+
+        Returns:
+            Optional[str]: The meme_id of the claimed meme, or None if the stock is empty,
+                           in which case the caller should generate one synchronously
+        """
+        if meme_type not in self._levels:
+            return None
+
+        meme_id = self.mongo_module.claim_from_inventory(meme_type)
+        with self._condition:
+            if meme_id is None:
+                self._stats[meme_type]['misses'] += 1
+                self._levels[meme_type] = 0
+                self._request_replenish()
+            else:
+                self._stats[meme_type]['hits'] += 1
+                self._levels[meme_type] = max(self._levels[meme_type] - 1, 0)
+                if self._levels[meme_type] <= self.low_water_mark:
+                    self._request_replenish()
+        return meme_id
+
+    def replenish(self) -> Dict[str, int]:
+        """
+        Generate memes until every meme type is back at target_size.
+
+        Meme types are topped up round-robin so an empty one does not wait for
+        the others. Every process serving the database replenishes the same
+        stock, so it is counted again before each generation: concurrent
+        replenishers overshoot target_size by at most one meme each.
+
+        Returns:
+            dict: Number of memes added per meme type
+        """
+        added = {meme_type: 0 for meme_type in self.meme_types}
+        failures = {meme_type: 0 for meme_type in self.meme_types}
+        pending = list(self.meme_types)
+        while pending and not self._closed:
+            for meme_type in list(pending):
+                if self._closed:
+                    break
+                level = self.mongo_module.count_inventory(meme_type)
+                with self._condition:
+                    self._levels[meme_type] = level
+                if level >= self.target_size or failures[meme_type] >= self.max_failures:
+                    pending.remove(meme_type)
+                elif self._add_meme(meme_type):
+                    added[meme_type] += 1
+                    failures[meme_type] = 0
+                else:
+                    failures[meme_type] += 1
+
+        log.debug(f'Meme inventory replenished with {added}')
+        return added
+
+    def _add_meme(self, meme_type: str) -> bool:
+        try:
+            result = self.create_meme(meme_type)
+            # A meme that already existed may have been handed out, only fresh ones are stocked
+            stocked = result.get('status') == 'Successfully Inserted' and \
+                self.mongo_module.add_to_inventory(result['meme_id'], meme_type)
+        except Exception as e:
+            log.error(f"Error generating {meme_type} meme for the inventory: {e}")
+            stocked = False
+
+        with self._condition:
+            if stocked:
+                self._levels[meme_type] += 1
+                self._stats[meme_type]['replenished'] += 1
+            else:
+                self._stats[meme_type]['failures'] += 1
+        return stocked
+
+    def _request_replenish(self) -> None:
+        self._replenish_requested = True
+        self._condition.notify_all()
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._replenish_requested or self._closed,
+                                         timeout=self.poll_interval)
+                if self._closed:
+                    return
+                self._replenish_requested = False
+            try:
+                self.replenish()
+            except Exception as e:
+                log.error(f"Error replenishing meme inventory: {e}")
+
+    def levels(self) -> Dict[str, int]:
+        """Return the last known number of ready memes per meme type."""
+        with self._condition:
+            return dict(self._levels)
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """
+        Return per meme type the stock level, claims served from stock (hits), claims
+        that found it empty (misses), memes added and failed generations.
+        """
+        with self._condition:
+            return {meme_type: {'level': self._levels[meme_type], **counts}
+                    for meme_type, counts in self._stats.items()}
+
+    def __repr__(self) -> str:
+        """Return a string representation of the MemeInventoryModule."""
+        return f"MemeInventoryModule(levels={self.levels()}, target_size={self.target_size})"
@@ -0,0 +1,212 @@
+import queue
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, Optional
+
+import logging as log
+
+
+class QueueFullError(Exception):
+    """Raised when a job is submitted while the queue is at its size limit."""
+
+
+class Job:
+    """
+    A unit of work submitted to the JobQueueModule and its outcome.
+    """
+
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    SUCCEEDED = 'succeeded'
+    FAILED = 'failed'
+    EXPIRED = 'expired'
+
+    def __init__(self, kwargs: Dict[str, Any]):
+        self.id = uuid.uuid4().hex
+        self.kwargs = kwargs
+        self.status = Job.QUEUED
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self._enqueued = time.monotonic()
+        self._started = None
+        self._finished = None
+
+    @property
+    def done(self) -> bool:
+        return self.status in (Job.SUCCEEDED, Job.FAILED, Job.EXPIRED)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Describe the job, including how long it waited in the queue and ran, in milliseconds.
+        """
+        now = time.monotonic()
+        started = self._started if self._started is not None else (self._finished or now)
+        finished = self._finished or now
+        return {
+            'job_id': self.id,
+            'status': self.status,
+            'result': self.result,
+            'error': self.error,
+            'created_at': self.created_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+            'timings_ms': {
+                'queued': round((started - self._enqueued) * 1000, 2),
+                'running': round((finished - started) * 1000, 2) if self._started is not None else 0.0,
+                'total': round((finished - self._enqueued) * 1000, 2)
+            }
+        }
+
+
+class JobQueueModule:
+    """
+    An in-process job queue drained by a pool of worker threads.
+
+    Submitting returns immediately with a Job whose status can be polled. The
+    queue is bounded, and jobs that wait longer than queue_timeout expire
+    without running.
+    """
+
+    def __init__(self, handler: Callable[..., Any], workers=4, max_queue_size=100,
+                 queue_timeout=60.0, retention=600.0):
+        """
+        Initialize the JobQueueModule.
+
+        Args:
+            handler (callable): Runs a job, called with the job's keyword arguments
+            workers (int): Number of worker threads
+            max_queue_size (int): Maximum number of queued jobs before submit raises QueueFullError
+            queue_timeout (float): Seconds a job may wait in the queue before it expires
+            retention (float): Seconds finished jobs are kept for status queries
+        """
+        self.handler = handler
+        self.workers = workers
+        self.max_queue_size = max_queue_size
+        self.queue_timeout = queue_timeout
+        self.retention = retention
+
+        self._queue = queue.Queue(maxsize=max_queue_size)
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self._threads = []
+        self._running = 0
+
+    def start(self) -> None:
+        """
+        Start the worker threads if they are not already running.
+        """
+        with self._lock:
+            self._threads = [thread for thread in self._threads if thread.is_alive()]
+            for index in range(len(self._threads), self.workers):
+                thread = threading.Thread(target=self._work, name=f'meme-job-worker-{index}', daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def stop(self) -> None:
+        """
+        Stop the worker threads after they finish the jobs already queued.
+        """
+        with self._lock:
+            threads = list(self._threads)
+            self._threads = []
+        for _ in threads:
+            self._queue.put(None)
+        for thread in threads:
+            thread.join()
+
+    def submit(self, **kwargs) -> Job:
+        """
+        Queue a job.
+
+        Args:
+            kwargs: Keyword arguments for the handler
+
+        Returns:
+            Job: The queued job
+
+        Raises:
+            QueueFullError: If max_queue_size jobs are already waiting
+        """
+        self.start()
+        self._prune()
+
+        job = Job(kwargs)
+        with self._lock:
+            self._jobs[job.id] = job
+        try:
+            self._queue.put_nowait(job)
+        except queue.Full:
+            with self._lock:
+                del self._jobs[job.id]
+            raise QueueFullError(f"Job queue is full ({self.max_queue_size} jobs waiting)")
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """
+        Return a job by id, or None if it is unknown or was pruned.
+        """
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Return the number of queued and running jobs and the queue limits.
+        """
+        with self._lock:
+            return {
+                'queued': self._queue.qsize(),
+                'running': self._running,
+                'workers': len(self._threads),
+                'max_queue_size': self.max_queue_size,
+                'tracked_jobs': len(self._jobs)
+            }
+
+    def _work(self) -> None:
+        while True:
+            job = self._queue.get()
+            if job is None:
+                return
+
+            if time.monotonic() - job._enqueued > self.queue_timeout:
+                job.status = Job.EXPIRED
+                job.error = f"Job waited longer than {self.queue_timeout} seconds in the queue"
+                self._finish(job)
+                continue
+
+            with self._lock:
+                self._running += 1
+            job.status = Job.RUNNING
+            job.started_at = time.time()
+            job._started = time.monotonic()
+            try:
+                job.result = self.handler(**job.kwargs)
+                job.status = Job.SUCCEEDED
+            except Exception as e:
+                log.error(f"Job {job.id} failed: {e}")
+                job.error = str(e)
+                job.status = Job.FAILED
+            finally:
+                with self._lock:
+                    self._running -= 1
+                self._finish(job)
+
+    @staticmethod
+    def _finish(job: Job) -> None:
+        job._finished = time.monotonic()
+        job.finished_at = time.time()
+
+    def _prune(self) -> None:
+        cutoff = time.monotonic() - self.retention
+        with self._lock:
+            expired = [job_id for job_id, job in self._jobs.items()
+                       if job.done and job._finished is not None and job._finished < cutoff]
+            for job_id in expired:
+                del self._jobs[job_id]
+
+    def __repr__(self) -> str:
+        """Return a string representation of the JobQueueModule."""
+        return f"JobQueueModule(workers={self.workers}, max_queue_size={self.max_queue_size})"
@@ -0,0 +1,99 @@
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, Optional
+
+from .cache_module import LRUCache
+
+
+class CachedMemeImage:
+    """
+    The bytes of one stored meme rendition together with its HTTP validators.
+    """
+
+    __slots__ = ('data', 'format', 'content_hash', 'created_at')
+
+    def __init__(self, data: bytes, format: str, content_hash: str,
+                 created_at: Optional[datetime] = None):
+        self.data = data
+        self.format = format
+        self.content_hash = content_hash
+        self.created_at = created_at
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+
+class MemeCacheModule:
+    """
+    An in-process, byte-bounded LRU of the most requested meme images.
+
+    Meme images are immutable once saved, so entries only need to be dropped
+    when a meme is updated or deleted.
+    """
+
+    def __init__(self, max_bytes=128 * 1024 * 1024, max_item_bytes=4 * 1024 * 1024):
+        """
+        Initialize the MemeCacheModule.
+
+        Args:
+            max_bytes (int): Total size bound of the cached images
+            max_item_bytes (int): Images larger than this are streamed without being cached
+        """
+        self.max_item_bytes = max_item_bytes
+        self.cache = LRUCache(max_items=None, max_bytes=max_bytes)
+
+    def get(self, meme_id: str, rendition: str) -> Optional[CachedMemeImage]:
+        """
+        Return the cached rendition of a meme, or None on a miss.
+        """
+        return self.cache.get((meme_id, rendition))
+
+    def put(self, meme_id: str, rendition: str, image: CachedMemeImage) -> None:
+        """
+        Cache a rendition of a meme unless it is larger than max_item_bytes.
+        """
+        if len(image) <= self.max_item_bytes:
+            self.cache.put((meme_id, rendition), image)
+
+    def fill(self, meme_id: str, rendition: str, reader, chunks: Iterable[bytes]) -> Iterator[bytes]:
+        """
+        Pass through the chunks of a whole rendition streamed from reader, caching it after the last one.
+
+        Renditions larger than max_item_bytes, and streams closed before their
+        end, go through without being kept.
+
+        Args:
+            meme_id (str): ID of the meme
+            rendition (str): Name of the rendition
+            reader (BlobReader): Open rendition with its length and validators
+            chunks (iterable): The bytes of reader from the start
+        """
+        if reader.length > self.max_item_bytes:
+            yield from chunks
+            return
+
+        parts = []
+        for chunk in chunks:
+            parts.append(chunk)
+            yield chunk
+        data = b''.join(parts)
+        if len(data) == reader.length:
+            self.put(meme_id, rendition, CachedMemeImage(data, reader.format, reader.content_hash,
+                                                         reader.created_at))
+
+    def invalidate(self, meme_id: str) -> None:
+        """
+        Drop every cached rendition of a meme.
+        """
+        for key in self.cache.keys():
+            if key[0] == meme_id:
+                self.cache.pop(key)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Return hit/miss counters and occupancy of the cache.
+        """
+        return self.cache.stats()
+
+    def __repr__(self) -> str:
+        """Return a string representation of the MemeCacheModule."""
+        return f"MemeCacheModule(entries={len(self.cache)}, max_bytes={self.cache.max_bytes})"
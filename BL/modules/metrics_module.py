@@ -0,0 +1,283 @@
+import bisect
+import contextvars
+import functools
+import inspect
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+# Seconds, from a cached lookup up to a slow Gemini call
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Stage timings of the request being handled on this thread, None outside requests
+_request_timings = contextvars.ContextVar('request_timings', default=None)
+
+
+def _label_key(labels: Dict[str, Any]) -> Tuple[Tuple[str, str], ...]:
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+def _format_labels(key: Tuple[Tuple[str, str], ...], extra: str = '') -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in key]
+    if extra:
+        parts.append(extra)
+    return '{' + ','.join(parts) + '}' if parts else ''
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Histogram:
+    """
+    A Prometheus histogram with one set of cumulative buckets per label set.
+    """
+
+    type = 'histogram'
+
+    def __init__(self, name: str, help: str, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels) -> None:
+        key = _label_key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                # Per-bucket counts, the last slot is +Inf, then the sum
+                series = self._series[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    def collect(self) -> Iterator[str]:
+        with self._lock:
+            snapshot = {key: list(series) for key, series in self._series.items()}
+        for key, series in sorted(snapshot.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), series):
+                cumulative += count
+                le = 'le="' + _format_value(bound) + '"'
+                yield f'{self.name}_bucket{_format_labels(key, le)} {cumulative}'
+            yield f'{self.name}_sum{_format_labels(key)} {_format_value(series[-1])}'
+            yield f'{self.name}_count{_format_labels(key)} {cumulative}'
+
+
+class Counter:
+    """
+    A Prometheus counter per label set.
+    """
+
+    type = 'counter'
+
+    def __init__(self, name: str, help: str):
+        self.name = name
+        self.help = help
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def collect(self) -> Iterator[str]:
+        with self._lock:
+            snapshot = dict(self._values)
+        for key, value in sorted(snapshot.items()):
+            yield f'{self.name}{_format_labels(key)} {_format_value(value)}'
+
+
+class Gauge:
+    """
+    A Prometheus gauge or counter whose values are read from a callback at scrape time.
+
+    The callback returns (labels, value) pairs, so values kept elsewhere, such
+    as cache statistics, cost nothing until scraped.
+    """
+
+    def __init__(self, name: str, help: str, callback: Callable[[], List[Tuple[Dict[str, Any], float]]],
+                 type: str = 'gauge'):
+        self.name = name
+        self.help = help
+        self.callback = callback
+        self.type = type
+
+    def collect(self) -> Iterator[str]:
+        for labels, value in self.callback():
+            yield f'{self.name}{_format_labels(_label_key(labels))} {_format_value(value)}'
+
+
+class MetricsModule:
+    """
+    In-process metrics with a Prometheus text endpoint and per-request Server-Timing.
+
+    Stage durations go into one histogram labeled by stage and, while a
+    request is being handled on the same thread, into that request's
+    Server-Timing list. Recording is a lock-protected bucket increment, cheap
+    enough to leave on under load.
+    """
+
+    def __init__(self, namespace: str = 'meme', buckets: Sequence[float] = DEFAULT_BUCKETS):
+        """
+        Initialize the MetricsModule.
+
+        Args:
+            namespace (str): Prefix of the built-in metric names
+            buckets (list): Upper bounds in seconds of the stage histogram buckets
+        """
+        self.namespace = namespace
+        self.buckets = tuple(buckets)
+        self._metrics = {}
+        self._lock = threading.Lock()
+        self.stage_seconds = self.histogram(f'{namespace}_stage_seconds', 'Duration of pipeline stages')
+
+    def _register(self, metric):
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def histogram(self, name: str, help: str, buckets: Optional[Sequence[float]] = None) -> Histogram:
+        """Return the histogram called name, creating it on first use."""
+        return self._register(Histogram(name, help, buckets or self.buckets))
+
+    def counter(self, name: str, help: str) -> Counter:
+        """Return the counter called name, creating it on first use."""
+        return self._register(Counter(name, help))
+
+    def gauge(self, name: str, help: str, callback: Callable[[], List[Tuple[Dict[str, Any], float]]],
+              type: str = 'gauge') -> Gauge:
+        """
+        Register a metric read from callback at scrape time.
+
+        Args:
+            name (str): Metric name
+            help (str): Metric description
+            callback (callable): Returns (labels, value) pairs
+            type (str): 'gauge', or 'counter' for monotonic values such as cache hits
+        """
+        return self._register(Gauge(name, help, callback, type))
+
+    def record(self, stage: str, seconds: float) -> None:
+        """
+        Record that a stage took seconds.
+        """
+        self.stage_seconds.observe(seconds, stage=stage)
+        timings = _request_timings.get()
+        if timings is not None:
+            timings.append((stage, seconds))
+
+    @contextmanager
+    def timer(self, stage: str):
+        """
+        Time the enclosed block as stage, also when it raises.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, time.perf_counter() - start)
+
+    def timed(self, stage: str) -> Callable[[Callable], Callable]:
+        """
+        Decorator timing every call of a function as stage.
+
+        Coroutine functions are timed until their coroutine completes.
+        """
+        def decorator(function: Callable) -> Callable:
+            if inspect.iscoroutinefunction(function):
+                @functools.wraps(function)
+                async def async_wrapper(*args, **kwargs):
+                    start = time.perf_counter()
+                    try:
+                        return await function(*args, **kwargs)
+                    finally:
+                        self.record(stage, time.perf_counter() - start)
+                return async_wrapper
+
+            @functools.wraps(function)
+            def wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return function(*args, **kwargs)
+                finally:
+                    self.record(stage, time.perf_counter() - start)
+            return wrapper
+        return decorator
+
+    def instrument(self, target: Any, methods: Dict[str, str]) -> Any:
+        """
+        Time methods of an object without changing its class.
+
+        The bound methods are replaced on the instance, so every caller,
+        including background threads holding the object, is timed.
+
+        Args:
+            target: The object to instrument
+            methods (dict): Method name to stage name
+
+        Returns:
+            The target
+        """
+        for method_name, stage in methods.items():
+            setattr(target, method_name, self.timed(stage)(getattr(target, method_name)))
+        return target
+
+    @staticmethod
+    def start_request() -> contextvars.Token:
+        """
+        Start collecting the stage timings of a request on the current thread.
+        """
+        return _request_timings.set([])
+
+    @staticmethod
+    def finish_request(token: contextvars.Token) -> List[Tuple[str, float]]:
+        """
+        Stop collecting and return the (stage, seconds) timings of the request, in order.
+        """
+        timings = _request_timings.get() or []
+        _request_timings.reset(token)
+        return timings
+
+    @staticmethod
+    def server_timing(timings: List[Tuple[str, float]], total: Optional[float] = None) -> str:
+        """
+        Format timings as a Server-Timing header value, summing repeated stages.
+        """
+        durations = {}
+        for stage, seconds in timings:
+            durations[stage] = durations.get(stage, 0.0) + seconds
+        if total is not None:
+            durations['total'] = total
+        return ', '.join(f'{stage};dur={seconds * 1000:.1f}' for stage, seconds in durations.items())
+
+    def render(self) -> str:
+        """
+        Return every metric in the Prometheus text exposition format.
+        """
+        with self._lock:
+            metrics = list(self._metrics.values())
+
+        lines = []
+        for metric in metrics:
+            lines.append(f'# HELP {metric.name} {metric.help}')
+            lines.append(f'# TYPE {metric.name} {metric.type}')
+            lines.extend(metric.collect())
+        return '\n'.join(lines) + '\n'
+
+    def __repr__(self) -> str:
+        """Return a string representation of the MetricsModule."""
+        return f"MetricsModule(namespace='{self.namespace}', metrics={len(self._metrics)})"
@@ -0,0 +1,76 @@
+from typing import Dict, Optional, Tuple
+
+from PIL import Image
+
+DEFAULT_RENDITIONS = {
+    'full': (800, 600),
+    'medium': (400, 300),
+    'thumbnail': (200, 150)
+}
+
+
+def resize_if_needed(image: Image.Image, size: Tuple[int, int],
+                     resample=Image.Resampling.LANCZOS,
+                     reducing_gap: Optional[float] = None) -> Image.Image:
+    """
+    Resize image to size, returning it unchanged if it already has that size.
+    """
+    size = tuple(size)
+    if image.size == size:
+        return image
+    return image.resize(size, resample, reducing_gap=reducing_gap)
+
+
+class RenditionModule:
+    """
+    A pipeline that produces several sizes of a rendered meme from one render.
+    """
+
+    def __init__(self, renditions: Optional[Dict[str, Tuple[int, int]]] = None,
+                 resample=Image.Resampling.LANCZOS, reducing_gap=2.0):
+        """
+        Initialize the RenditionModule.
+
+        Args:
+            renditions (dict): Rendition name to (width, height). Defaults to DEFAULT_RENDITIONS
+            resample: Pillow resampling filter for downscaling
+            reducing_gap (float): Lets Pillow shrink by integer factors with a cheap box
+                                  reduction before resampling. None always resamples fully
+        """
+        self.renditions = dict(renditions or DEFAULT_RENDITIONS)
+        self.resample = resample
+        self.reducing_gap = reducing_gap
+
+    @property
+    def full_name(self) -> str:
+        """Name of the largest configured rendition."""
+        return max(self.renditions, key=lambda name: self.renditions[name][0] * self.renditions[name][1])
+
+    def render(self, image: Image.Image) -> Dict[str, Image.Image]:
+        """
+        Produce every configured rendition of image.
+
+        Renditions are made from largest to smallest, each one downscaled from
+        the previous, so every step shrinks by a small factor. A rendition that
+        already has the right size is the same image object.
+
+        Args:
+            image (PIL.Image): The rendered meme
+
+        Returns:
+            dict: Rendition name to image
+        """
+        results = {}
+        source = image
+        for name, size in sorted(self.renditions.items(),
+                                 key=lambda item: item[1][0] * item[1][1], reverse=True):
+            # Never upscale a smaller intermediate, go back to the original instead
+            if size[0] > source.width or size[1] > source.height:
+                source = image
+            source = resize_if_needed(source, size, self.resample, self.reducing_gap)
+            results[name] = source
+        return results
+
+    def __repr__(self) -> str:
+        """Return a string representation of the RenditionModule."""
+        return f"RenditionModule(renditions={self.renditions})"
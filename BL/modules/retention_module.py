@@ -0,0 +1,100 @@
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+
+import logging as log
+
+
+class MemeRetentionModule:
+    """
+    Deletes memes older than a retention period in the background.
+
+    Expiry goes through MongoModule.expire_memes rather than a TTL index, so
+    memes other saves still reference are kept and the blobs of expired
+    memes are deleted with them. Every process serving the same database may
+    run a sweeper: each meme is retired atomically by exactly one of them.
+    """
+
+    def __init__(self, mongo_module, max_age: float, interval: float = 3600.0, batch_size: int = 100):
+        """
+        Initialize the MemeRetentionModule.
+
+        Args:
+            mongo_module (MongoModule): Database holding the memes
+            max_age (float): Seconds after their creation that memes are deleted
+            interval (float): Seconds between sweeps
+            batch_size (int): Memes looked up per round-trip of a sweep
+        """
+        if max_age <= 0:
+            raise ValueError("max_age must be positive")
+
+        self.mongo_module = mongo_module
+        self.max_age = max_age
+        self.interval = interval
+        self.batch_size = batch_size
+
+        self._stats = {'sweeps': 0, 'expired': 0, 'failures': 0}
+        self._condition = threading.Condition()
+        self._closed = False
+        self._thread = None
+
+    def start(self) -> None:
+        """
+        Start the background sweeper if it is not already running.
+        """
+        with self._condition:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._closed = False
+            self._thread = threading.Thread(target=self._run, name='meme-retention', daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        """
+        Stop the background sweeper, letting a sweep in progress finish.
+        """
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def sweep(self, now: Optional[datetime] = None) -> int:
+        """
+        Delete the memes created more than max_age seconds before now.
+
+        Args:
+            now (datetime): Reference time, defaults to the current time
+
+        Returns:
+            int: Number of memes deleted
+        """
+        cutoff = (now or datetime.now()) - timedelta(seconds=self.max_age)
+        expired = self.mongo_module.expire_memes(cutoff, batch_size=self.batch_size)['expired']
+        with self._condition:
+            self._stats['sweeps'] += 1
+            self._stats['expired'] += expired
+        return expired
+
+    def _run(self) -> None:
+        while True:
+            try:
+                self.sweep()
+            except Exception as e:
+                log.error(f"Error expiring memes: {e}")
+                with self._condition:
+                    self._stats['failures'] += 1
+            with self._condition:
+                self._condition.wait_for(lambda: self._closed, timeout=self.interval)
+                if self._closed:
+                    return
+
+    def stats(self) -> Dict[str, int]:
+        """Return the number of sweeps, memes deleted and failed sweeps."""
+        with self._condition:
+            return dict(self._stats)
+
+    def __repr__(self) -> str:
+        """Return a string representation of the MemeRetentionModule."""
+        return f"MemeRetentionModule(max_age={self.max_age}, interval={self.interval})"
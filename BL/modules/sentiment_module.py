@@ -1,5 +1,56 @@
-from nltk.sentiment import SentimentIntensityAnalyzer
-import nltk
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional
+
+import logging as log
+
+from .cache_module import LRUCache
+
+# Location of the VADER lexicon inside an NLTK data directory
+VADER_LEXICON = 'sentiment/vader_lexicon.zip'
+
+# Analyzer used by process pool workers, created once per worker process
+_worker_sia = None
+
+
+def load_analyzer(data_dir: Optional[str] = None, download: bool = True):
+    """
+    Build a VADER SentimentIntensityAnalyzer from a local copy of the lexicon.
+
+    nltk is imported here rather than at module import, since it is slow to load.
+
+    Args:
+        data_dir (str): NLTK data directory searched first. NLTK_DATA and the default
+                        NLTK locations are searched too
+        download (bool): Whether to download the lexicon if no local copy is found
+
+    Raises:
+        LookupError: If the lexicon is missing and download is False
+    """
+    import nltk
+    from nltk.sentiment import SentimentIntensityAnalyzer
+
+    if data_dir and data_dir not in nltk.data.path:
+        nltk.data.path.insert(0, data_dir)
+    try:
+        nltk.data.find(VADER_LEXICON)
+    except LookupError:
+        if not download:
+            raise
+        log.warning('VADER lexicon not found locally, downloading it')
+        if not nltk.download('vader_lexicon', download_dir=data_dir, quiet=True):
+            raise
+    return SentimentIntensityAnalyzer()
+
+
+def _init_worker(data_dir: Optional[str]) -> None:
+    global _worker_sia
+    _worker_sia = load_analyzer(data_dir, download=False)
+
+
+def _score_texts(texts: List[str]) -> List[dict]:
+    return [_worker_sia.polarity_scores(text) for text in texts]
 
 
 class SentimentModule:
@@ -7,21 +58,66 @@ class SentimentModule:
     A service class responsible for analyzing sentiment in text using NLTK's VADER sentiment analyzer.
     """
 
-    def __init__(self, positive_threshold=0.05):
+    def __init__(self, positive_threshold=0.05, cache_size=4096,
+                 parallel_threshold=2000, max_workers=None, data_dir=None, download=True):
         """
         Initialize the SentimentService.
 
         Args:
             positive_threshold (float): The compound score threshold above which a sentence
                                       is considered positive. Defaults to 0.05.
+            cache_size (int): Maximum number of texts whose scores are memoized.
+            parallel_threshold (int): Minimum number of uncached texts in an analyze_many
+                                      batch before it is fanned out over a process pool.
+            max_workers (int): Size of that process pool. None uses the CPU count.
+            data_dir (str): NLTK data directory holding the VADER lexicon. Defaults to
+                            SENTIMENT_DATA_DIR, then the NLTK search path.
+            download (bool): Whether to download the lexicon when it is not found locally.
         """
-        try:
-            nltk.data.find('vader_lexicon')
-        except LookupError:
-            nltk.download('vader_lexicon')
-
-        self.sia = SentimentIntensityAnalyzer()
+        self.data_dir = data_dir or os.environ.get('SENTIMENT_DATA_DIR')
+        self.download = download
+        self._sia = None
+        self._sia_lock = threading.Lock()
         self.positive_threshold = positive_threshold
+        self.parallel_threshold = parallel_threshold
+        self.max_workers = max_workers
+        self.cache = LRUCache(max_items=cache_size)
+
+    @property
+    def sia(self):
+        """The VADER analyzer, loaded with its lexicon on first use."""
+        if self._sia is None:
+            with self._sia_lock:
+                if self._sia is None:
+                    self._sia = load_analyzer(self.data_dir, self.download)
+        return self._sia
+
+    @staticmethod
+    def _normalize(text: str) -> str:
+        """
+        Build the cache key for a text. VADER tokenizes on whitespace, so
+        collapsing it does not change the scores.
+        """
+        if not text or not text.strip():
+            raise ValueError("Input text cannot be empty or None")
+        return ' '.join(text.split())
+
+    def _polarity_scores(self, text: str) -> dict:
+        key = self._normalize(text)
+        scores = self.cache.get(key)
+        if scores is None:
+            scores = self.sia.polarity_scores(key)
+            self.cache.put(key, scores)
+        return scores
+
+    def _build_analysis(self, scores: dict) -> dict:
+        return {
+            "is_positive": scores['compound'] > self.positive_threshold,
+            "compound": scores['compound'],
+            "pos": scores['pos'],
+            "neu": scores['neu'],
+            "neg": scores['neg']
+        }
 
     def is_positive(self, text: str) -> bool:
         """
@@ -36,10 +132,7 @@ class SentimentModule:
         Raises:
             ValueError: If the input text is empty or None.
         """
-        if not text or not text.strip():
-            raise ValueError("Input text cannot be empty or None")
-
-        scores = self.sia.polarity_scores(text)
+        scores = self._polarity_scores(text)
         return scores['compound'] > self.positive_threshold
 
     def get_sentiment_score(self, text: str) -> float:
@@ -50,16 +143,13 @@ class SentimentModule:
             text (str): The text to analyze.
 
         Returns:
-            float: The compound sentiment score between -1 (very negative) 
+            float: The compound sentiment score between -1 (very negative)
                   and 1 (very positive).
 
         Raises:
             ValueError: If the input text is empty or None.
         """
-        if not text or not text.strip():
-            raise ValueError("Input text cannot be empty or None")
-
-        scores = self.sia.polarity_scores(text)
+        scores = self._polarity_scores(text)
         return scores['compound']
 
     def analyze_sentiment(self, text: str) -> dict:
@@ -80,15 +170,72 @@ class SentimentModule:
         Raises:
             ValueError: If the input text is empty or None.
         """
-        if not text or not text.strip():
-            raise ValueError("Input text cannot be empty or None")
+        return self._build_analysis(self._polarity_scores(text))
 
-        scores = self.sia.polarity_scores(text)
-        return {
-            "is_positive": scores['compound'] > self.positive_threshold,
-            "compound": scores['compound'],
-            "pos": scores['pos'],
-            "neu": scores['neu'],
-            "neg": scores['neg']
-        }
+    def analyze_many(self, texts: List[str], parallel: Optional[bool] = None) -> List[dict]:
+        """
+        Provides a detailed sentiment analysis for each text in a batch.
+
+        Cached texts are answered from the cache and duplicates are scored once.
+        The remaining texts are scored in-process, or across a process pool when
+        there are at least parallel_threshold of them.
+
+        Args:
+            texts (list): The texts to analyze.
+            parallel (bool): Force (True) or forbid (False) the process pool.
+                             None decides by parallel_threshold.
+
+        Returns:
+            list: One analyze_sentiment result per input text, in order.
 
+        Raises:
+            ValueError: If any input text is empty or None.
+        """
+        keys = [self._normalize(text) for text in texts]
+
+        scores_by_key = {}
+        misses = []
+        for key in keys:
+            if key in scores_by_key:
+                continue
+            scores = self.cache.get(key)
+            scores_by_key[key] = scores
+            if scores is None:
+                misses.append(key)
+
+        if parallel is None:
+            parallel = len(misses) >= self.parallel_threshold
+
+        if misses:
+            if parallel:
+                fresh = self._score_in_pool(misses)
+            else:
+                fresh = [self.sia.polarity_scores(key) for key in misses]
+            for key, scores in zip(misses, fresh):
+                scores_by_key[key] = scores
+                self.cache.put(key, scores)
+
+        return [self._build_analysis(scores_by_key[key]) for key in keys]
+
+    def _score_in_pool(self, texts: List[str]) -> List[dict]:
+        workers = self.max_workers or os.cpu_count() or 1
+        # Make sure the lexicon is available locally before the workers look for it
+        self.sia
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(self.data_dir,)) as pool:
+            chunk_size = max(1, -(-len(texts) // (workers * 4)))
+            chunks = [texts[i:i + chunk_size] for i in range(0, len(texts), chunk_size)]
+            results = []
+            for chunk_scores in pool.map(_score_texts, chunks):
+                results.extend(chunk_scores)
+            return results
+
+    def cache_info(self) -> Dict[str, float]:
+        """
+        Returns the score cache counters.
+
+        Returns:
+            dict: hits, misses, hit_ratio, evictions, size and max_items of the cache.
+        """
+        stats = self.cache.stats()
+        return {name: stats[name] for name in ('hits', 'misses', 'hit_ratio', 'evictions', 'size', 'max_items')}
@@ -0,0 +1,214 @@
+import os
+import threading
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple
+
+from PIL import ImageFont
+
+from .cache_module import LRUCache
+
+SYSTEM_FONTS = [
+    '/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf',  # Linux
+    '/usr/share/fonts/dejavu/DejaVuSans-Bold.ttf',  # Alpine
+    '/System/Library/Fonts/Arial.ttf',  # MacOS
+    'C:\\Windows\\Fonts\\Arial.ttf'  # Windows
+]
+
+
+def find_system_font() -> Optional[str]:
+    """
+    Return the font named by MEME_FONT_PATH, else the first system font from SYSTEM_FONTS that exists, or None.
+    """
+    if os.environ.get('MEME_FONT_PATH') and os.path.exists(os.environ['MEME_FONT_PATH']):
+        return os.environ['MEME_FONT_PATH']
+    for font_path in SYSTEM_FONTS:
+        if os.path.exists(font_path):
+            return font_path
+    return None
+
+
+@dataclass(frozen=True)
+class TextLayout:
+    """
+    The result of laying out a text: wrapped lines measured at one font size.
+    """
+    text: str
+    lines: Tuple[str, ...]
+    line_widths: Tuple[float, ...]
+    font_size: int
+    line_spacing: float
+    font: ImageFont.FreeTypeFont = field(compare=False, repr=False)
+
+    @property
+    def width(self) -> float:
+        return max(self.line_widths, default=0.0)
+
+    @property
+    def height(self) -> float:
+        return len(self.lines) * self.line_spacing
+
+    def line_positions(self, box_width: float, box_height: float) -> List[Tuple[float, float]]:
+        """
+        Return the top-left (x, y) of each line, centered in a box of the given size.
+        """
+        y = (box_height - self.height) / 2
+        positions = []
+        for line_width in self.line_widths:
+            positions.append(((box_width - line_width) / 2, y))
+            y += self.line_spacing
+        return positions
+
+
+class TextLayoutModule:
+    """
+    A text layout engine with per-size font and word-advance caches.
+
+    Lines are wrapped greedily in a single pass over the words using cached
+    word and space advances, and the largest font size that fits a box is
+    found by binary search.
+    """
+
+    def __init__(self, font_path=None, min_font_size=16, max_font_size=50,
+                 line_spacing=1.2, advance_cache_size=16384):
+        """
+        Initialize the TextLayoutModule.
+
+        Args:
+            font_path (str): Path to a TTF font file. If None, a system font or Pillow's default is used
+            min_font_size (int): Smallest font size tried when fitting text to a box
+            max_font_size (int): Largest font size tried when fitting text to a box
+            line_spacing (float): Line height as a multiple of the font size
+            advance_cache_size (int): Maximum number of cached (size, word) advances
+        """
+        if min_font_size > max_font_size:
+            raise ValueError("min_font_size must not be larger than max_font_size")
+
+        self.font_path = font_path or find_system_font()
+        self.min_font_size = min_font_size
+        self.max_font_size = max_font_size
+        self.line_spacing = line_spacing
+
+        self._fonts = {}
+        self._fonts_lock = threading.Lock()
+        self._advances = LRUCache(max_items=advance_cache_size)
+
+    def get_font(self, size: int) -> ImageFont.FreeTypeFont:
+        """
+        Return the font at the given size, loading it only once.
+        """
+        font = self._fonts.get(size)
+        if font is None:
+            with self._fonts_lock:
+                font = self._fonts.get(size)
+                if font is None:
+                    font = self._load_font(size)
+                    self._fonts[size] = font
+        return font
+
+    def _load_font(self, size: int):
+        try:
+            if self.font_path:
+                return ImageFont.truetype(self.font_path, size=size)
+            return ImageFont.load_default(size=size)
+        except Exception:
+            return ImageFont.load_default()
+
+    def advance(self, word: str, size: int) -> float:
+        """
+        Return the cached horizontal advance of word at the given font size.
+        """
+        key = (size, word)
+        width = self._advances.get(key)
+        if width is None:
+            width = self.get_font(size).getlength(word)
+            self._advances.put(key, width)
+        return width
+
+    def wrap(self, text: str, max_width: float, size: int) -> Tuple[List[str], List[float]]:
+        """
+        Wrap text to fit within max_width at the given font size.
+
+        A word wider than max_width on its own is kept on a line by itself.
+
+        Returns:
+            tuple: The lines and their widths
+        """
+        space = self.advance(' ', size)
+        lines = []
+        widths = []
+        current_line = []
+        current_width = 0.0
+
+        for word in text.split():
+            word_width = self.advance(word, size)
+            if not current_line:
+                current_line.append(word)
+                current_width = word_width
+            elif current_width + space + word_width <= max_width:
+                current_line.append(word)
+                current_width += space + word_width
+            else:
+                lines.append(' '.join(current_line))
+                widths.append(current_width)
+                current_line = [word]
+                current_width = word_width
+
+        if current_line:
+            lines.append(' '.join(current_line))
+            widths.append(current_width)
+
+        return lines, widths
+
+    def layout_at(self, text: str, max_width: float, size: int) -> TextLayout:
+        """
+        Lay out text at a fixed font size.
+        """
+        lines, widths = self.wrap(text, max_width, size)
+        return TextLayout(text=text, lines=tuple(lines), line_widths=tuple(widths),
+                          font_size=size, line_spacing=size * self.line_spacing,
+                          font=self.get_font(size))
+
+    def _fits(self, layout: TextLayout, max_width: float, max_height: Optional[float]) -> bool:
+        if layout.width > max_width:
+            return False
+        return max_height is None or layout.height <= max_height
+
+    def layout(self, text: str, max_width: float, max_height: Optional[float] = None,
+               font_size: Optional[int] = None) -> TextLayout:
+        """
+        Lay out text in a box, using the largest font size that fits.
+
+        Args:
+            text (str): The text to lay out
+            max_width (float): Maximum width of a line
+            max_height (float): Maximum height of the text block. If None, only the width is checked
+            font_size (int): Fixed font size. If None, the size is fitted between
+                             min_font_size and max_font_size
+
+        Returns:
+            TextLayout: The layout. If nothing fits, the layout at min_font_size
+        """
+        if font_size is not None:
+            return self.layout_at(text, max_width, font_size)
+
+        best = self.layout_at(text, max_width, self.max_font_size)
+        if self._fits(best, max_width, max_height):
+            return best
+
+        best = None
+        low, high = self.min_font_size, self.max_font_size - 1
+        while low <= high:
+            size = (low + high) // 2
+            candidate = self.layout_at(text, max_width, size)
+            if self._fits(candidate, max_width, max_height):
+                best = candidate
+                low = size + 1
+            else:
+                high = size - 1
+
+        return best or self.layout_at(text, max_width, self.min_font_size)
+
+    def __repr__(self) -> str:
+        """Return a string representation of the TextLayoutModule."""
+        return (f"TextLayoutModule(font_path={self.font_path!r}, "
+                f"sizes={self.min_font_size}-{self.max_font_size})")
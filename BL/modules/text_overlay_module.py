@@ -0,0 +1,108 @@
+import math
+from typing import Optional, Tuple
+
+from PIL import Image, ImageDraw
+
+from .cache_module import LRUCache
+from .text_layout_module import TextLayout
+
+
+class TextOverlay:
+    """
+    A pre-rendered, shadowed text block that can be stamped onto any background.
+    """
+
+    def __init__(self, image: Image.Image, layout: TextLayout, margin: int):
+        """
+        Args:
+            image (PIL.Image): RGBA image of the text block with a transparent background
+            layout (TextLayout): The layout the block was rendered from
+            margin (int): Transparent padding around the text block
+        """
+        self.image = image
+        self.layout = layout
+        self.margin = margin
+
+    def position(self, box_width: int, box_height: int) -> Tuple[int, int]:
+        """
+        Return the top-left corner that centers the text block in a box of the given size.
+        """
+        x = (box_width - self.layout.width) / 2 - self.margin
+        y = (box_height - self.layout.height) / 2 - self.margin
+        return round(x), round(y)
+
+    def composite(self, background: Image.Image) -> Image.Image:
+        """
+        Alpha-composite the overlay onto the center of background, in place.
+        """
+        background.paste(self.image, self.position(background.width, background.height), self.image)
+        return background
+
+
+class TextOverlayModule:
+    """
+    A renderer of shadowed text overlays with an LRU cache of finished overlays.
+    """
+
+    def __init__(self, text_layout_module, cache_size=256, shadow_offset=3,
+                 shadow_color=(0, 0, 0)):
+        """
+        Initialize the TextOverlayModule.
+
+        Args:
+            text_layout_module (TextLayoutModule): Engine used to lay out the text
+            cache_size (int): Maximum number of cached overlays
+            shadow_offset (int): Offset of the text shadow in pixels
+            shadow_color (tuple): RGB color of the text shadow
+        """
+        self.text_layout_module = text_layout_module
+        self.shadow_offset = shadow_offset
+        self.shadow_color = shadow_color
+        self.cache = LRUCache(max_items=cache_size)
+
+    def get_overlay(self, text: str, text_color: Tuple[int, int, int], max_width: int,
+                    max_height: Optional[float] = None,
+                    font_size: Optional[int] = None) -> TextOverlay:
+        """
+        Return the overlay for text, rendering it only on a cache miss.
+
+        Args:
+            text (str): The text to render
+            text_color (tuple): RGB color of the text
+            max_width (int): Maximum width of a line
+            max_height (float): Maximum height of the text block
+            font_size (int): Fixed font size. If None, the largest size that fits is used
+
+        Returns:
+            TextOverlay: The cached overlay. Callers must not draw on its image
+        """
+        key = (text, self.text_layout_module.font_path, max_width, max_height,
+               font_size, tuple(text_color))
+        overlay = self.cache.get(key)
+        if overlay is None:
+            layout = self.text_layout_module.layout(text, max_width, max_height, font_size)
+            overlay = self.render(layout, text_color)
+            self.cache.put(key, overlay)
+        return overlay
+
+    def render(self, layout: TextLayout, text_color: Tuple[int, int, int]) -> TextOverlay:
+        """
+        Rasterize a layout with its shadow into a transparent RGBA image.
+        """
+        # Leave room for glyphs that extend past their advance or line box
+        margin = math.ceil(layout.font_size * 0.25)
+        width = math.ceil(layout.width) + self.shadow_offset + 2 * margin
+        height = math.ceil(layout.height) + self.shadow_offset + 2 * margin
+
+        image = Image.new('RGBA', (max(width, 1), max(height, 1)), (0, 0, 0, 0))
+        draw = ImageDraw.Draw(image)
+
+        y = margin
+        for line, line_width in zip(layout.lines, layout.line_widths):
+            x = margin + (layout.width - line_width) / 2
+            draw.text((x + self.shadow_offset, y + self.shadow_offset),
+                      line, font=layout.font, fill=tuple(self.shadow_color) + (255,))
+            draw.text((x, y), line, font=layout.font, fill=tuple(text_color) + (255,))
+            y += layout.line_spacing
+
+        return TextOverlay(image, layout, margin)
@@ -1,13 +1,23 @@
 
-from io import BytesIO
-
-from flask import Flask, Response, request, json, jsonify,send_file
+from flask import Flask, Response, g, request, json, jsonify, stream_with_context, url_for
 from flask_cors import CORS
-from BL.modules import GeminiModule, SentimentModule, MemeImageModule
+from BL.modules import GeminiModule, SentimentModule, MemeImageModule, AffirmationPoolModule, \
+    BackgroundImageModule, RenditionModule, EncodingModule, MemeCacheModule, CachedMemeImage, \
+    JobQueueModule, QueueFullError, BatchRenderModule, MetricsModule, MemeInventoryModule, \
+    MemeRetentionModule
 from PIL import Image
+from BL import api
+from BL.api import MEME_TYPES
+from DAL.archive import ARCHIVE_FORMATS
+from DAL.blob_store import LocalBlobStore
+from DAL.command_monitor import CommandTimer
 from DAL.mongo_module import MongoModule
-import matplotlib.pyplot as plt
+from DAL.write_buffer import MemeWriteBuffer
 import io
+import logging as log
+import os
+import threading
+import time
 
 
 app = Flask(__name__)
@@ -23,43 +33,299 @@ CORS(app, resources={
         "allow_headers": ["Content-Type", "Authorization"]
     }
 })
-connection_string = "mongodb://localhost:5000"
+connection_string = os.environ.get('MONGODB_URI', "mongodb://localhost:5000")
+metrics = MetricsModule()
+mongo_command_seconds = metrics.histogram('meme_mongo_command_seconds', 'Duration of MongoDB commands')
+http_request_seconds = metrics.histogram('meme_http_request_seconds', 'Duration of HTTP requests')
+affirmation_sources = metrics.counter('meme_affirmation_source_total', 'Affirmations used, by where they came from')
+sentiment_retries = metrics.counter('meme_sentiment_retries_total',
+                                    'Gemini affirmations rejected by the sentiment filter and fetched again')
+memes_created = metrics.counter('meme_generations_total', 'Meme generations started, by meme type')
+
+
+def _record_mongo_command(command_name: str, seconds: float, failed: bool) -> None:
+    mongo_command_seconds.observe(seconds, command=command_name, status='failed' if failed else 'ok')
+    metrics.record('mongo', seconds)
+
+
+# Shared by every MongoModule view so they all use the same monitored client
+mongo_client_options = {'event_listeners': [CommandTimer(_record_mongo_command)]}
 sentiment_module = SentimentModule(positive_threshold=0.3)
-gemini_module = GeminiModule(api_key='private')
+gemini_module = GeminiModule(api_key=os.environ.get('GEMINI_API_KEY', 'private'))
+affirmation_pool = AffirmationPoolModule(gemini_module, sentiment_module)
 mongo_config = {
             'database': 'meme_db',
             'collection': 'memes'
         }
-mongo_module = MongoModule(mongo_config, connection_string)
-image_path = 'https://picsum.photos/200'
-mem_module = MemeImageModule()
+blob_store = LocalBlobStore(os.environ['BLOB_STORE_DIR']) if os.environ.get('BLOB_STORE_DIR') else None
+rendition_module = RenditionModule()
+
+
+def mongo_view(data: dict) -> MongoModule:
+    """A MongoModule on the database named in data, storing images like the app's own."""
+    return MongoModule(data, connection_string, client_options=mongo_client_options, blob_store=blob_store,
+                       full_rendition=rendition_module.full_name)
+
+
+mongo_module = mongo_view(mongo_config)
+image_path = os.environ.get('MEME_IMAGE_URL', 'https://picsum.photos/200')
+background_module = BackgroundImageModule(cache_dir=os.environ.get('BACKGROUND_CACHE_DIR'))
+mem_module = MemeImageModule(background_module=background_module)
+encoding_module = EncodingModule(canonical_format=os.environ.get('MEME_STORAGE_FORMAT', 'png'))
+meme_cache = MemeCacheModule(max_bytes=int(os.environ.get('MEME_CACHE_BYTES', 128 * 1024 * 1024)))
+batch_render_module = BatchRenderModule(
+    processes=int(os.environ['MEME_BATCH_PROCESSES']) if os.environ.get('MEME_BATCH_PROCESSES') else None,
+    image_url=image_path,
+    image_format=encoding_module.canonical_format
+)
+# Group meme saves from concurrent requests and jobs into batched inserts
+meme_writer = MemeWriteBuffer(
+    mongo_module,
+    max_batch=int(os.environ.get('MEME_WRITE_BATCH', 50)),
+    max_delay=float(os.environ.get('MEME_WRITE_DELAY', 0.05))
+) if os.environ.get('MEME_WRITE_BEHIND') else None
+MEME_BATCH_MAX = int(os.environ.get('MEME_BATCH_MAX', 100))
+
+# Time the pipeline stages wherever they run, including the affirmation pool and job threads
+metrics.instrument(gemini_module, {'get_affirmation_text': 'gemini', 'get_affirmation_batch': 'gemini_batch'})
+metrics.instrument(sentiment_module, {'is_positive': 'sentiment', 'analyze_many': 'sentiment_batch'})
+metrics.instrument(background_module, {'fetch': 'download'})
+metrics.instrument(mem_module, {'create_meme': 'render'})
+metrics.instrument(rendition_module, {'render': 'resize'})
+metrics.instrument(encoding_module, {'encode': 'encode', 'transcode': 'transcode'})
+metrics.instrument(mongo_module, {'save_meme': 'mongo_save', 'save_memes': 'mongo_save_batch',
+                                  'open_meme_image': 'mongo_open', 'meme_exists': 'mongo_exists'})
+metrics.instrument(batch_render_module, {'render': 'batch_render'})
+
+_caches = {
+    'memes': meme_cache.cache,
+    'encoded_variants': encoding_module.cache,
+    'backgrounds': background_module.cache,
+    'sentiment': sentiment_module.cache,
+    'text_overlays': mem_module.text_overlay_module.cache
+}
+metrics.gauge('meme_cache_hits_total', 'Cache lookups that hit', type='counter', callback=lambda: [
+    ({'cache': name}, cache.hits) for name, cache in _caches.items()])
+metrics.gauge('meme_cache_misses_total', 'Cache lookups that missed', type='counter', callback=lambda: [
+    ({'cache': name}, cache.misses) for name, cache in _caches.items()])
+metrics.gauge('meme_cache_hit_ratio', 'Share of cache lookups that hit', callback=lambda: [
+    ({'cache': name}, cache.stats()['hit_ratio']) for name, cache in _caches.items()])
+metrics.gauge('meme_cache_bytes', 'Bytes held by each size-bounded cache', callback=lambda: [
+    ({'cache': name}, cache.current_bytes) for name, cache in _caches.items() if cache.max_bytes])
+metrics.gauge('meme_affirmation_pool_size', 'Affirmations ready in the pool', callback=lambda: [
+    ({}, len(affirmation_pool))])
+
+
+def next_affirmation() -> str:
+    # Get an affirmation text, falling back to a direct Gemini call if the pool is dry
+    affirmation = affirmation_pool.get_affirmation(timeout=2.0)
+
+    if affirmation is not None:
+        affirmation_sources.inc(source='pool')
+    else:
+        affirmation_sources.inc(source='gemini')
+        affirmation = gemini_module.get_affirmation_text()
 
+        while affirmation and not sentiment_module.is_positive(affirmation):
+            sentiment_retries.inc()
+            affirmation = gemini_module.get_affirmation_text()
+
+    return affirmation
+
+
+@metrics.timed('create_meme')
 def create_meme(
         meme_type: str = "custom_image"  # Default to "gradient"
 ):
-    # Get an affirmation text
-    affirmation = gemini_module.get_affirmation_text()
-
-    while affirmation and not sentiment_module.is_positive(affirmation):
-        affirmation = gemini_module.get_affirmation_text()
+    with metrics.timer('affirmation'):
+        affirmation = next_affirmation()
+    memes_created.inc(meme_type=meme_type)
 
     # Generate meme based on the selected type
-    if meme_type == "custom_image":
-        meme_image = MemeImageModule.create_meme_with_downloaded_image(mem_module,affirmation, image_path)
-    elif meme_type == "solid_background":
-        meme_image = MemeImageModule.create_meme_with_solid_background(mem_module,affirmation)
-    elif meme_type == "gradient":
-        meme_image = MemeImageModule.create_meme_with_gradient(mem_module,affirmation)
-    else:
-        raise ValueError("Invalid meme type. Choose 'custom_image', 'gradient', or 'solid_background'.")
+    meme_image = mem_module.create_meme(affirmation, meme_type, image_path)
+
+    # Produce every configured size from the single render and convert them to binary format
+    renditions = {
+        name: encoding_module.encode(image)
+        for name, image in rendition_module.render(meme_image).items()
+    }
+
+    image_binary = renditions.pop(rendition_module.full_name)
+
+    # Save the meme to MongoDB, batched with concurrent saves when write-behind is enabled
+    if meme_writer is not None:
+        return meme_writer.submit(image_binary, renditions, encoding_module.canonical_format,
+                                  affirmation).result()
+    return mongo_module.save_meme(image_binary, renditions, encoding_module.canonical_format, affirmation)
+
+
+def create_memes(count: int, meme_type: str = "custom_image") -> list:
+    """Render count memes over the batch process pool and save them."""
+    affirmations = [next_affirmation() for _ in range(count)]
+    memes = []
+    for affirmation, renditions in zip(affirmations, batch_render_module.render(affirmations, meme_type)):
+        image_binary = renditions.pop(batch_render_module.full_name)
+        memes.append({'image_binary': image_binary, 'renditions': renditions, 'text': affirmation})
+    return mongo_module.save_memes(memes, batch_render_module.image_format)
+
+
+meme_jobs = JobQueueModule(
+    create_meme,
+    workers=int(os.environ.get('MEME_JOB_WORKERS', 4)),
+    max_queue_size=int(os.environ.get('MEME_JOB_QUEUE_SIZE', 100)),
+    queue_timeout=float(os.environ.get('MEME_JOB_QUEUE_TIMEOUT', 60))
+)
+
+
+metrics.gauge('meme_jobs', 'Meme generation jobs, by state', callback=lambda: [
+    ({'state': 'queued'}, meme_jobs.stats()['queued']), ({'state': 'running'}, meme_jobs.stats()['running'])])
 
-    # Convert image to binary format
-    img_byte_arr = BytesIO()
-    meme_image.save(img_byte_arr, format="PNG")
-    image_binary = img_byte_arr.getvalue()
+# Memes generated ahead of demand and handed out by /api/meme, 0 disables the inventory
+MEME_INVENTORY_SIZE = int(os.environ.get('MEME_INVENTORY_SIZE', 5))
+meme_inventory = MemeInventoryModule(
+    create_meme,
+    mongo_module,
+    MEME_TYPES,
+    target_size=MEME_INVENTORY_SIZE,
+    low_water_mark=int(os.environ.get('MEME_INVENTORY_LOW_WATER', MEME_INVENTORY_SIZE // 2)),
+    poll_interval=float(os.environ.get('MEME_INVENTORY_POLL_INTERVAL', 30))
+) if MEME_INVENTORY_SIZE > 0 else None
 
-    # Save the meme to MongoDB
-    return mongo_module.save_meme(image_binary)
+if meme_inventory is not None:
+    metrics.instrument(meme_inventory, {'claim': 'inventory_claim'})
+    metrics.gauge('meme_inventory_size', 'Memes ready to serve, by meme type', callback=lambda: [
+        ({'meme_type': meme_type}, level) for meme_type, level in meme_inventory.levels().items()])
+    metrics.gauge('meme_inventory_claims_total', 'Meme requests, by whether the inventory had one',
+                  type='counter', callback=lambda: [
+                      ({'meme_type': meme_type, 'result': result}, stats[key])
+                      for meme_type, stats in meme_inventory.stats().items()
+                      for result, key in (('hit', 'hits'), ('miss', 'misses'))])
+    metrics.gauge('meme_inventory_replenished_total', 'Memes added to the inventory, by meme type',
+                  type='counter', callback=lambda: [
+                      ({'meme_type': meme_type}, stats['replenished'])
+                      for meme_type, stats in meme_inventory.stats().items()])
+    metrics.gauge('meme_inventory_failures_total', 'Failed inventory generations, by meme type',
+                  type='counter', callback=lambda: [
+                      ({'meme_type': meme_type}, stats['failures'])
+                      for meme_type, stats in meme_inventory.stats().items()])
+
+# Memes older than MEME_TTL_SECONDS are deleted by a periodic sweep, unset keeps them forever
+meme_retention = MemeRetentionModule(
+    mongo_module,
+    max_age=float(os.environ['MEME_TTL_SECONDS']),
+    interval=float(os.environ.get('MEME_TTL_SWEEP_INTERVAL', 3600))
+) if os.environ.get('MEME_TTL_SECONDS') else None
+
+if meme_retention is not None:
+    metrics.gauge('meme_expired_total', 'Memes deleted by the retention sweep', type='counter',
+                  callback=lambda: [({}, meme_retention.stats()['expired'])])
+
+
+# Outcome of the last warm-up, served by /ready
+readiness = {'ready': False, 'running': False, 'checks': {}}
+_readiness_lock = threading.Lock()
+
+
+def _warm_up_steps():
+    return [
+        # Required: without these the first requests would fail or stall
+        ('mongo_indexes', True, mongo_module.ensure_indexes),
+        ('sentiment_lexicon', True, lambda: sentiment_module.sia),
+        ('render', True, lambda: encoding_module.encode(mem_module.create_meme_with_gradient('Warm up'))),
+        # Optional: they only make the first requests faster
+        ('gemini', False, lambda: gemini_module.model),
+        ('affirmation_pool', False, affirmation_pool.start),
+        ('backgrounds', False, lambda: background_module.prefetch(image_path, mem_module.image_size)),
+        ('meme_inventory', False, meme_inventory.start if meme_inventory is not None else lambda: None),
+        ('meme_retention', False, meme_retention.start if meme_retention is not None else lambda: None)
+    ]
+
+
+def warm_up() -> dict:
+    """
+    Load everything the first requests would otherwise pay for and record readiness.
+
+    Loads the sentiment lexicon, fonts and the Gemini client, creates the
+    MongoDB indexes and starts the background refill threads. Safe to call
+    again, e.g. after MongoDB was unreachable.
+
+    Returns:
+        dict: ready, and the outcome and duration of each step
+    """
+    checks = {}
+    ready = True
+    for name, required, step in _warm_up_steps():
+        start = time.perf_counter()
+        try:
+            step()
+            checks[name] = {'ok': True}
+        except Exception as e:
+            print(f"Warm-up step {name} failed: {e}")
+            checks[name] = {'ok': False, 'error': str(e)}
+            ready = ready and not required
+        checks[name]['ms'] = round((time.perf_counter() - start) * 1000, 1)
+
+    with _readiness_lock:
+        readiness.update(ready=ready, running=False, checks=checks)
+    return dict(readiness)
+
+
+def readiness_state() -> dict:
+    """Return whether the warm-up succeeded, whether it is running and its last checks."""
+    with _readiness_lock:
+        return {'ready': readiness['ready'], 'warming_up': readiness['running'], 'checks': readiness['checks']}
+
+
+def start_warm_up() -> None:
+    """
+    Run warm_up on a background thread unless it is already running or has succeeded.
+    """
+    with _readiness_lock:
+        if readiness['ready'] or readiness['running']:
+            return
+        readiness['running'] = True
+    threading.Thread(target=warm_up, name='warm-up', daemon=True).start()
+
+
+@app.before_request
+def _start_request_metrics():
+    g.metrics_token = metrics.start_request()
+    g.request_start = time.perf_counter()
+
+
+@app.after_request
+def _finish_request_metrics(response):
+    token = g.pop('metrics_token', None)
+    if token is None:
+        return response
+    elapsed = time.perf_counter() - g.request_start
+    timings = metrics.finish_request(token)
+
+    endpoint = request.url_rule.rule if request.url_rule else 'unmatched'
+    http_request_seconds.observe(elapsed, endpoint=endpoint, method=request.method, status=response.status_code)
+    response.headers['Server-Timing'] = metrics.server_timing(timings, total=elapsed)
+    return response
+
+
+@app.teardown_request
+def _discard_request_metrics(exc):
+    # Requests that failed before after_request still release their timing list
+    token = g.pop('metrics_token', None)
+    if token is not None:
+        metrics.finish_request(token)
+
+
+@app.route('/metrics', methods=['GET'])
+def get_metrics():
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+
+@app.route('/ready', methods=['GET'])
+def ready():
+    # Readiness probes start the warm-up, and retry it after a failure
+    start_warm_up()
+    state = readiness_state()
+    return jsonify(state), 200 if state['ready'] else 503
 
 
 @app.route('/')
@@ -72,44 +338,158 @@ def base():
 
 @app.route('/memes', methods=['GET'])
 def get_memes():
-    data = request.json
-    if data is None or data == {}:
-        return Response(response=json.dumps({"Error": "Please provide connection information"}),
+    # Connection information is optional, the default database is listed without it
+    data = request.get_json(silent=True)
+    mongo_api = mongo_view(data) if data else mongo_module
+
+    try:
+        limit, after = api.parse_page(request.args)
+        # Fetch one extra meme to learn whether there is a next page
+        memes = mongo_api.iter_memes(after=after, limit=limit + 1)
+        first = next(memes, None)
+    except ValueError as e:
+        return Response(response=json.dumps({"Error": str(e)}),
                         status=400,
                         mimetype='application/json')
-    mongo_api = MongoModule(data, connection_string)
-    response = mongo_api.get_all_memes()
-    return Response(response=json.dumps(response),
+
+    def generate():
+        yield '{"items": ['
+        count, last, meme = 0, None, first
+        while meme is not None:
+            if count == limit:
+                break
+            summary = api.meme_summary(meme, url_for('get_meme_by_id', meme_id=meme['_id']))
+            yield (',' if count else '') + json.dumps(summary)
+            count, last = count + 1, meme
+            meme = next(memes, None)
+        has_more = meme is not None
+        memes.close()
+        next_cursor = MongoModule.encode_cursor(last) if has_more else None
+        yield '], "next": ' + json.dumps(next_cursor) + '}'
+
+    return Response(stream_with_context(generate()),
                     status=200,
                     mimetype='application/json')
 
 
+@app.route('/memes/export', methods=['GET'])
+def export_memes():
+    try:
+        options = api.export_options(request.args, rendition_module.renditions, rendition_module.full_name)
+    except ValueError as e:
+        return Response(response=json.dumps({"Error": str(e)}),
+                        status=400,
+                        mimetype='application/json')
+
+    # The archive is written while the cursor is read, nothing is buffered
+    archive = mongo_module.export_archive(**options)
+    return Response(stream_with_context(archive),
+                    status=200,
+                    mimetype=ARCHIVE_FORMATS[options['archive_format']]['mimetype'],
+                    headers=api.export_headers(options))
+
+
 @app.route('/memes/<meme_id>', methods=['GET'])
 def get_meme_by_id(meme_id):
     # Remove the requirement for JSON data in GET request
-    response = mongo_module.get_meme(meme_id)
+    rendition = request.args.get('size', rendition_module.full_name)
+    image_format = encoding_module.negotiate(request.accept_mimetypes)
+
+    cached = meme_cache.get(meme_id, rendition)
+    # A delete handled by another worker only cleared that worker's cache
+    if cached is not None and not mongo_module.meme_exists(meme_id):
+        invalidate_meme(meme_id)
+        cached = None
+    if cached is None:
+        reader = mongo_module.open_meme_image(meme_id, rendition)
+        if reader is None:
+            return Response(
+                response=json.dumps({"Error": "Meme not found"}),
+                status=404,
+                mimetype='application/json'
+            )
+
+        # Stored bytes are streamed, filling the cache on the way; only transcodes need them whole
+        if reader.format == image_format:
+            return _stream_meme_image(reader, meme_id, rendition)
+        with reader:
+            cached = CachedMemeImage(reader.read_all(), reader.format, reader.content_hash, reader.created_at)
+        meme_cache.put(meme_id, rendition, cached)
+
+    etag = api.meme_etag(cached.content_hash, cached.format, image_format)
+    if api.not_modified(request.headers, etag, cached.created_at):
+        return api.add_cache_headers(Response(status=304), etag, cached.created_at)
+
+    # Variants other than the stored format are transcoded once and cached
+    image_binary = encoding_module.get_variant((meme_id, rendition), image_format,
+                                               lambda: (cached.data, cached.format))
+
+    response = Response(image_binary, mimetype=encoding_module.mimetype(image_format))
+    api.add_cache_headers(response, etag, cached.created_at)
+    return response.make_conditional(request, accept_ranges=True, complete_length=len(image_binary))
+
+
+def _stream_meme_image(reader, meme_id, rendition):
+    """Stream a stored image in chunks, honoring a single byte range, and cache it if it is sent whole."""
+    if api.not_modified(request.headers, reader.content_hash, reader.created_at):
+        reader.close()
+        return api.add_cache_headers(Response(status=304), reader.content_hash, reader.created_at)
+
+    byte_range = api.stream_range(request.range, reader.length)
+    if byte_range is None:
+        reader.close()
+        return api.range_not_satisfiable(Response(), reader.length)
+    start, stop, status = byte_range
+    chunks = reader.iter_chunks(start, stop)
+    if status == 200:
+        chunks = meme_cache.fill(meme_id, rendition, reader, chunks)
+
+    def generate():
+        with reader:
+            yield from chunks
+
+    response = Response(generate(), status=status, mimetype=encoding_module.mimetype(reader.format),
+                        direct_passthrough=True)
+    return api.stream_headers(response, reader, start, stop)
+
+
+def invalidate_meme(meme_id: str) -> None:
+    """Drop the cached images and encoded variants of a meme from this worker."""
+    meme_cache.invalidate(meme_id)
+    for rendition in rendition_module.renditions:
+        encoding_module.invalidate((meme_id, rendition))
+
+
+MongoModule.add_change_listener(invalidate_meme)
+
+
+@app.route('/api/cache-stats', methods=['GET'])
+def get_cache_stats():
+    return jsonify({
+        'memes': meme_cache.stats(),
+        'encoded_variants': encoding_module.cache.stats()
+    })
+
+
+@app.route('/api/dedup-report', methods=['GET'])
+def get_dedup_report():
+    return jsonify(mongo_module.dedup_report())
 
-    if response and 'binary_data' in response:
-        # Return the binary data directly as an image
-        return send_file(
-            io.BytesIO(response['binary_data']),
-            mimetype='image/jpeg'
-        )
 
-    return Response(
-        response=json.dumps({"Error": "Meme not found"}),
-        status=404,
-        mimetype='application/json'
-    )
 @app.route('/mongodb', methods=['POST'])
 def mongo_write():
-    data = request.json
-    if data is None or data == {} or 'Document' not in data:
-        return Response(response=json.dumps({"Error": "Please provide connection information"}),
+    data = request.get_json(silent=True)
+    try:
+        write = api.parse_write_request(data)
+    except ValueError as e:
+        return Response(response=json.dumps({"Error": str(e)}),
                         status=400,
                         mimetype='application/json')
-    mongo_api = MongoModule(data, connection_string)
-    response = mongo_api.save_meme(data)
+    mongo_api = mongo_view(data)
+    if write.batch:
+        response = mongo_api.save_memes([{'image_binary': image} for image in write.images], write.image_format)
+    else:
+        response = mongo_api.save_meme(write.images[0], image_format=write.image_format)
     return Response(response=json.dumps(response),
                     status=200,
                     mimetype='application/json')
@@ -122,29 +502,104 @@ def get_new_meme():
         return '', 204
 
     try:
-        data = create_meme()
-        return jsonify(data)
+        meme_type = api.parse_meme_type(request.args.get('type'))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    try:
+        # Hand out a ready meme, and generate one while waiting only when the stock ran out
+        meme_id = meme_inventory.claim(meme_type) if meme_inventory is not None else None
+        if meme_id is not None:
+            return jsonify({'status': 'Successfully Inserted', 'meme_id': meme_id, 'source': 'inventory'})
+        data = create_meme(meme_type)
+        return jsonify({**data, 'source': 'generated'})
+    except Exception as e:
+        print(f"Meme Generation Error: {e}")
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/memes/batch', methods=['GET', 'POST', 'OPTIONS'])
+def create_meme_batch():
+    if request.method == 'OPTIONS':
+        # Handle preflight request
+        return '', 204
+
+    try:
+        meme_type = api.parse_meme_type(request.args.get('type'))
+        count = api.parse_batch_count(request.args, MEME_BATCH_MAX)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    start = time.perf_counter()
+    try:
+        results = create_memes(count, meme_type)
     except Exception as e:
         print(f"Meme Generation Error: {e}")
         return jsonify({"error": str(e)}), 500
 
+    return jsonify(api.batch_summary(results, time.perf_counter() - start))
+
+
+@app.route('/api/meme/jobs', methods=['POST', 'OPTIONS'])
+def submit_meme_job():
+    if request.method == 'OPTIONS':
+        # Handle preflight request
+        return '', 204
+
+    data = request.get_json(silent=True) or {}
+    try:
+        meme_type = api.parse_meme_type(data.get('meme_type'))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    try:
+        job = meme_jobs.submit(meme_type=meme_type)
+    except QueueFullError as e:
+        response = jsonify({"error": str(e)})
+        response.status_code = 503
+        response.retry_after = 5
+        return response
+
+    status_url = url_for('get_meme_job', job_id=job.id)
+    response = jsonify({'job_id': job.id, 'status': job.status, 'status_url': status_url})
+    response.status_code = 202
+    response.location = status_url
+    return response
+
+
+@app.route('/api/meme/jobs/<job_id>', methods=['GET'])
+def get_meme_job(job_id):
+    job = meme_jobs.get(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify(api.job_summary(job))
+
+
 @app.route('/mongodb', methods=['DELETE'])
 def mongo_delete():
-    data = request.json
-    if data is None or data == {} or 'Delete' not in data:
-        return Response(response=json.dumps({"Error": "Please provide connection information"}),
+    data = request.get_json(silent=True)
+    try:
+        meme_ids = api.parse_delete_request(data)
+    except ValueError as e:
+        return Response(response=json.dumps({"Error": str(e)}),
                         status=400,
                         mimetype='application/json')
-    mongo_api = MongoModule(data, connection_string)
-    response = mongo_api.delete_meme(data)
+    mongo_api = mongo_view(data)
+    # Delete is a meme id, or a list of them
+    if isinstance(meme_ids, list):
+        response = mongo_api.delete_memes(meme_ids)
+    else:
+        response = mongo_api.delete_meme(meme_ids)
     return Response(response=json.dumps(response),
                     status=200,
                     mimetype='application/json')
 
 #for debugging
 def display_meme(meme_id):
+    # matplotlib is slow to import and only needed here
+    import matplotlib.pyplot as plt
+
     # Retrieve the image binary from MongoDB
-    meme = mongo_module.get_meme(meme_id)
+    meme = mongo_module.get_meme_rendition(meme_id)
 
     # Create an image from the binary data
     image = Image.open(io.BytesIO(meme['binary_data']))
@@ -157,7 +612,18 @@ def display_meme(meme_id):
     plt.show()
 
 
+def configure_logging() -> None:
+    """
+    Log at DEBUG to stderr, DAL modules log every call. Run by the entry points
+    (this module, BL.async_routes and BL.wsgi) rather than on import, so tests
+    and scripts importing the app keep their own logging.
+    """
+    log.basicConfig(level=log.DEBUG, format='%(asctime)s %(levelname)s:\n%(message)s\n')
+
+
 if __name__ == "__main__":
+    configure_logging()
+    start_warm_up()
     app.run(debug=True, port=5173, host='0.0.0.0')
     #meme_image = create_meme(meme_type="gradient")
     #meme_id = meme_image['meme_id']
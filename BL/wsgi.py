@@ -0,0 +1,65 @@
+# Production WSGI entrypoint:
+#     gunicorn -c gunicorn.conf.py BL.wsgi:app
+# With preload_app, gunicorn imports this module once in the master, so everything
+# preload() loads is shared copy-on-write by the forked workers. gunicorn.conf.py keeps
+# garbage collection off in the master, so it leaves no freed holes in the pages they
+# share, and freezes the loaded objects before each fork.
+import importlib
+import time
+
+from BL import routes
+from BL.routes import app  # noqa: F401
+
+routes.configure_logging()
+
+
+def _preload_steps():
+    text_layout_module = routes.mem_module.text_layout_module
+    gradient_module = routes.mem_module.gradient_module
+    return [
+        # Only the module, the client is created in each worker
+        ('modules', lambda: importlib.import_module('google.generativeai')),
+        ('sentiment_lexicon', lambda: routes.sentiment_module.sia),
+        ('fonts', lambda: [text_layout_module.get_font(size) for size in
+                           range(text_layout_module.min_font_size, text_layout_module.max_font_size + 1)]),
+        ('gradient_ramps', lambda: (gradient_module.get_ramp('linear'), gradient_module.get_ramp('radial'))),
+        ('render', lambda: routes.encoding_module.encode(routes.mem_module.create_meme_with_gradient('Warm up')))
+    ]
+
+
+def preload() -> dict:
+    """
+    Load everything workers can share, without starting threads or opening connections.
+
+    Threads and sockets do not survive fork, so the affirmation pool,
+    prefetching, the inventory and all clients are started in each worker
+    by post_fork.
+
+    Returns:
+        dict: The outcome and duration of each step
+    """
+    checks = {}
+    for name, step in _preload_steps():
+        start = time.perf_counter()
+        try:
+            step()
+            checks[name] = {'ok': True}
+        except Exception as e:
+            # Workers load it again on first use
+            print(f"Preload step {name} failed: {e}")
+            checks[name] = {'ok': False, 'error': str(e)}
+        checks[name]['ms'] = round((time.perf_counter() - start) * 1000, 1)
+    return checks
+
+
+def post_fork() -> None:
+    """
+    Re-create the fork-unsafe resources of a freshly forked worker and start its warm-up.
+    """
+    # MongoClient registries drop the clients they inherited by themselves, on fork
+    routes.background_module.reset_session()
+    routes.gemini_module.reset()
+    routes.start_warm_up()
+
+
+preload()
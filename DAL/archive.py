@@ -0,0 +1,134 @@
+import tarfile
+import time
+import zipfile
+from datetime import datetime
+from typing import Callable, Dict, Iterable, Iterator, NamedTuple
+
+
+class ArchiveEntry(NamedTuple):
+    """
+    One file of an archive: its bytes arrive as chunks, its size is known up front.
+    """
+    name: str
+    modified: datetime
+    size: int
+    chunks: Iterable[bytes]
+
+
+class _ChunkSink:
+    """
+    Write-only, unseekable file that collects what an archive writer writes until it is drained.
+    """
+
+    def __init__(self):
+        self._buffer = bytearray()
+
+    def write(self, data: bytes) -> int:
+        self._buffer += data
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> bytes:
+        data = bytes(self._buffer)
+        self._buffer.clear()
+        return data
+
+
+def stream_zip(entries: Iterable[ArchiveEntry]) -> Iterator[bytes]:
+    """
+    Write entries to a ZIP archive, yielding the archive as it is written.
+
+    Entries are stored uncompressed, meme images are already compressed. The
+    sink is not seekable, so zipfile writes each entry's sizes and CRC in a
+    data descriptor after its bytes. Memory holds one chunk plus what the
+    central directory at the end of the archive needs: zipfile keeps a
+    ZipInfo of a few hundred bytes per entry. Use tar for flat memory.
+
+    Args:
+        entries: Files to archive, consumed one at a time
+
+    Yields:
+        bytes: Consecutive pieces of the archive
+    """
+    return (piece for piece in _zip_pieces(entries) if piece)
+
+
+def _zip_pieces(entries: Iterable[ArchiveEntry]) -> Iterator[bytes]:
+    sink = _ChunkSink()
+    with zipfile.ZipFile(sink, mode='w', compression=zipfile.ZIP_STORED, allowZip64=True) as archive:
+        for entry in entries:
+            modified = entry.modified or datetime.now()
+            info = zipfile.ZipInfo(entry.name, date_time=modified.timetuple()[:6])
+            info.compress_type = zipfile.ZIP_STORED
+            # Lets zipfile decide on zip64 headers before the bytes are written
+            info.file_size = entry.size
+            with archive.open(info, mode='w') as member:
+                for chunk in entry.chunks:
+                    member.write(chunk)
+                    yield sink.drain()
+            yield sink.drain()
+    yield sink.drain()
+
+
+def stream_tar(entries: Iterable[ArchiveEntry]) -> Iterator[bytes]:
+    """
+    Write entries to an uncompressed POSIX tar archive, yielding the archive as it is written.
+
+    Headers are built by tarfile and the member bytes are passed through, so
+    memory holds one chunk whatever the number and size of the entries.
+
+    Args:
+        entries: Files to archive, consumed one at a time
+
+    Yields:
+        bytes: Consecutive pieces of the archive
+    """
+    written = 0
+    for entry in entries:
+        info = tarfile.TarInfo(entry.name)
+        info.size = entry.size
+        info.mtime = int(entry.modified.timestamp()) if entry.modified else int(time.time())
+        info.mode = 0o644
+        header = info.tobuf(format=tarfile.PAX_FORMAT)
+        written += len(header)
+        yield header
+
+        remaining = entry.size
+        for chunk in entry.chunks:
+            chunk = chunk[:remaining]
+            remaining -= len(chunk)
+            written += len(chunk)
+            yield chunk
+        if remaining:
+            raise ValueError(f'{entry.name} ended {remaining} bytes short of its size')
+
+        padding = -entry.size % tarfile.BLOCKSIZE
+        if padding:
+            written += padding
+            yield tarfile.NUL * padding
+
+    # Two empty blocks end the archive, padded to a whole record like tarfile does
+    end = tarfile.NUL * (2 * tarfile.BLOCKSIZE)
+    written += len(end)
+    yield end + tarfile.NUL * (-written % tarfile.RECORDSIZE)
+
+
+# Writer and media type of every supported archive format
+ARCHIVE_FORMATS: Dict[str, Dict[str, object]] = {
+    'tar': {'writer': stream_tar, 'mimetype': 'application/x-tar'},
+    'zip': {'writer': stream_zip, 'mimetype': 'application/zip'}
+}
+
+
+def archive_writer(archive_format: str) -> Callable[[Iterable[ArchiveEntry]], Iterator[bytes]]:
+    """
+    Return the streaming writer of archive_format.
+
+    Raises:
+        ValueError: If archive_format is not in ARCHIVE_FORMATS
+    """
+    if archive_format not in ARCHIVE_FORMATS:
+        raise ValueError(f"Unsupported archive format {archive_format}, use one of {', '.join(ARCHIVE_FORMATS)}")
+    return ARCHIVE_FORMATS[archive_format]['writer']
@@ -0,0 +1,175 @@
+from typing import Any, AsyncIterator, Dict, Optional
+import asyncio
+import logging as log
+from concurrent.futures import Executor
+from bson.errors import InvalidId
+from bson.objectid import ObjectId
+
+from DAL.blob_store import BlobReader
+from DAL.client_registry import MongoClientRegistry
+from DAL.mongo_module import MongoModule
+
+
+def _motor_client(connection_string: str, **options):
+    # Motor is only imported by the async app
+    from motor.motor_asyncio import AsyncIOMotorClient
+    return AsyncIOMotorClient(connection_string, **options)
+
+
+# Shared by every AsyncMongoModule that is not given its own registry
+default_async_registry = MongoClientRegistry(client_factory=_motor_client)
+
+
+class AsyncMongoModule:
+    """
+    Async counterpart of MongoModule on the Motor driver, for serving on an event loop.
+
+    A view of the same database as the wrapped MongoModule. Reads of the
+    meme collections are awaited. Saves and blob store calls, which are
+    synchronous, run the wrapped MongoModule in an executor, so content
+    addressing and storage layout are identical.
+    """
+
+    def __init__(self, mongo_module: MongoModule, registry: Optional[MongoClientRegistry] = None,
+                 executor: Optional[Executor] = None) -> None:
+        """
+        Initialize the async MongoDB service.
+
+        Like MongoModule this is a cheap view, fine to create one per request.
+
+        Args:
+            mongo_module: View whose connection string, database, client options and blob store are used
+            registry: Registry of Motor clients. Defaults to the process-wide async registry
+            executor: Runs blob store calls. If None, the loop's default executor
+        """
+        self.mongo_module = mongo_module
+        self.registry = registry or default_async_registry
+        self.executor = executor
+
+    @property
+    def client(self):
+        return self.registry.get_client(self.mongo_module.connection_string, **self.mongo_module.client_options)
+
+    @property
+    def db(self):
+        return self.client[self.mongo_module.database_name]
+
+    @property
+    def memes_collection(self):
+        return self.db['memes']
+
+    @property
+    def images_collection(self):
+        return self.db['images']
+
+    async def _run(self, function, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.executor, function, *args)
+
+    async def save_meme(self, image_binary: bytes, renditions: Optional[Dict[str, bytes]] = None,
+                        image_format: str = 'png', text: str = '') -> dict:
+        """
+        Save a meme with creation timestamp, see MongoModule.save_meme.
+
+        Saving is mostly hashing and blob writes, which block, so the whole
+        save runs in the executor on the synchronous driver. Content
+        addressing, reference counting and the handling of concurrent saves
+        and deletes have a single implementation that way.
+
+        Args:
+            image_binary: Binary data of the generated meme
+            renditions: Optional smaller renditions of the meme by name, e.g. 'thumbnail'
+            image_format: Encoding of image_binary and the renditions, e.g. 'png'
+            text: Affirmation text of the meme, part of its content address
+
+        Returns:
+            dict: Contains status and meme_id
+        """
+        return await self._run(self.mongo_module.save_meme, image_binary, renditions, image_format, text)
+
+    async def iter_memes(self, after: Optional[str] = None, limit: Optional[int] = None,
+                         include_binary: bool = False, batch_size: int = 500) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Stream memes newest first straight from the cursor, leaving out unclaimed inventory.
+
+        Args:
+            after: Cursor returned by MongoModule.encode_cursor; only memes after it are returned
+            limit: Maximum number of memes. None streams the rest of the collection
+            include_binary: Whether to include the full-size binary_data
+            batch_size: Number of documents fetched per round-trip
+
+        Yields:
+            dict: Meme documents with _id converted to a string
+
+        Raises:
+            InvalidCursorError: If after is malformed, raised on the first iteration
+        """
+        query = {**MongoModule.LISTED, **(self.mongo_module.decode_cursor(after) if after else {})}
+        projection = None if include_binary else {'binary_data': 0}
+
+        cursor = self.memes_collection.find(query, projection).sort(MongoModule.LIST_SORT).batch_size(batch_size)
+        if limit is not None:
+            cursor = cursor.limit(limit)
+
+        try:
+            async for meme in cursor:
+                meme['_id'] = str(meme['_id'])
+                yield meme
+        finally:
+            await cursor.close()
+
+    async def meme_exists(self, meme_id: str) -> bool:
+        """
+        Check that a meme has not been deleted, see MongoModule.meme_exists.
+        """
+        try:
+            return await self.memes_collection.find_one({'_id': ObjectId(meme_id)}, {'_id': 1}) is not None
+        except (InvalidId, TypeError):
+            return False
+
+    async def open_meme_image(self, meme_id: str, rendition: Optional[str] = None) -> Optional[BlobReader]:
+        """
+        Open one rendition of a meme for streaming without loading it into memory.
+
+        The document is awaited, the blob is opened in the executor. Reading
+        the returned reader blocks, so callers read it in the executor too.
+
+        Args:
+            meme_id: ID of the meme
+            rendition: Name of the rendition. Defaults to the full_rendition of the wrapped MongoModule
+
+        Returns:
+            Optional[BlobReader]: A reader with length, format, content_hash and created_at
+                                  attributes, or None if the rendition does not exist.
+                                  Callers must close it
+        """
+        rendition = rendition or self.mongo_module.full_rendition
+        log.info(f'Opening {rendition} rendition of meme {meme_id}')
+        try:
+            if rendition == self.mongo_module.full_rendition:
+                document = await self.memes_collection.find_one({'_id': ObjectId(meme_id)})
+            else:
+                document = await self.images_collection.find_one({'meme_id': meme_id, 'rendition': rendition})
+            return await self._run(self.mongo_module._open_document, document) if document else None
+
+        except Exception as e:
+            log.error(f"Error opening meme image: {e}")
+            return None
+
+    async def get_meme_rendition(self, meme_id: str, rendition: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        Retrieve the binary data of one rendition of a meme, see MongoModule.get_meme_rendition.
+
+        Returns:
+            Optional[dict]: binary_data and format of the rendition, or None if it does not exist
+        """
+        reader = await self.open_meme_image(meme_id, rendition)
+        if reader is None:
+            return None
+        try:
+            return {'binary_data': await self._run(reader.read_all), 'format': reader.format}
+        finally:
+            await self._run(reader.close)
+
+    def __repr__(self) -> str:
+        """Return a string representation of the AsyncMongoModule."""
+        return f"AsyncMongoModule(database='{self.mongo_module.database_name}')"
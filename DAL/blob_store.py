@@ -0,0 +1,193 @@
+import io
+import os
+import uuid
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Any, BinaryIO, Callable, Dict, Iterator, Optional
+
+import logging as log
+from bson.errors import InvalidId
+from bson.objectid import ObjectId
+from gridfs import GridFSBucket
+from gridfs.errors import NoFile
+
+
+class BlobReader:
+    """
+    A seekable, read-only handle on a stored blob with a known length.
+
+    Readers opened for a meme image also carry the format, content_hash and
+    created_at of its document, which callers use as HTTP validators.
+    """
+
+    def __init__(self, stream: BinaryIO, length: int, format: Optional[str] = None,
+                 content_hash: Optional[str] = None, created_at: Optional[datetime] = None):
+        self.stream = stream
+        self.length = length
+        self.format = format
+        self.content_hash = content_hash
+        self.created_at = created_at
+
+    def read(self, size: int = -1) -> bytes:
+        return self.stream.read(size)
+
+    def seek(self, offset: int) -> None:
+        self.stream.seek(offset)
+
+    def read_all(self) -> bytes:
+        """Read the whole blob from the start."""
+        self.seek(0)
+        return self.read()
+
+    def iter_chunks(self, start: int = 0, stop: Optional[int] = None,
+                    chunk_size: int = 256 * 1024) -> Iterator[bytes]:
+        """
+        Yield the bytes in [start, stop) in chunks of at most chunk_size.
+        """
+        stop = self.length if stop is None else min(stop, self.length)
+        self.seek(start)
+        remaining = stop - start
+        while remaining > 0:
+            chunk = self.read(min(chunk_size, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+    def close(self) -> None:
+        self.stream.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class BlobStore(ABC):
+    """
+    Interface of the storage backends that hold meme image bytes.
+
+    Backends implement put, open and delete; get is built on open.
+    """
+
+    @abstractmethod
+    def put(self, data: bytes, filename: Optional[str] = None,
+            metadata: Optional[Dict[str, Any]] = None) -> str:
+        """
+        Store data and return its blob id.
+        """
+
+    @abstractmethod
+    def open(self, blob_id: str) -> Optional[BlobReader]:
+        """
+        Open a blob for reading, or return None if it does not exist.
+        """
+
+    @abstractmethod
+    def delete(self, blob_id: str) -> bool:
+        """
+        Delete a blob. Returns False if it did not exist.
+        """
+
+    def get(self, blob_id: str) -> Optional[bytes]:
+        """
+        Read a whole blob into memory, or return None if it does not exist.
+        """
+        reader = self.open(blob_id)
+        if reader is None:
+            return None
+        with reader:
+            return reader.read_all()
+
+
+class GridFSBlobStore(BlobStore):
+    """
+    A blob store backed by a GridFS bucket, which splits blobs into chunk documents.
+    """
+
+    def __init__(self, database_provider: Callable[[], Any], bucket_name: str = 'meme_blobs',
+                 chunk_size_bytes: int = 255 * 1024):
+        """
+        Initialize the GridFSBlobStore.
+
+        Args:
+            database_provider: Returns the pymongo Database holding the bucket. Called per
+                               operation so the store follows the shared client registry
+            bucket_name: Name of the GridFS bucket
+            chunk_size_bytes: Size of the stored chunks
+        """
+        self.database_provider = database_provider
+        self.bucket_name = bucket_name
+        self.chunk_size_bytes = chunk_size_bytes
+
+    @property
+    def bucket(self) -> GridFSBucket:
+        return GridFSBucket(self.database_provider(), bucket_name=self.bucket_name,
+                            chunk_size_bytes=self.chunk_size_bytes)
+
+    def put(self, data: bytes, filename: Optional[str] = None,
+            metadata: Optional[Dict[str, Any]] = None) -> str:
+        blob_id = self.bucket.upload_from_stream(filename or 'blob', io.BytesIO(data), metadata=metadata)
+        return str(blob_id)
+
+    def open(self, blob_id: str) -> Optional[BlobReader]:
+        try:
+            stream = self.bucket.open_download_stream(ObjectId(blob_id))
+        except (NoFile, InvalidId, TypeError):
+            return None
+        return BlobReader(stream, stream.length)
+
+    def delete(self, blob_id: str) -> bool:
+        try:
+            self.bucket.delete(ObjectId(blob_id))
+            return True
+        except (NoFile, InvalidId, TypeError):
+            return False
+
+
+class LocalBlobStore(BlobStore):
+    """
+    A blob store that keeps each blob as a file under a root directory.
+    """
+
+    def __init__(self, root: str):
+        """
+        Initialize the LocalBlobStore.
+
+        Args:
+            root: Directory holding the blobs. Created if missing
+        """
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+
+    def _path(self, blob_id: str) -> str:
+        if not blob_id or not all(c in '0123456789abcdef' for c in blob_id):
+            raise ValueError(f"Invalid blob id: {blob_id}")
+        return os.path.join(self.root, blob_id[:2], blob_id)
+
+    def put(self, data: bytes, filename: Optional[str] = None,
+            metadata: Optional[Dict[str, Any]] = None) -> str:
+        blob_id = uuid.uuid4().hex
+        path = self._path(blob_id)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        return blob_id
+
+    def open(self, blob_id: str) -> Optional[BlobReader]:
+        try:
+            path = self._path(blob_id)
+            return BlobReader(open(path, 'rb'), os.path.getsize(path))
+        except (OSError, ValueError) as e:
+            log.debug(f"Blob {blob_id} not found: {e}")
+            return None
+
+    def delete(self, blob_id: str) -> bool:
+        try:
+            os.remove(self._path(blob_id))
+            return True
+        except (OSError, ValueError):
+            return False
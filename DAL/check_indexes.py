@@ -0,0 +1,27 @@
+"""
+Create the meme indexes and fail if any DAL query is planned as a collection scan.
+
+Usage:
+    MONGODB_URI=mongodb://localhost:27017 python -m DAL.check_indexes [database]
+"""
+import os
+import sys
+
+from DAL.indexes import find_collection_scans
+from DAL.mongo_module import MongoModule
+
+if __name__ == "__main__":
+    data = {
+        'database': sys.argv[1] if len(sys.argv) > 1 else 'meme_db'
+    }
+
+    mongo_module = MongoModule(data, os.environ.get('MONGODB_URI', 'mongodb://localhost:5000'))
+
+    print("\nEnsuring indexes...")
+    print("Indexes:", mongo_module.ensure_indexes())
+
+    scans = find_collection_scans(mongo_module)
+    if scans:
+        print("Queries scanning a whole collection:", ", ".join(scans))
+        sys.exit(1)
+    print("No query uses a COLLSCAN")
@@ -0,0 +1,148 @@
+import os
+import threading
+import time
+import weakref
+from typing import Any, Callable, Dict, Optional
+
+import logging as log
+from pymongo import MongoClient
+
+DEFAULT_CLIENT_OPTIONS = {
+    'maxPoolSize': int(os.environ.get('MONGO_MAX_POOL_SIZE', 50)),
+    'minPoolSize': int(os.environ.get('MONGO_MIN_POOL_SIZE', 0)),
+    'maxIdleTimeMS': int(os.environ.get('MONGO_MAX_IDLE_TIME_MS', 60000)),
+    'serverSelectionTimeoutMS': int(os.environ.get('MONGO_SERVER_SELECTION_TIMEOUT_MS', 5000)),
+    'connectTimeoutMS': int(os.environ.get('MONGO_CONNECT_TIMEOUT_MS', 5000))
+}
+
+
+class MongoClientRegistry:
+    """
+    A process-wide registry that shares one MongoClient per connection string and options.
+
+    Clients that have not been requested for idle_timeout seconds are closed,
+    and after a fork the child process starts with an empty registry, since
+    MongoClient instances must not be shared across fork.
+    """
+
+    def __init__(self, client_factory: Callable[..., Any] = MongoClient,
+                 idle_timeout: Optional[float] = 600.0, **default_options):
+        """
+        Initialize the MongoClientRegistry.
+
+        Args:
+            client_factory: Callable creating a client from a connection string and options
+            idle_timeout: Seconds a client may go unrequested before it is closed. None keeps clients forever
+            default_options: MongoClient options applied to every client, on top of DEFAULT_CLIENT_OPTIONS
+        """
+        self.client_factory = client_factory
+        self.idle_timeout = idle_timeout
+        self.default_options = {**DEFAULT_CLIENT_OPTIONS, **default_options}
+
+        self._clients = {}
+        self._last_used = {}
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+
+        if hasattr(os, 'register_at_fork'):
+            registry = weakref.ref(self)
+            os.register_at_fork(after_in_child=lambda: registry() and registry()._reset_after_fork())
+
+    def get_client(self, connection_string: str, **options) -> Any:
+        """
+        Return the shared client for a connection string, creating it on first use.
+
+        Args:
+            connection_string: MongoDB connection string
+            options: MongoClient options overriding the registry defaults
+
+        Returns:
+            MongoClient: The shared client
+        """
+        merged = {**self.default_options, **options}
+        # Options such as event_listeners are unhashable, key on their representation
+        key = (connection_string, tuple(sorted((name, repr(value)) for name, value in merged.items())))
+        now = time.monotonic()
+
+        with self._lock:
+            if self._pid != os.getpid():
+                self._forget_all()
+
+            client = self._clients.get(key)
+            if client is None:
+                log.info(f'Creating MongoClient for {self._redact(connection_string)}')
+                client = self.client_factory(connection_string, **merged)
+                self._clients[key] = client
+            self._last_used[key] = now
+
+            idle = self._pop_idle(now, keep=key)
+
+        for stale in idle:
+            self._close(stale)
+        return client
+
+    def close_idle(self) -> int:
+        """
+        Close every client that has been idle for longer than idle_timeout.
+
+        Returns:
+            int: Number of clients closed
+        """
+        with self._lock:
+            idle = self._pop_idle(time.monotonic())
+        for client in idle:
+            self._close(client)
+        return len(idle)
+
+    def close_all(self) -> None:
+        """
+        Close and forget every client.
+        """
+        with self._lock:
+            clients = list(self._clients.values())
+            self._forget_all()
+        for client in clients:
+            self._close(client)
+
+    def stats(self) -> Dict[str, int]:
+        """Return the number of clients currently held."""
+        with self._lock:
+            return {'clients': len(self._clients)}
+
+    def _pop_idle(self, now: float, keep=None) -> list:
+        if self.idle_timeout is None:
+            return []
+        idle = [key for key, used in self._last_used.items()
+                if key != keep and now - used > self.idle_timeout]
+        clients = [self._clients.pop(key) for key in idle]
+        for key in idle:
+            del self._last_used[key]
+        return clients
+
+    def _forget_all(self) -> None:
+        # Inherited clients belong to the parent process, drop them without closing
+        self._clients = {}
+        self._last_used = {}
+        self._pid = os.getpid()
+
+    def _reset_after_fork(self) -> None:
+        self._lock = threading.Lock()
+        self._forget_all()
+
+    @staticmethod
+    def _close(client) -> None:
+        try:
+            client.close()
+        except Exception as e:
+            log.error(f"Error closing MongoClient: {e}")
+
+    @staticmethod
+    def _redact(connection_string: str) -> str:
+        scheme, sep, rest = connection_string.partition('://')
+        if '@' in rest:
+            rest = '***@' + rest.split('@', 1)[1]
+        return f'{scheme}{sep}{rest}'
+
+
+# Shared by every MongoModule that is not given its own registry
+default_registry = MongoClientRegistry()
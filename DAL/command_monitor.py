@@ -0,0 +1,70 @@
+import threading
+from collections import Counter
+from typing import Callable, Dict
+
+from pymongo import monitoring
+
+
+class CommandCounter(monitoring.CommandListener):
+    """
+    A pymongo command listener that counts the commands sent to the server.
+
+    Register it with MongoClient(event_listeners=[counter]), or through
+    MongoClientRegistry.get_client(..., event_listeners=[counter]), to count
+    round-trips per command name.
+    """
+
+    def __init__(self):
+        self._counts = Counter()
+        self._failures = Counter()
+        self._lock = threading.Lock()
+
+    def started(self, event: monitoring.CommandStartedEvent) -> None:
+        with self._lock:
+            self._counts[event.command_name] += 1
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent) -> None:
+        pass
+
+    def failed(self, event: monitoring.CommandFailedEvent) -> None:
+        with self._lock:
+            self._failures[event.command_name] += 1
+
+    @property
+    def counts(self) -> Dict[str, int]:
+        """Commands started per command name, e.g. {'find': 2, 'getMore': 1}."""
+        with self._lock:
+            return dict(self._counts)
+
+    @property
+    def total(self) -> int:
+        """Total number of commands started."""
+        with self._lock:
+            return sum(self._counts.values())
+
+    def reset(self) -> None:
+        """Clear all counts."""
+        with self._lock:
+            self._counts.clear()
+            self._failures.clear()
+
+
+class CommandTimer(monitoring.CommandListener):
+    """
+    A pymongo command listener that reports the server round-trip time of every command.
+
+    The callback runs on the thread that issued the command, with the
+    command name, its duration in seconds and whether it failed.
+    """
+
+    def __init__(self, callback: Callable[[str, float, bool], None]):
+        self.callback = callback
+
+    def started(self, event: monitoring.CommandStartedEvent) -> None:
+        pass
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent) -> None:
+        self.callback(event.command_name, event.duration_micros / 1e6, False)
+
+    def failed(self, event: monitoring.CommandFailedEvent) -> None:
+        self.callback(event.command_name, event.duration_micros / 1e6, True)
@@ -0,0 +1,122 @@
+from datetime import datetime
+from typing import Any, Dict, Iterator, List
+
+import logging as log
+from bson.objectid import ObjectId
+from pymongo import ASCENDING, DESCENDING, IndexModel
+
+# TTL index that expired memes before MongoModule.expire_memes
+TTL_INDEX_NAME = 'created_at_ttl'
+
+# Indexes serving the query shapes of MongoModule, by collection
+INDEXES = {
+    'memes': [
+        # Keyset pagination and "latest memes" listings sort on MongoModule.LIST_SORT
+        IndexModel([('created_at', DESCENDING), ('_id', DESCENDING)], name='created_at_id'),
+        # Content address of a meme, memes saved before deduplication have none
+        IndexModel([('dedup_key', ASCENDING)], name='dedup_key', unique=True,
+                   partialFilterExpression={'dedup_key': {'$exists': True}}),
+        # Ready-to-serve memes, claimed oldest first. Only unclaimed memes are indexed
+        IndexModel([('inventory', ASCENDING), ('created_at', ASCENDING)], name='inventory_created_at',
+                   partialFilterExpression={'inventory': {'$exists': True}})
+    ],
+    'images': [
+        # Renditions of one meme and of a page of memes ($in)
+        IndexModel([('meme_id', ASCENDING), ('rendition', ASCENDING)], name='meme_id_rendition', unique=True)
+    ]
+}
+
+
+def ensure_indexes(db) -> Dict[str, List[str]]:
+    """
+    Create the indexes in INDEXES and drop the TTL index of older deployments.
+
+    Safe to run on every startup: existing indexes are left alone. Memes
+    used to expire through a TTL index on created_at, which deleted memes
+    still referenced by other saves and left their blobs behind. Retention
+    now runs through MongoModule.expire_memes instead.
+
+    Args:
+        db: pymongo Database holding the meme collections
+
+    Returns:
+        dict: Names of the indexes ensured, by collection
+    """
+    ensured = {}
+    for collection_name, indexes in INDEXES.items():
+        collection = db[collection_name]
+        ensured[collection_name] = collection.create_indexes(indexes)
+        if TTL_INDEX_NAME in collection.index_information():
+            log.info(f'Dropping TTL index of {collection.name}')
+            collection.drop_index(TTL_INDEX_NAME)
+
+    log.info(f'Ensured indexes {ensured}')
+    return ensured
+
+
+def query_shapes(mongo_module) -> List[Dict[str, Any]]:
+    """
+    Describe the queries MongoModule runs on its request paths, with sample values.
+
+    Maintenance scans such as migrate_inline_blobs are deliberately left out.
+    """
+    sample_id = ObjectId()
+    sample_cursor = mongo_module.encode_cursor({'created_at': datetime.now(), '_id': sample_id})
+    return [
+        {'name': 'list memes', 'collection': mongo_module.memes_collection,
+         'filter': {**mongo_module.LISTED}, 'sort': mongo_module.LIST_SORT},
+        {'name': 'list memes after cursor', 'collection': mongo_module.memes_collection,
+         'filter': {**mongo_module.LISTED, **mongo_module.decode_cursor(sample_cursor)},
+         'sort': mongo_module.LIST_SORT},
+        {'name': 'meme by id', 'collection': mongo_module.memes_collection,
+         'filter': {'_id': sample_id}},
+        {'name': 'meme by content', 'collection': mongo_module.memes_collection,
+         'filter': {'dedup_key': mongo_module.dedup_key(b''), 'ref_count': {'$gte': 1}}},
+        {'name': 'export memes by date', 'collection': mongo_module.memes_collection,
+         'filter': mongo_module.export_query(datetime(2024, 1, 1), datetime(2024, 2, 1)),
+         'sort': mongo_module.EXPORT_SORT},
+        {'name': 'expired memes', 'collection': mongo_module.memes_collection,
+         'filter': mongo_module.expired_query(datetime(2024, 1, 1)), 'sort': mongo_module.EXPORT_SORT},
+        {'name': 'claim inventory meme', 'collection': mongo_module.memes_collection,
+         'filter': {'inventory': 'gradient'}, 'sort': mongo_module.INVENTORY_SORT},
+        {'name': 'rendition of a meme', 'collection': mongo_module.images_collection,
+         'filter': {'meme_id': str(sample_id), 'rendition': 'thumbnail'}},
+        {'name': 'images of a meme', 'collection': mongo_module.images_collection,
+         'filter': {'meme_id': str(sample_id)}},
+        {'name': 'renditions of a page of memes', 'collection': mongo_module.images_collection,
+         'filter': {'meme_id': {'$in': [str(sample_id), str(ObjectId())]}, 'rendition': 'thumbnail'}}
+    ]
+
+
+def _plan_stages(plan: Any) -> Iterator[str]:
+    if isinstance(plan, dict):
+        if 'stage' in plan:
+            yield plan['stage']
+        for value in plan.values():
+            yield from _plan_stages(value)
+    elif isinstance(plan, list):
+        for value in plan:
+            yield from _plan_stages(value)
+
+
+def find_collection_scans(mongo_module) -> List[str]:
+    """
+    Explain every query shape of MongoModule and report those whose winning plan scans a collection.
+
+    Args:
+        mongo_module: MongoModule whose database should already have its indexes
+
+    Returns:
+        list: Names of the query shapes planned with a COLLSCAN stage
+    """
+    scans = []
+    for shape in query_shapes(mongo_module):
+        cursor = shape['collection'].find(shape['filter'])
+        if shape.get('sort'):
+            cursor = cursor.sort(shape['sort'])
+        winning_plan = cursor.explain()['queryPlanner']['winningPlan']
+        stages = list(_plan_stages(winning_plan))
+        log.debug(f"{shape['name']}: {' <- '.join(stages)}")
+        if 'COLLSCAN' in stages:
+            scans.append(shape['name'])
+    return scans
@@ -0,0 +1,21 @@
+"""
+Move meme images stored inline in MongoDB documents into the blob store.
+
+Usage:
+    MONGODB_URI=mongodb://localhost:27017 python -m DAL.migrate_inline_blobs [database]
+"""
+import os
+import sys
+
+from DAL.mongo_module import MongoModule
+
+if __name__ == "__main__":
+    data = {
+        'database': sys.argv[1] if len(sys.argv) > 1 else 'meme_db'
+    }
+
+    mongo_module = MongoModule(data, os.environ.get('MONGODB_URI', 'mongodb://localhost:5000'))
+
+    print("\nMigrating inline images...")
+    result = mongo_module.migrate_inline_blobs()
+    print("Migrated:", result)
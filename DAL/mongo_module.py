@@ -1,49 +1,288 @@
-from typing import Dict, List, Optional, Any
-from pymongo import MongoClient
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Any
+from collections import Counter
 from datetime import datetime
+import base64
+import hashlib
+import io
+import json
 import logging as log
+from bson.errors import InvalidId
 from bson.objectid import ObjectId
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError
 from PIL import Image
 
+from DAL.archive import ArchiveEntry, archive_writer
+from DAL.blob_store import BlobReader, BlobStore, GridFSBlobStore
+from DAL.client_registry import MongoClientRegistry, default_registry
+from DAL.indexes import ensure_indexes
+
+# Name of the original, full-size image, which is kept in the meme document itself
+FULL_RENDITION = 'full'
+
+
+class InvalidCursorError(ValueError):
+    """Raised when a pagination cursor cannot be decoded."""
+
+
+def _json_value(value: Any) -> str:
+    """Serialize the BSON values of a meme document that json does not know."""
+    return value.isoformat() if isinstance(value, datetime) else str(value)
+
+
+def _read_and_close(reader: BlobReader) -> Iterator[bytes]:
+    with reader:
+        yield from reader.iter_chunks()
+
 
 class MongoModule:
-    def __init__(self, data: Dict[str, str], connection_string: str) -> None:
+    # Newest first, with _id breaking ties between memes created in the same millisecond
+    LIST_SORT = [('created_at', -1), ('_id', -1)]
+    # Oldest inventory is handed out first so it does not go stale
+    INVENTORY_SORT = [('created_at', 1)]
+    # Exports run oldest first, reading the created_at_id index backwards
+    EXPORT_SORT = [('created_at', 1), ('_id', 1)]
+    # Listings and exports leave out inventory memes until they are claimed
+    LISTED = {'inventory': {'$exists': False}}
+
+    # Callbacks taking a meme_id, run after a meme is updated or deleted through any view
+    # of this process. Other processes are not notified, see meme_exists
+    _change_listeners = []
+
+    @classmethod
+    def add_change_listener(cls, listener: Callable[[str], None]) -> None:
+        """
+        Register a callback run with the meme_id whenever a meme is updated or deleted.
+        Used to invalidate caches of meme content.
+        """
+        cls._change_listeners.append(listener)
+
+    @classmethod
+    def _notify_change(cls, meme_id: str) -> None:
+        for listener in cls._change_listeners:
+            try:
+                listener(meme_id)
+            except Exception as e:
+                log.error(f"Error in meme change listener: {e}")
+
+    def __init__(self, data: Dict[str, str], connection_string: str,
+                 registry: Optional[MongoClientRegistry] = None,
+                 client_options: Optional[Dict[str, Any]] = None,
+                 blob_store: Optional[BlobStore] = None,
+                 inline_threshold: int = 64 * 1024, full_rendition: str = FULL_RENDITION) -> None:
         """
         Initialize MongoDB service for meme management.
 
+        This is a cheap view: the MongoClient and its connection pool are
+        shared through the client registry, so it is fine to create one per request.
+
         Args:
             data: Dictionary containing database and collection names
             connection_string: MongoDB connection string
+            registry: Client registry to use. Defaults to the process-wide registry
+            client_options: MongoClient options for the shared client, e.g. event_listeners
+            blob_store: Where image bytes are kept. Defaults to a GridFS bucket in the same database
+            inline_threshold: Renditions up to this size stay inline in the images collection
+                              so list views can fetch them in one query
+            full_rendition: Name under which the full-size image of a meme is requested
         """
-        log.basicConfig(level=log.DEBUG, format='%(asctime)s %(levelname)s:\n%(message)s\n')
-        self.client = MongoClient(connection_string)
+        self.connection_string = connection_string
+        self.registry = registry or default_registry
+        self.client_options = client_options or {}
+        self.database_name = data.get('database')
+        self.blob_store = blob_store or GridFSBlobStore(lambda: self.db)
+        self.inline_threshold = inline_threshold
+        self.full_rendition = full_rendition
 
-        database_name = data.get('database')
-        self.db = self.client[database_name]
+    @property
+    def client(self):
+        # Looked up on every use so idle eviction and fork resets are always honored
+        return self.registry.get_client(self.connection_string, **self.client_options)
 
-        # Create separate collections for memes and images
-        self.memes_collection = self.db['memes']
-        self.images_collection = self.db['images']
+    @property
+    def db(self):
+        return self.client[self.database_name]
 
-    def save_meme(self, image_binary: bytes) -> dict:
+    # Separate collections for memes and images
+    @property
+    def memes_collection(self):
+        return self.db['memes']
+
+    @property
+    def images_collection(self):
+        return self.db['images']
+
+    def ensure_indexes(self) -> Dict[str, List[str]]:
+        """
+        Create the indexes the meme queries need and drop the TTL index of older deployments.
+        """
+        return ensure_indexes(self.db)
+
+    def _store_image(self, image_binary: bytes, image_format: str, filename: str,
+                     inline: bool = False) -> Dict[str, Any]:
+        """
+        Build the image fields of a document, putting large or non-inline images in the blob store.
+        """
+        fields = {
+            'length': len(image_binary),
+            'format': image_format,
+            # Stored images never change, so their hash doubles as a strong HTTP validator
+            'content_hash': hashlib.sha256(image_binary).hexdigest()
+        }
+        if inline and len(image_binary) <= self.inline_threshold:
+            fields['binary_data'] = image_binary
+        else:
+            fields['blob_id'] = self.blob_store.put(image_binary, filename=filename,
+                                                    metadata={'format': image_format})
+        return fields
+
+    @staticmethod
+    def dedup_key(image_binary: bytes, text: str = '') -> str:
+        """
+        Content address of a meme: the hash of its encoded image and its affirmation text.
+        """
+        digest = hashlib.sha256(image_binary)
+        digest.update(b'\0')
+        digest.update(text.encode('utf-8'))
+        return digest.hexdigest()
+
+    def _build_meme_documents(self, image_binary: bytes, renditions: Optional[Dict[str, bytes]],
+                              image_format: str, dedup_key: str, ref_count: int, blob_ids: List[str]):
         """
-        Save meme binary data with creation timestamp.
+        Store the blobs of a meme and build its meme and image documents.
+
+        Ids of the stored blobs are appended to blob_ids, so callers can clean
+        them up if the documents are never inserted.
+        """
+        meme_id = ObjectId()
+        created_at = datetime.now()
+        meme_document = {
+            '_id': meme_id,
+            **self._store_image(image_binary, image_format, f'{meme_id}.{image_format}'),
+            'dedup_key': dedup_key,
+            'ref_count': ref_count,
+            'created_at': created_at
+        }
+        blob_ids.append(meme_document.get('blob_id'))
+
+        image_documents = []
+        for name, binary in (renditions or {}).items():
+            image_document = {
+                'meme_id': str(meme_id),
+                'rendition': name,
+                **self._store_image(binary, image_format, f'{meme_id}-{name}.{image_format}', inline=True),
+                'created_at': created_at
+            }
+            blob_ids.append(image_document.get('blob_id'))
+            image_documents.append(image_document)
+
+        return meme_document, image_documents
+
+    def _delete_blobs(self, blob_ids: List[Optional[str]]) -> None:
+        for blob_id in filter(None, blob_ids):
+            self.blob_store.delete(blob_id)
+
+    def _discard_meme(self, meme_id: str, blob_ids: List[Optional[str]]) -> None:
+        """Remove the images and blobs of a meme whose document was never inserted."""
+        self.images_collection.delete_many({'meme_id': meme_id})
+        self._delete_blobs(blob_ids)
+
+    def _add_reference(self, dedup_key: str, count: int = 1) -> Optional[str]:
+        """
+        Count count more saves of the meme stored under dedup_key.
+
+        Memes whose last reference was released are on their way out and are not revived.
+
+        Returns:
+            Optional[str]: The meme_id of the stored meme, or None if there is none
+        """
+        meme = self.memes_collection.find_one_and_update(
+            {'dedup_key': dedup_key, 'ref_count': {'$gte': 1}},
+            {'$inc': {'ref_count': count}},
+            projection={'_id': 1}
+        )
+        return str(meme['_id']) if meme else None
+
+    def _insert_meme(self, meme_document: Dict[str, Any], count: int, attempts: int = 3) -> Optional[str]:
+        """
+        Insert a meme document whose images are stored, unless a concurrent save stored the same meme first.
+
+        A stored copy whose last reference was just released is still being
+        deleted and cannot be referenced. Its deletion is finished here and the
+        insert retried, instead of failing the save.
+
+        Args:
+            meme_document: Meme to insert, holding count references
+            count: References to add to the stored copy instead
+            attempts: Inserts tried before giving up
+
+        Returns:
+            Optional[str]: None if meme_document was inserted, else the meme_id of the stored copy
+
+        Raises:
+            DuplicateKeyError: If the content address is still taken after every attempt
+        """
+        for attempt in range(attempts):
+            try:
+                self.memes_collection.insert_one(meme_document)
+                return None
+            except DuplicateKeyError:
+                existing_id = self._add_reference(meme_document['dedup_key'], count)
+                if existing_id is not None:
+                    return existing_id
+                if attempt == attempts - 1:
+                    raise
+                unreferenced = self.memes_collection.find_one(
+                    {'dedup_key': meme_document['dedup_key'], 'ref_count': {'$lte': 0}}, {'_id': 1})
+                if unreferenced:
+                    self._delete_unreferenced(str(unreferenced['_id']))
+
+    def save_meme(self, image_binary: bytes, renditions: Optional[Dict[str, bytes]] = None,
+                  image_format: str = 'png', text: str = '') -> dict:
+        """
+        Save a meme with creation timestamp.
+
+        The full-size image goes to the blob store and the memes collection
+        only keeps its metadata. Memes are content addressed: saving the same
+        image and text again adds a reference to the stored meme and returns
+        its meme_id instead of storing a copy.
 
         Args:
             image_binary: Binary data of the generated meme
+            renditions: Optional smaller renditions of the meme by name, e.g. 'thumbnail'
+            image_format: Encoding of image_binary and the renditions, e.g. 'png'
+            text: Affirmation text of the meme, part of its content address
 
         Returns:
             dict: Contains status and meme_id
         """
         log.info('Saving new meme')
-        try:
-            meme_document = {
-                'binary_data': image_binary,
-                'created_at': datetime.now()
+        dedup_key = self.dedup_key(image_binary, text)
+        existing_id = self._add_reference(dedup_key)
+        if existing_id:
+            return {
+                'status': 'Already Exists',
+                'meme_id': existing_id
             }
 
-            meme_result = self.memes_collection.insert_one(meme_document)
-            meme_id = str(meme_result.inserted_id)
+        blob_ids = []
+        meme_id = None
+        try:
+            meme_document, image_documents = self._build_meme_documents(image_binary, renditions, image_format,
+                                                                        dedup_key, 1, blob_ids)
+            meme_id = str(meme_document['_id'])
+
+            # Insert renditions first so a visible meme always has them
+            if image_documents:
+                self.images_collection.insert_many(image_documents)
+            existing_id = self._insert_meme(meme_document, 1)
+            if existing_id:
+                # The same meme was saved concurrently, reference that one instead
+                self._discard_meme(meme_id, blob_ids)
+                return {
+                    'status': 'Already Exists',
+                    'meme_id': existing_id
+                }
 
             return {
                 'status': 'Successfully Inserted',
@@ -52,26 +291,256 @@ class MongoModule:
 
         except Exception as e:
             log.error(f"Error saving meme: {e}")
+            if meme_id:
+                self._discard_meme(meme_id, blob_ids)
+            else:
+                self._delete_blobs(blob_ids)
             raise
 
-    def get_all_memes(self, include_images: bool = False) -> List[Dict[str, Any]]:
+    def save_memes(self, memes: List[Dict[str, Any]], image_format: str = 'png') -> List[dict]:
         """
-        Retrieve all memes with optional image data.
+        Save many memes with two unordered insert_many round-trips.
+
+        Like save_meme, memes already stored, or repeated within the batch,
+        are referenced instead of stored again. A meme whose documents fail to
+        insert is rolled back on its own, the rest of the batch is still saved.
+
+        Args:
+            memes: Dicts with image_binary and optionally renditions, image_format and text
+            image_format: Encoding of memes that do not give their own
+
+        Returns:
+            list: For each meme, in order, its status and meme_id, or status and error
+        """
+        log.info(f'Saving {len(memes)} memes')
+        keys = [self.dedup_key(meme['image_binary'], meme.get('text', '')) for meme in memes]
+        saves = Counter(keys)
+
+        # Reference memes that are already stored, one update per distinct meme in a single round-trip
+        stored = {meme['dedup_key']: str(meme['_id']) for meme in self.memes_collection.find(
+            {'dedup_key': {'$in': list(saves)}, 'ref_count': {'$gte': 1}}, {'dedup_key': 1})}
+        if stored:
+            self.memes_collection.bulk_write([
+                UpdateOne({'dedup_key': key, 'ref_count': {'$gte': 1}}, {'$inc': {'ref_count': saves[key]}})
+                for key in stored
+            ], ordered=False)
+
+        failures = {}
+        documents = []
+        for index, (meme, key) in enumerate(zip(memes, keys)):
+            if key in stored or key in failures:
+                continue
+            blob_ids = []
+            try:
+                meme_document, image_documents = self._build_meme_documents(
+                    meme['image_binary'], meme.get('renditions'), meme.get('image_format', image_format),
+                    key, saves[key], blob_ids)
+                documents.append((index, meme_document, image_documents, blob_ids))
+                stored[key] = str(meme_document['_id'])
+            except Exception as e:
+                log.error(f"Error storing meme images: {e}")
+                self._delete_blobs(blob_ids)
+                failures[key] = {'status': 'Failed', 'error': str(e)}
+
+        # Renditions go first so a visible meme always has them
+        image_documents = [(position, image) for position, (_, _, images, _) in enumerate(documents)
+                           for image in images]
+        failed = self._insert_unordered(self.images_collection, image_documents)
+        meme_documents = [(position, meme_document) for position, (_, meme_document, _, _) in enumerate(documents)
+                          if position not in failed]
+        duplicates = []
+        for position, error in self._insert_unordered(self.memes_collection, meme_documents).items():
+            if error.get('code') == 11000:
+                duplicates.append(position)
+            else:
+                failed[position] = error
+
+        # Losing a race against a concurrent save of the same meme is not a failure
+        referenced = {}
+        for position in duplicates:
+            meme_document = documents[position][1]
+            try:
+                existing_id = self._insert_meme(meme_document, saves[meme_document['dedup_key']])
+            except Exception as e:
+                failed[position] = {'errmsg': str(e)}
+                continue
+            if existing_id:
+                referenced[position] = existing_id
+
+        for position, (index, meme_document, _, blob_ids) in enumerate(documents):
+            if position not in failed and position not in referenced:
+                continue
+            key = meme_document['dedup_key']
+            self._discard_meme(str(meme_document['_id']), blob_ids)
+            if position in referenced:
+                stored[key] = referenced[position]
+            else:
+                del stored[key]
+                failures[key] = {'status': 'Failed', 'error': failed[position].get('errmsg', 'Insert failed')}
+
+        # The first save of a newly inserted meme reports the insert, every other save a reference
+        inserted = {str(meme_document['_id']) for _, meme_document, _, _ in documents}
+        results = []
+        for key in keys:
+            if key in failures:
+                results.append(failures[key])
+            elif stored[key] in inserted:
+                inserted.discard(stored[key])
+                results.append({'status': 'Successfully Inserted', 'meme_id': stored[key]})
+            else:
+                results.append({'status': 'Already Exists', 'meme_id': stored[key]})
+        return results
+
+    @staticmethod
+    def _insert_unordered(collection, documents: List[tuple]) -> Dict[int, Dict[str, Any]]:
+        """
+        Insert (owner, document) pairs unordered and return the owners of failed documents with their write error.
+        """
+        if not documents:
+            return {}
+        try:
+            collection.insert_many([document for _, document in documents], ordered=False)
+            return {}
+        except BulkWriteError as e:
+            log.error(f"Error inserting into {collection.name}: {len(e.details['writeErrors'])} documents failed")
+            return {documents[error['index']][0]: error for error in e.details['writeErrors']}
+        except Exception as e:
+            log.error(f"Error inserting into {collection.name}: {e}")
+            return {owner: {'errmsg': str(e)} for owner, _ in documents}
+
+    @staticmethod
+    def encode_cursor(meme: Dict[str, Any]) -> str:
+        """
+        Build an opaque pagination cursor pointing just after the given meme.
+        """
+        raw = f"{meme['created_at'].isoformat()}|{meme['_id']}"
+        return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+    @staticmethod
+    def decode_cursor(cursor: str) -> Dict[str, Any]:
+        """
+        Turn a pagination cursor into the keyset filter selecting the memes after it.
+
+        Raises:
+            InvalidCursorError: If the cursor is malformed
+        """
+        try:
+            raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode('utf-8')
+            created_at, meme_id = raw.split('|')
+            created_at = datetime.fromisoformat(created_at)
+            meme_id = ObjectId(meme_id)
+        except Exception as e:
+            raise InvalidCursorError(f"Invalid cursor: {cursor}") from e
+
+        return {'$or': [
+            {'created_at': {'$lt': created_at}},
+            {'created_at': created_at, '_id': {'$lt': meme_id}}
+        ]}
+
+    def iter_memes(self, after: Optional[str] = None, limit: Optional[int] = None,
+                   include_binary: bool = False, batch_size: int = 500,
+                   include_images: bool = False, rendition: str = 'thumbnail') -> Iterator[Dict[str, Any]]:
+        """
+        Stream memes newest first straight from the cursor, leaving out unclaimed inventory.
+
+        Args:
+            after: Cursor returned by encode_cursor; only memes after it are returned
+            limit: Maximum number of memes. None streams the rest of the collection
+            include_binary: Whether to include the full-size binary_data
+            batch_size: Number of documents fetched per round-trip
+            include_images: Whether to attach a rendition as image_data, fetched once per batch
+            rendition: Name of the rendition attached as image_data
+
+        Yields:
+            dict: Meme documents with _id converted to a string
+        """
+        query = {**self.LISTED, **(self.decode_cursor(after) if after else {})}
+        projection = None if include_binary else {'binary_data': 0}
+
+        cursor = self.memes_collection.find(query, projection).sort(self.LIST_SORT).batch_size(batch_size)
+        if limit is not None:
+            cursor = cursor.limit(limit)
+
+        try:
+            batch = []
+            for meme in cursor:
+                meme['_id'] = str(meme['_id'])
+                if not include_images:
+                    yield meme
+                    continue
+                batch.append(meme)
+                if len(batch) == batch_size:
+                    yield from self._attach_images(batch, rendition)
+                    batch = []
+            yield from self._attach_images(batch, rendition)
+        finally:
+            cursor.close()
+
+    def list_memes(self, limit: int = 50, after: Optional[str] = None,
+                   include_binary: bool = False) -> Dict[str, Any]:
+        """
+        Retrieve one page of memes, newest first.
+
+        Args:
+            limit: Maximum number of memes on the page
+            after: Cursor of the previous page's last meme
+            include_binary: Whether to include the full-size binary_data
+
+        Returns:
+            dict: items, and next, the cursor of the following page or None on the last page
+        """
+        log.info(f'Listing {limit} memes')
+        items = list(self.iter_memes(after=after, limit=limit + 1, include_binary=include_binary))
+        has_more = len(items) > limit
+        items = items[:limit]
+        return {
+            'items': items,
+            'next': self.encode_cursor(items[-1]) if has_more else None
+        }
+
+    def _image_bytes(self, document: Dict[str, Any]) -> Optional[bytes]:
+        """Return the image bytes of a document, whether inline or in the blob store."""
+        if 'binary_data' in document:
+            return document['binary_data']
+        return self.blob_store.get(document['blob_id']) if document.get('blob_id') else None
+
+    def _attach_images(self, memes: List[Dict[str, Any]], rendition: str) -> List[Dict[str, Any]]:
+        """
+        Attach a rendition to each meme as image_data with one $in query for the whole batch.
+        """
+        if not memes:
+            return memes
+
+        images = self.images_collection.find(
+            {'meme_id': {'$in': [meme['_id'] for meme in memes]}, 'rendition': rendition},
+            {'meme_id': 1, 'binary_data': 1, 'blob_id': 1}
+        )
+        binaries = {image['meme_id']: self._image_bytes(image) for image in images}
+
+        for meme in memes:
+            if meme['_id'] in binaries:
+                meme['image_data'] = binaries[meme['_id']]
+        return memes
+
+    def get_all_memes(self, include_images: bool = False, rendition: str = 'thumbnail') -> List[Dict[str, Any]]:
+        """
+        Retrieve all memes but unclaimed inventory, with optional image data.
+
+        The full-size binary is never included, list views get a rendition instead.
 
         Args:
             include_images: Whether to include image binary data
+            rendition: Name of the rendition attached as image_data
         """
         log.info('Retrieving all memes')
         try:
-            memes = list(self.memes_collection.find())
+            memes = list(self.memes_collection.find(self.LISTED, {'binary_data': 0}))
 
             for meme in memes:
                 meme['_id'] = str(meme['_id'])
 
-                if include_images:
-                    image = self.images_collection.find_one({'meme_id': meme['_id']})
-                    if image:
-                        meme['image_data'] = image['binary_data']
+            if include_images:
+                self._attach_images(memes, rendition)
 
             return memes
 
@@ -79,58 +548,471 @@ class MongoModule:
             log.error(f"Error retrieving memes: {e}")
             return []
 
-    def get_meme(self, meme_id: str, include_image: bool = False) -> Optional[Dict[str, Any]]:
+    def get_meme(self, meme_id: str, include_image: bool = False,
+                 rendition: str = 'thumbnail') -> Optional[Dict[str, Any]]:
         """
         Retrieve a specific meme by ID.
 
+        With include_image the meme and the one image document of its
+        rendition are read in a single aggregation round-trip. The $lookup
+        matches on meme_id and rendition, served by the meme_id_rendition
+        index, and projects only the image bytes or their blob_id.
+
         Args:
             meme_id: ID of the meme to retrieve
             include_image: Whether to include image binary data
+            rendition: Name of the rendition attached as image_data
         """
         log.info(f'Retrieving meme {meme_id}')
         try:
-            meme = self.memes_collection.find_one({'_id': ObjectId(meme_id)})
+            if not include_image:
+                meme = self.memes_collection.find_one({'_id': ObjectId(meme_id)})
+            else:
+                meme = next(self.memes_collection.aggregate([
+                    {'$match': {'_id': ObjectId(meme_id)}},
+                    {'$lookup': {
+                        'from': self.images_collection.name,
+                        'let': {'meme_id': {'$toString': '$_id'}, 'rendition': {'$literal': rendition}},
+                        'pipeline': [
+                            {'$match': {'$expr': {'$and': [{'$eq': ['$meme_id', '$$meme_id']},
+                                                           {'$eq': ['$rendition', '$$rendition']}]}}},
+                            {'$limit': 1},
+                            {'$project': {'_id': 0, 'binary_data': 1, 'blob_id': 1}}
+                        ],
+                        'as': '_image'
+                    }}
+                ]), None)
+            if not meme:
+                return None
 
-            if meme:
-                meme['_id'] = str(meme['_id'])
+            meme['_id'] = str(meme['_id'])
+            if include_image:
+                for image in meme.pop('_image', []):
+                    meme['image_data'] = self._image_bytes(image)
+            return meme
 
-                if include_image:
-                    image = self.images_collection.find_one({'meme_id': meme_id})
-                    if image:
-                        meme['image_data'] = image['binary_data']
+        except Exception as e:
+            log.error(f"Error retrieving meme: {e}")
+            return None
 
-                return meme
+    def _find_image_document(self, meme_id: str, rendition: str) -> Optional[Dict[str, Any]]:
+        if rendition == self.full_rendition:
+            return self.memes_collection.find_one({'_id': ObjectId(meme_id)})
+        return self.images_collection.find_one({'meme_id': meme_id, 'rendition': rendition})
 
-            return None
+    def _open_document(self, document: Dict[str, Any]) -> Optional[BlobReader]:
+        """Open the image bytes of a meme or image document, whether inline or in the blob store."""
+        if 'blob_id' in document:
+            reader = self.blob_store.open(document['blob_id'])
+        elif 'binary_data' in document:
+            # Inline renditions and memes stored before the blob store
+            reader = BlobReader(io.BytesIO(document['binary_data']), len(document['binary_data']))
+        else:
+            reader = None
+
+        if reader is not None:
+            # Memes stored before formats were recorded are PNG
+            reader.format = document.get('format', 'png')
+            # Documents from before content hashing fall back to their immutable id
+            reader.content_hash = document.get('content_hash') or f"{document['_id']}-{reader.length}"
+            reader.created_at = document.get('created_at')
+        return reader
+
+    def meme_exists(self, meme_id: str) -> bool:
+        """
+        Check that a meme has not been deleted, reading only its _id from the _id index.
+
+        Change listeners only run in the process that deleted a meme, so
+        caches shared by several worker processes revalidate their hits with this.
+        """
+        try:
+            return self.memes_collection.find_one({'_id': ObjectId(meme_id)}, {'_id': 1}) is not None
+        except (InvalidId, TypeError):
+            return False
+
+    def open_meme_image(self, meme_id: str, rendition: Optional[str] = None) -> Optional[BlobReader]:
+        """
+        Open one rendition of a meme for streaming without loading it into memory.
+
+        Args:
+            meme_id: ID of the meme
+            rendition: Name of the rendition. Defaults to full_rendition, the original image
+
+        Returns:
+            Optional[BlobReader]: A reader with length, format, content_hash and created_at
+                                  attributes, or None if the rendition does not exist.
+                                  Callers must close it
+        """
+        rendition = rendition or self.full_rendition
+        log.info(f'Opening {rendition} rendition of meme {meme_id}')
+        try:
+            document = self._find_image_document(meme_id, rendition)
+            return self._open_document(document) if document else None
 
         except Exception as e:
-            log.error(f"Error retrieving meme: {e}")
+            log.error(f"Error opening meme image: {e}")
+            return None
+
+    def get_meme_rendition(self, meme_id: str, rendition: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        Retrieve the binary data of one rendition of a meme.
+
+        Args:
+            meme_id: ID of the meme
+            rendition: Name of the rendition. Defaults to full_rendition, the original image
+
+        Returns:
+            Optional[dict]: binary_data and format of the rendition, or None if it does not exist
+        """
+        reader = self.open_meme_image(meme_id, rendition)
+        if reader is None:
             return None
+        with reader:
+            return {'binary_data': reader.read_all(), 'format': reader.format}
+
+    @classmethod
+    def export_query(cls, start: Optional[datetime] = None, end: Optional[datetime] = None) -> Dict[str, Any]:
+        """Filter on memes created in [start, end), either bound may be open, leaving out unclaimed inventory."""
+        created_at = {}
+        if start is not None:
+            created_at['$gte'] = start
+        if end is not None:
+            created_at['$lt'] = end
+        return {**cls.LISTED, 'created_at': created_at} if created_at else dict(cls.LISTED)
+
+    def iter_export_entries(self, start: Optional[datetime] = None, end: Optional[datetime] = None,
+                            renditions: Optional[Iterable[str]] = None, include_metadata: bool = True,
+                            batch_size: int = 100) -> Iterator[ArchiveEntry]:
+        """
+        Stream the files of an export of the memes created in [start, end), oldest first.
+
+        Memes come straight from the cursor and their images are opened as
+        their entries are reached, so only one batch of meme documents and one
+        open image are held at a time. Files are named like the blobs of a
+        meme: <meme_id>.<format> for the full image, <meme_id>-<rendition>.<format>
+        for the other renditions and <meme_id>.json for the meme document.
+
+        Args:
+            start: Only memes created at or after this time
+            end: Only memes created before this time
+            renditions: Names of the renditions exported per meme. Defaults to full_rendition
+            include_metadata: Whether to export the meme document as JSON
+            batch_size: Number of meme documents fetched per round-trip
+
+        Yields:
+            ArchiveEntry: The files of each meme, in the order of renditions
+        """
+        renditions = list(renditions or [self.full_rendition])
+        cursor = self.memes_collection.find(self.export_query(start, end)) \
+            .sort(self.EXPORT_SORT).batch_size(batch_size)
+        try:
+            batch = []
+            for meme in cursor:
+                batch.append(meme)
+                if len(batch) == batch_size:
+                    yield from self._export_batch(batch, renditions, include_metadata)
+                    batch = []
+            yield from self._export_batch(batch, renditions, include_metadata)
+        finally:
+            cursor.close()
+
+    def _export_batch(self, memes: List[Dict[str, Any]], renditions: List[str],
+                      include_metadata: bool) -> Iterator[ArchiveEntry]:
+        """Yield the export entries of a batch of memes with one $in query for their renditions."""
+        smaller = [rendition for rendition in renditions if rendition != self.full_rendition]
+        images = {}
+        if memes and smaller:
+            for image in self.images_collection.find(
+                    {'meme_id': {'$in': [str(meme['_id']) for meme in memes]}, 'rendition': {'$in': smaller}}):
+                images[(image['meme_id'], image['rendition'])] = image
+
+        for meme in memes:
+            meme_id = str(meme['_id'])
+            if include_metadata:
+                metadata = json.dumps({key: value for key, value in meme.items() if key != 'binary_data'},
+                                      default=_json_value, indent=2).encode()
+                yield ArchiveEntry(f'{meme_id}.json', meme.get('created_at'), len(metadata), [metadata])
+
+            for rendition in renditions:
+                document = meme if rendition == self.full_rendition else images.get((meme_id, rendition))
+                reader = self._open_document(document) if document else None
+                if reader is None:
+                    continue
+                suffix = '' if rendition == self.full_rendition else f'-{rendition}'
+                yield ArchiveEntry(f'{meme_id}{suffix}.{reader.format}', meme.get('created_at'),
+                                   reader.length, _read_and_close(reader))
+
+    def export_archive(self, archive_format: str = 'tar', start: Optional[datetime] = None,
+                       end: Optional[datetime] = None, renditions: Optional[Iterable[str]] = None,
+                       include_metadata: bool = True, batch_size: int = 100) -> Iterator[bytes]:
+        """
+        Stream an archive of the memes created in [start, end), see iter_export_entries.
+
+        The archive is written while the cursor is read, so the first bytes
+        are ready as soon as the first meme is. A tar export holds one batch
+        and one chunk whatever the size of the collection.
+
+        Args:
+            archive_format: 'tar' or 'zip'. zip keeps a few hundred bytes per entry until the archive ends
+            start: Only memes created at or after this time
+            end: Only memes created before this time
+            renditions: Names of the renditions exported per meme. Defaults to full_rendition
+            include_metadata: Whether to export the meme document as JSON
+            batch_size: Number of meme documents fetched per round-trip
+
+        Yields:
+            bytes: Consecutive pieces of the archive
+
+        Raises:
+            ValueError: If archive_format is not supported, raised before any query runs
+        """
+        writer = archive_writer(archive_format)
+        log.info(f'Exporting memes created from {start} to {end} as {archive_format}')
+        return writer(self.iter_export_entries(start, end, renditions, include_metadata, batch_size))
+
+    def migrate_inline_blobs(self, batch_size: int = 100) -> Dict[str, int]:
+        """
+        Move image bytes stored inline in documents into the blob store.
+
+        Full-size images always move. Renditions move when they are larger than
+        inline_threshold. Safe to run repeatedly and while the app is serving.
+
+        Returns:
+            dict: Number of migrated meme and image documents
+        """
+        log.info('Migrating inline meme images to the blob store')
+        migrated = {'memes': 0, 'images': 0}
+
+        for collection_name, collection, filter_ in [
+            ('memes', self.memes_collection, {'binary_data': {'$exists': True}}),
+            ('images', self.images_collection, {'binary_data': {'$exists': True},
+                                                'length': {'$not': {'$lte': self.inline_threshold}}})
+        ]:
+            cursor = collection.find(filter_, {'binary_data': 1, 'format': 1}).batch_size(batch_size)
+            for document in cursor:
+                binary = document['binary_data']
+                if collection_name == 'images' and len(binary) <= self.inline_threshold:
+                    collection.update_one({'_id': document['_id']}, {'$set': {'length': len(binary)}})
+                    continue
+
+                image_format = document.get('format', 'png')
+                blob_id = self.blob_store.put(binary, filename=f"{document['_id']}.{image_format}",
+                                              metadata={'format': image_format})
+                result = collection.update_one(
+                    {'_id': document['_id'], 'binary_data': {'$exists': True}},
+                    {'$set': {'blob_id': blob_id, 'length': len(binary), 'format': image_format,
+                              'content_hash': hashlib.sha256(binary).hexdigest()},
+                     '$unset': {'binary_data': ''}}
+                )
+                if result.modified_count:
+                    migrated[collection_name] += 1
+                else:
+                    # Migrated concurrently, drop the duplicate blob
+                    self.blob_store.delete(blob_id)
+
+        log.info(f'Migrated {migrated}')
+        return migrated
 
     def delete_meme(self, meme_id: str) -> Dict[str, str]:
         """
-        Delete a meme and its associated image.
+        Release one reference to a meme, deleting it with its images and blobs on the last one.
 
         Args:
             meme_id: ID of the meme to delete
         """
         log.info(f'Deleting meme {meme_id}')
         try:
-            # Delete meme data
-            meme_result = self.memes_collection.delete_one({'_id': ObjectId(meme_id)})
+            # Memes stored before reference counting have no ref_count and go on the first delete
+            released = self.memes_collection.find_one_and_update(
+                {'_id': ObjectId(meme_id)},
+                {'$inc': {'ref_count': -1}},
+                projection={'ref_count': 1},
+                return_document=ReturnDocument.AFTER
+            )
+            if released and released['ref_count'] > 0:
+                return {
+                    'status': 'Reference Released',
+                    'deleted_image': False
+                }
 
-            # Delete associated image if it exists
-            image_result = self.images_collection.delete_one({'meme_id': meme_id})
+            meme, deleted_images = self._delete_unreferenced(meme_id)
 
             return {
-                'status': 'Successfully Deleted' if meme_result.deleted_count > 0 else 'Meme not found',
-                'deleted_image': bool(image_result.deleted_count)
+                'status': 'Successfully Deleted' if released or meme else 'Meme not found',
+                'deleted_image': bool(deleted_images)
             }
 
         except Exception as e:
             log.error(f"Error deleting meme: {e}")
             raise
 
+    def _delete_unreferenced(self, meme_id: str) -> Tuple[Optional[Dict[str, Any]], int]:
+        """
+        Delete a meme without references with its images and blobs.
+
+        Returns:
+            tuple: The deleted meme document, or None, and the number of images deleted
+        """
+        meme = self.memes_collection.find_one_and_delete({'_id': ObjectId(meme_id), 'ref_count': {'$lte': 0}},
+                                                         projection={'blob_id': 1})
+        images = list(self.images_collection.find({'meme_id': meme_id}, {'blob_id': 1}))
+
+        # Delete associated images and renditions if they exist
+        image_result = self.images_collection.delete_many({'meme_id': meme_id})
+
+        self._delete_blobs([document.get('blob_id') for document in ([meme] if meme else []) + images])
+
+        self._notify_change(meme_id)
+        return meme, image_result.deleted_count
+
+    def delete_memes(self, meme_ids: List[str]) -> Dict[str, Any]:
+        """
+        Release one reference to each of many memes, with one write per collection.
+
+        Memes whose last reference is released are deleted with their images and blobs.
+
+        Args:
+            meme_ids: IDs of the memes to delete
+
+        Raises:
+            bson.errors.InvalidId: If an id is not a valid ObjectId
+        """
+        log.info(f'Deleting {len(meme_ids)} memes')
+        object_ids = list(dict.fromkeys(ObjectId(meme_id) for meme_id in meme_ids))
+        try:
+            update_result = self.memes_collection.update_many({'_id': {'$in': object_ids}},
+                                                              {'$inc': {'ref_count': -1}})
+
+            # A meme without references is never referenced again, so it is safe to delete its blobs
+            unreferenced = {'_id': {'$in': object_ids}, 'ref_count': {'$lte': 0}}
+            documents = list(self.memes_collection.find(unreferenced, {'blob_id': 1}))
+            meme_ids = [str(document['_id']) for document in documents]
+            documents += self.images_collection.find({'meme_id': {'$in': meme_ids}}, {'blob_id': 1})
+
+            meme_result = self.memes_collection.delete_many(unreferenced)
+            image_result = self.images_collection.delete_many({'meme_id': {'$in': meme_ids}})
+
+            self._delete_blobs([document.get('blob_id') for document in documents])
+
+            for meme_id in meme_ids:
+                self._notify_change(meme_id)
+
+            return {
+                'status': 'Successfully Deleted' if update_result.matched_count else 'Memes not found',
+                'deleted_count': meme_result.deleted_count,
+                'released_count': update_result.matched_count - len(meme_ids),
+                'deleted_images': image_result.deleted_count
+            }
+
+        except Exception as e:
+            log.error(f"Error deleting memes: {e}")
+            raise
+
+    @staticmethod
+    def expired_query(older_than: datetime) -> Dict[str, Any]:
+        """Filter on memes created and last claimed before older_than that no other save references."""
+        return {
+            'created_at': {'$lt': older_than},
+            'claimed_at': {'$not': {'$gte': older_than}},
+            'ref_count': {'$not': {'$gt': 1}}
+        }
+
+    def expire_memes(self, older_than: datetime, batch_size: int = 100) -> Dict[str, int]:
+        """
+        Delete memes created before older_than with their images and blobs.
+
+        Memes saved more than once are kept, each save holds a reference that
+        only delete_meme releases. Every meme is retired with an atomic update
+        before it is deleted, so a save racing the sweep either adds its
+        reference first and keeps the meme, or stores a fresh copy. Memes
+        handed out of the inventory count from their claim instead.
+
+        Args:
+            older_than: Memes created before this are deleted
+            batch_size: Memes looked up per round-trip
+
+        Returns:
+            dict: Number of memes expired
+        """
+        log.info(f'Expiring memes created before {older_than}')
+        query = self.expired_query(older_than)
+        expired = 0
+        while True:
+            # Memes retired by this or a concurrent sweep no longer match, so every round makes progress
+            batch = list(self.memes_collection.find(query, {'_id': 1}).sort(self.EXPORT_SORT).limit(batch_size))
+            if not batch:
+                break
+            for meme in batch:
+                retired = self.memes_collection.find_one_and_update(
+                    {'_id': meme['_id'], **query}, {'$set': {'ref_count': 0}}, projection={'_id': 1})
+                if retired:
+                    meme, _ = self._delete_unreferenced(str(meme['_id']))
+                    expired += bool(meme)
+
+        log.info(f'Expired {expired} memes')
+        return {'expired': expired}
+
+    def add_to_inventory(self, meme_id: str, meme_type: str) -> bool:
+        """
+        Put a stored meme into the ready-to-serve inventory of meme_type.
+
+        Args:
+            meme_id: ID of a meme that has not been handed out
+            meme_type: Inventory the meme joins
+
+        Returns:
+            bool: Whether the meme was found
+        """
+        result = self.memes_collection.update_one({'_id': ObjectId(meme_id)}, {'$set': {'inventory': meme_type}})
+        return bool(result.matched_count)
+
+    def claim_from_inventory(self, meme_type: str) -> Optional[str]:
+        """
+        Atomically take the oldest meme out of the inventory of meme_type.
+
+        Concurrent claims, from any process, never get the same meme.
+
+        Returns:
+            Optional[str]: The meme_id of the claimed meme, or None if the inventory is empty
+        """
+        meme = self.memes_collection.find_one_and_update(
+            {'inventory': meme_type},
+            {'$unset': {'inventory': ''}, '$set': {'claimed_at': datetime.now()}},
+            sort=self.INVENTORY_SORT,
+            projection={'_id': 1}
+        )
+        return str(meme['_id']) if meme else None
+
+    def count_inventory(self, meme_type: str) -> int:
+        """Return the number of memes ready in the inventory of meme_type."""
+        return self.memes_collection.count_documents({'inventory': meme_type})
+
+    def dedup_report(self) -> Dict[str, Any]:
+        """
+        Report how much storage content addressing saves.
+
+        Returns:
+            dict: unique_memes stored, saves referencing them, dedup_ratio (saves per
+                  stored meme), and stored_bytes and deduplicated_bytes of full-size images
+        """
+        report = next(self.memes_collection.aggregate([
+            {'$project': {
+                'length': {'$ifNull': ['$length', 0]},
+                'ref_count': {'$max': [{'$ifNull': ['$ref_count', 1]}, 1]}
+            }},
+            {'$group': {
+                '_id': None,
+                'unique_memes': {'$sum': 1},
+                'saves': {'$sum': '$ref_count'},
+                'stored_bytes': {'$sum': '$length'},
+                'deduplicated_bytes': {'$sum': {'$multiply': ['$length', {'$subtract': ['$ref_count', 1]}]}}
+            }}
+        ]), None) or {'unique_memes': 0, 'saves': 0, 'stored_bytes': 0, 'deduplicated_bytes': 0}
+
+        report.pop('_id', None)
+        report['dedup_ratio'] = round(report['saves'] / report['unique_memes'], 4) if report['unique_memes'] else 1.0
+        return report
+
     def update_meme(self, meme_id: str, update_data: Dict[str, Any]) -> Dict[str, str]:
         """
         Update meme information.
@@ -145,6 +1027,7 @@ class MongoModule:
                 {'_id': ObjectId(meme_id)},
                 {'$set': update_data}
             )
+            self._notify_change(meme_id)
 
             return {
                 'status': 'Successfully Updated' if update_result.modified_count > 0 else 'No changes made'
@@ -1,26 +1,45 @@
+import io
+import os
+import sys
+
 from flask import json
+from PIL import Image
 
-from DAL.mongo_module import MongoAPI
+from DAL.mongo_module import MongoModule
 
 if __name__ == "__main__":
     data = {
-        'database': 'posts',
-        'collection': 'users'
+        'database': sys.argv[1] if len(sys.argv) > 1 else 'meme_test'
     }
 
-    mongo_api = MongoAPI(data)
+    mongo_api = MongoModule(data, os.environ.get('MONGODB_URI', 'mongodb://localhost:5000'))
+    mongo_api.ensure_indexes()
 
-    # Insert a test document
-    test_data = {
-        'Document': {
-            'name': 'Test User',
-            'email': 'test@example.com'
-        }
-    }
-    print("\nInserting test document...")
-    mongo_api.write(test_data)
+    # Insert a test meme with a thumbnail
+    image = Image.new('RGB', (800, 600), (40, 90, 160))
+    thumbnail = image.resize((200, 150))
+    binaries = []
+    for img in (image, thumbnail):
+        buffer = io.BytesIO()
+        img.save(buffer, format='PNG')
+        binaries.append(buffer.getvalue())
+
+    print("\nInserting test meme...")
+    result = mongo_api.save_meme(binaries[0], {'thumbnail': binaries[1]}, text='Test meme')
+    print("Inserted:", result)
+    meme_id = result['meme_id']
+
+    # Read it back
+    print("\nReading the test meme...")
+    meme = mongo_api.get_meme(meme_id, include_image=True)
+    print("Found meme with", len(meme['image_data']), "thumbnail bytes")
+    print("Full image bytes:", len(mongo_api.get_meme_rendition(meme_id)['binary_data']))
+
+    # List the newest memes without their binaries
+    print("\nListing memes...")
+    page = mongo_api.list_memes(limit=5)
+    print("Memes found:", json.dumps([item['_id'] for item in page['items']], indent=4))
 
-    # Read and print all documents
-    print("\nReading all documents...")
-    result = mongo_api.read()
-    print("Documents found:", json.dumps(result, indent=4))
\ No newline at end of file
+    # Clean up
+    print("\nDeleting the test meme...")
+    print("Deleted:", mongo_api.delete_meme(meme_id))
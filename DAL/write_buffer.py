@@ -0,0 +1,153 @@
+import atexit
+import threading
+import time
+import weakref
+from concurrent.futures import Future
+from typing import Dict, List, Optional
+
+import logging as log
+
+from DAL.mongo_module import MongoModule
+
+
+class MemeWriteBuffer:
+    """
+    A write-behind buffer that groups meme saves into batched MongoModule.save_memes calls.
+
+    Each submit returns a Future resolving to the save result once the batch
+    holding it is flushed. A batch is flushed when it reaches max_batch memes
+    or its oldest meme has waited max_delay seconds. Pending memes are flushed
+    on close and at interpreter exit.
+    """
+
+    def __init__(self, mongo_module: MongoModule, max_batch=50, max_delay=0.05):
+        """
+        Initialize the MemeWriteBuffer.
+
+        Args:
+            mongo_module: The MongoModule the memes are saved through
+            max_batch (int): Number of pending memes that triggers a flush
+            max_delay (float): Seconds the oldest pending meme may wait before a flush
+        """
+        self.mongo_module = mongo_module
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+
+        self._pending = []
+        self._oldest = None
+        self._closed = False
+        self._condition = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._thread = None
+
+        buffer = weakref.ref(self)
+        atexit.register(lambda: buffer() and buffer().close())
+
+    def submit(self, image_binary: bytes, renditions: Optional[Dict[str, bytes]] = None,
+               image_format: str = 'png', text: str = '') -> Future:
+        """
+        Queue a meme for saving.
+
+        Args:
+            image_binary: Binary data of the generated meme
+            renditions: Optional smaller renditions of the meme by name
+            image_format: Encoding of image_binary and the renditions
+            text: Affirmation text of the meme, part of its content address
+
+        Returns:
+            Future: Resolves to the save result with status and meme_id, or to the save error
+
+        Raises:
+            RuntimeError: If the buffer is closed
+        """
+        future = Future()
+        meme = {'image_binary': image_binary, 'renditions': renditions, 'image_format': image_format,
+                'text': text}
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("MemeWriteBuffer is closed")
+            self._start()
+            if not self._pending:
+                self._oldest = time.monotonic()
+            self._pending.append((meme, future))
+            if len(self._pending) >= self.max_batch:
+                self._condition.notify()
+        return future
+
+    def flush(self) -> int:
+        """
+        Save every pending meme now.
+
+        Returns:
+            int: Number of memes flushed
+        """
+        with self._condition:
+            batch, self._pending, self._oldest = self._pending, [], None
+        self._save(batch)
+        return len(batch)
+
+    def close(self) -> None:
+        """
+        Stop the flush thread and save every pending meme.
+        """
+        with self._condition:
+            if self._closed:
+                return
+            self._closed = True
+            self._condition.notify()
+            thread = self._thread
+        if thread is not None:
+            thread.join()
+        self.flush()
+
+    def _start(self) -> None:
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name='meme-write-buffer', daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                while not self._closed and len(self._pending) < self.max_batch:
+                    if self._pending:
+                        remaining = self._oldest + self.max_delay - time.monotonic()
+                        if remaining <= 0:
+                            break
+                        self._condition.wait(remaining)
+                    else:
+                        self._condition.wait()
+                if self._closed:
+                    return
+                batch, self._pending, self._oldest = self._pending[:self.max_batch], \
+                    self._pending[self.max_batch:], None
+                if self._pending:
+                    self._oldest = time.monotonic()
+            self._save(batch)
+
+    def _save(self, batch: List[tuple]) -> None:
+        if not batch:
+            return
+        # Serialize flushes from close and from the thread so batches are saved in submission order
+        with self._flush_lock:
+            try:
+                results = self.mongo_module.save_memes([meme for meme, _ in batch])
+            except Exception as e:
+                log.error(f"Error flushing {len(batch)} buffered memes: {e}")
+                for _, future in batch:
+                    future.set_exception(e)
+                return
+
+        for (_, future), result in zip(batch, results):
+            if result.get('meme_id'):
+                future.set_result(result)
+            else:
+                future.set_exception(RuntimeError(result.get('error', 'Saving meme failed')))
+
+    def __len__(self) -> int:
+        """Return the number of memes waiting to be flushed."""
+        with self._condition:
+            return len(self._pending)
+
+    def __repr__(self) -> str:
+        """Return a string representation of the MemeWriteBuffer."""
+        return f"MemeWriteBuffer(max_batch={self.max_batch}, max_delay={self.max_delay}, pending={len(self)})"
@@ -0,0 +1,76 @@
+"""
+Throughput of BatchRenderModule against rendering in a single thread.
+
+Renders and encodes a batch of memes of each type, first with the same
+per-meme pipeline create_meme runs, then over process pools of increasing
+size. Pools are warmed up before timing so worker start-up is not counted.
+
+Usage:
+    python -m benchmarks.bench_batch [count]
+"""
+import os
+import sys
+import time
+
+from BL.modules import BackgroundImageModule, BatchRenderModule, EncodingModule, MemeImageModule, \
+    RenditionModule
+from benchmarks.stand_ins import LocalImageServer
+
+TEXTS = [
+    "Believe in yourself and all that you are.",
+    "Every day is a fresh start, take a deep breath and begin again.",
+    "You are stronger than you think and braver than you believe.",
+    "Small steps every day add up to big results."
+]
+MEME_TYPES = ('custom_image', 'solid_background', 'gradient')
+
+
+def process_counts():
+    counts, n = [], 1
+    while n < (os.cpu_count() or 1):
+        counts.append(n)
+        n *= 2
+    return counts + [os.cpu_count() or 1]
+
+
+def serial(texts, meme_type, image_url):
+    mem_module = MemeImageModule(background_module=BackgroundImageModule(prefetch_size=0))
+    rendition_module = RenditionModule()
+    encoding_module = EncodingModule()
+    start = time.perf_counter()
+    for text in texts:
+        meme_image = mem_module.create_meme(text, meme_type, image_url)
+        {name: encoding_module.encode(image) for name, image in rendition_module.render(meme_image).items()}
+    return time.perf_counter() - start
+
+
+def pooled(texts, meme_type, image_url, processes):
+    batch_module = BatchRenderModule(processes=processes, image_url=image_url)
+    try:
+        batch_module.render(texts[:processes] * 2, meme_type)
+        start = time.perf_counter()
+        results = batch_module.render(texts, meme_type)
+        elapsed = time.perf_counter() - start
+    finally:
+        batch_module.close()
+    assert len(results) == len(texts) and all(results)
+    return elapsed
+
+
+def main(count=48):
+    texts = [TEXTS[i % len(TEXTS)] for i in range(count)]
+    print(f"{count} memes per run, {os.cpu_count()} CPUs")
+    print(f"{'meme type':<18}{'mode':<12}{'seconds':>10}{'memes/s':>10}{'speedup':>10}")
+
+    with LocalImageServer() as server:
+        for meme_type in MEME_TYPES:
+            baseline = serial(texts, meme_type, server.url)
+            print(f"{meme_type:<18}{'serial':<12}{baseline:>10.2f}{count / baseline:>10.1f}{1.0:>10.2f}")
+            for processes in process_counts():
+                elapsed = pooled(texts, meme_type, server.url, processes)
+                print(f"{meme_type:<18}{f'{processes} procs':<12}{elapsed:>10.2f}"
+                      f"{count / elapsed:>10.1f}{baseline / elapsed:>10.2f}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 48)
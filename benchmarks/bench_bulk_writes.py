@@ -0,0 +1,94 @@
+"""
+Round-trips and wall time of saving and deleting memes one by one, with
+save_memes/delete_memes, and through the MemeWriteBuffer.
+
+Also checks that the write buffer loses nothing on shutdown: memes still
+pending when close() is called must all be in the database afterwards.
+Runs against a scratch database that is dropped at the end.
+
+Usage:
+    MONGODB_URI=mongodb://localhost:27017 python -m benchmarks.bench_bulk_writes [count]
+"""
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from DAL.blob_store import LocalBlobStore
+from DAL.client_registry import MongoClientRegistry
+from DAL.command_monitor import CommandCounter
+from DAL.mongo_module import MongoModule
+from DAL.write_buffer import MemeWriteBuffer
+
+DATABASE = 'meme_bench_bulk_writes'
+
+
+def fake_meme(index):
+    return {
+        'image_binary': b'full-%d' % index * 64,
+        'renditions': {'medium': b'medium-%d' % index * 16, 'thumbnail': b'thumb-%d' % index * 4}
+    }
+
+
+def report(name, counter, elapsed, count):
+    print(f"{name:<28}{elapsed * 1000:>10.1f}{counter.total:>12}{counter.total / count:>14.2f}")
+    counter.reset()
+
+
+def main(count=500):
+    counter = CommandCounter()
+    mongo_module = MongoModule({'database': DATABASE}, os.environ.get('MONGODB_URI', 'mongodb://localhost:5000'),
+                               registry=MongoClientRegistry(), client_options={'event_listeners': [counter]},
+                               blob_store=LocalBlobStore(tempfile.mkdtemp()))
+    memes = [fake_meme(index) for index in range(count)]
+    mongo_module.client.drop_database(DATABASE)
+    counter.reset()
+
+    print(f"{count} memes")
+    print(f"{'operation':<28}{'ms':>10}{'commands':>12}{'per meme':>14}")
+    try:
+        start = time.perf_counter()
+        ids = [mongo_module.save_meme(meme['image_binary'], meme['renditions'])['meme_id'] for meme in memes]
+        report('save_meme loop', counter, time.perf_counter() - start, count)
+
+        start = time.perf_counter()
+        for meme_id in ids:
+            mongo_module.delete_meme(meme_id)
+        report('delete_meme loop', counter, time.perf_counter() - start, count)
+
+        start = time.perf_counter()
+        ids = [result['meme_id'] for result in mongo_module.save_memes(memes)]
+        report('save_memes', counter, time.perf_counter() - start, count)
+
+        start = time.perf_counter()
+        mongo_module.delete_memes(ids)
+        report('delete_memes', counter, time.perf_counter() - start, count)
+
+        # Concurrent callers, as request handlers and job workers would be
+        write_buffer = MemeWriteBuffer(mongo_module)
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=16) as pool:
+            futures = list(pool.map(lambda meme: write_buffer.submit(meme['image_binary'], meme['renditions']),
+                                    memes))
+            ids = [future.result()['meme_id'] for future in futures]
+        report('MemeWriteBuffer', counter, time.perf_counter() - start, count)
+        write_buffer.close()
+        mongo_module.delete_memes(ids)
+
+        # Durability on shutdown: nothing may be flushed yet when close() is called
+        write_buffer = MemeWriteBuffer(mongo_module, max_batch=count + 1, max_delay=3600)
+        futures = [write_buffer.submit(meme['image_binary'], meme['renditions']) for meme in memes]
+        assert len(write_buffer) == count
+        write_buffer.close()
+        ids = [future.result(timeout=0)['meme_id'] for future in futures]
+        saved = mongo_module.memes_collection.count_documents({})
+        images = mongo_module.images_collection.count_documents({})
+        assert saved == count and images == 2 * count, (saved, images)
+        print(f"close() flushed all {saved} pending memes")
+    finally:
+        mongo_module.client.drop_database(DATABASE)
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 500)
@@ -0,0 +1,221 @@
+"""
+Concurrency benchmark of the threaded Flask app against the asyncio ASGI app.
+
+Serves each app in its own process on local stand-ins: a fake Gemini model
+with a fixed latency, a local HTTP image server and mongomock (or the
+MongoDB at MONGODB_URI). Then drives /api/meme with increasing numbers of
+requests in flight. For each level it reports throughput, latency
+percentiles, errors and the server's thread count. For each app it reports
+the highest level sustained: no errors and a p95 latency within --slo-ms.
+
+The affirmation pool is bypassed, so every request waits on Gemini like a
+request arriving while the pool is dry.
+
+Requires httpx and hypercorn, and mongomock and mongomock-motor without MONGODB_URI.
+
+Usage:
+    python -m benchmarks.bench_concurrency [--levels 1,4,16,64] [--requests 32]
+                                           [--gemini-latency 0.5] [--slo-ms 5000]
+                                           [--apps flask,asgi] [--output results.json]
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from typing import Dict, List, Optional
+
+import httpx
+
+from benchmarks.stand_ins import FakeGeminiModel, LocalImageServer, offline_sentiment, use_mongo_stand_ins
+
+APPS = ('flask', 'asgi')
+
+
+def serve(app_name: str, port: int, gemini_latency: float) -> None:
+    """Serve one of the apps on the stand-ins until killed."""
+    use_mongo_stand_ins()
+    from BL import routes
+
+    routes.gemini_module.model = FakeGeminiModel(latency=gemini_latency)
+    offline_sentiment(routes.sentiment_module)
+    # Every request waits on Gemini, as when the pool runs dry
+    routes.affirmation_pool.get_affirmation = lambda timeout=0.0: None
+    # DAL modules log every call at INFO
+    logging.getLogger().setLevel(logging.WARNING)
+    logging.getLogger('werkzeug').setLevel(logging.WARNING)
+
+    if app_name == 'flask':
+        from werkzeug.serving import make_server
+        make_server('127.0.0.1', port, routes.app, threaded=True).serve_forever()
+    else:
+        from hypercorn.asyncio import serve as serve_asgi
+        from hypercorn.config import Config
+        from BL import async_routes
+
+        config = Config()
+        config.bind = [f'127.0.0.1:{port}']
+        config.backlog = 1024
+        asyncio.run(serve_asgi(async_routes.app, config))
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def _thread_count(pid: int) -> Optional[int]:
+    try:
+        with open(f'/proc/{pid}/status') as f:
+            return next(int(line.split()[1]) for line in f if line.startswith('Threads:'))
+    except (OSError, StopIteration):
+        return None
+
+
+async def _wait_ready(base_url: str, timeout: float = 120.0) -> None:
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient(base_url=base_url) as client:
+        while time.monotonic() < deadline:
+            try:
+                if (await client.get('/ready')).status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.5)
+    raise RuntimeError(f'{base_url} did not become ready within {timeout}s')
+
+
+async def run_level(base_url: str, concurrency: int, total: int, pid: int) -> Dict[str, float]:
+    """
+    Send total GET /api/meme requests keeping concurrency of them in flight.
+    """
+    latencies = []
+    errors = 0
+    peak_threads = 0
+    remaining = iter(range(total))
+
+    async def worker(client):
+        nonlocal errors
+        for _ in remaining:
+            start = time.perf_counter()
+            try:
+                response = await client.get('/api/meme')
+                ok = response.status_code == 200
+            except httpx.HTTPError:
+                ok = False
+            latencies.append((time.perf_counter() - start) * 1000)
+            errors += not ok
+
+    async def sample_threads():
+        nonlocal peak_threads
+        while True:
+            peak_threads = max(peak_threads, _thread_count(pid) or 0)
+            await asyncio.sleep(0.1)
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=120.0) as client:
+        sampler = asyncio.create_task(sample_threads())
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+        sampler.cancel()
+
+    latencies.sort()
+    return {
+        'concurrency': concurrency,
+        'requests': total,
+        'errors': errors,
+        'throughput_rps': round(total / elapsed, 2),
+        'p50_ms': round(statistics.median(latencies), 1),
+        'p95_ms': round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))], 1),
+        'max_ms': round(latencies[-1], 1),
+        'peak_threads': peak_threads or None
+    }
+
+
+async def bench_app(app_name: str, levels: List[int], requests: int, gemini_latency: float,
+                    image_url: str) -> List[Dict[str, float]]:
+    port = _free_port()
+    env = {**os.environ, 'MEME_IMAGE_URL': image_url}
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'benchmarks.bench_concurrency', '--serve', app_name, '--port', str(port),
+         '--gemini-latency', str(gemini_latency)],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    base_url = f'http://127.0.0.1:{port}'
+    try:
+        await _wait_ready(base_url)
+        # Warm caches and connection pools before timing
+        await run_level(base_url, 2, 4, server.pid)
+
+        results = []
+        for concurrency in levels:
+            result = await run_level(base_url, concurrency, max(requests, concurrency * 2), server.pid)
+            results.append(result)
+            print(f"{app_name:<7}{concurrency:>8}{result['throughput_rps']:>10.2f}{result['p50_ms']:>11.1f}"
+                  f"{result['p95_ms']:>11.1f}{result['errors']:>8}{result['peak_threads'] or '-':>9}")
+        return results
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def sustained(results: List[Dict[str, float]], slo_ms: float) -> int:
+    """Return the highest concurrency served without errors and with p95 within slo_ms, 0 if none."""
+    return max((result['concurrency'] for result in results
+                if not result['errors'] and result['p95_ms'] <= slo_ms), default=0)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--levels', default='1,4,16,64', help='comma-separated numbers of requests in flight')
+    parser.add_argument('--requests', type=int, default=32,
+                        help='requests per level, at least twice the level')
+    parser.add_argument('--gemini-latency', type=float, default=0.5, help='seconds each Gemini call takes')
+    parser.add_argument('--slo-ms', type=float, default=5000, help='p95 latency a level must stay within')
+    parser.add_argument('--apps', default=','.join(APPS), help='apps to benchmark')
+    parser.add_argument('--output', help='write the results as JSON to this file')
+    parser.add_argument('--serve', choices=APPS, help=argparse.SUPPRESS)
+    parser.add_argument('--port', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.serve:
+        serve(args.serve, args.port, args.gemini_latency)
+        return 0
+
+    # Fail here rather than with servers that never become ready
+    from BL.modules import SentimentModule
+    offline_sentiment(SentimentModule())
+
+    levels = [int(level) for level in args.levels.split(',')]
+    report = {'meta': {'cpu_count': os.cpu_count(), 'gemini_latency': args.gemini_latency,
+                       'mongo': 'server' if os.environ.get('MONGODB_URI') else 'mongomock',
+                       'slo_ms': args.slo_ms},
+              'apps': {}}
+
+    print(f"{'app':<7}{'in flight':>8}{'req/s':>10}{'p50 ms':>11}{'p95 ms':>11}{'errors':>8}{'threads':>9}")
+    with LocalImageServer(size=(800, 600)) as image_server:
+        for app_name in args.apps.split(','):
+            results = asyncio.run(bench_app(app_name, levels, args.requests, args.gemini_latency,
+                                            image_server.url))
+            report['apps'][app_name] = {'levels': results, 'sustained': sustained(results, args.slo_ms)}
+
+    print()
+    for app_name, result in report['apps'].items():
+        print(f"{app_name}: sustains {result['sustained']} requests in flight "
+              f"(no errors, p95 within {args.slo_ms:.0f} ms)")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
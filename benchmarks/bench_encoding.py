@@ -0,0 +1,37 @@
+"""
+Bytes-on-wire and encode time of each output format for the three meme types.
+
+Usage:
+    python -m benchmarks.bench_encoding
+"""
+import time
+
+from BL.modules import BackgroundImageModule, EncodingModule, MemeImageModule
+from benchmarks.stand_ins import LocalImageServer
+
+TEXT = "Believe in yourself and all that you are."
+
+
+def main(repeat=10):
+    encoding_module = EncodingModule()
+
+    with LocalImageServer() as server:
+        mem_module = MemeImageModule(background_module=BackgroundImageModule(prefetch_size=0))
+        memes = {
+            'custom_image': mem_module.create_meme_with_downloaded_image(TEXT, server.url),
+            'solid_background': mem_module.create_meme_with_solid_background(TEXT),
+            'gradient': mem_module.create_meme_with_gradient(TEXT)
+        }
+
+    print(f"{'meme type':<18}{'format':<8}{'bytes':>10}{'encode ms':>12}")
+    for meme_type, image in memes.items():
+        for fmt in ('png', 'jpeg', 'webp'):
+            start = time.perf_counter()
+            for _ in range(repeat):
+                encoded = encoding_module.encode(image, fmt)
+            elapsed = (time.perf_counter() - start) / repeat
+            print(f"{meme_type:<18}{fmt:<8}{len(encoded):>10,}{elapsed * 1000:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
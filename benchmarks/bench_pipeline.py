@@ -0,0 +1,250 @@
+"""
+Offline benchmark suite for the create_meme pipeline.
+
+Times every stage of create_meme on its own and routes.create_meme end to
+end for each meme type, using local stand-ins only: a fake Gemini model, a
+local HTTP image server and mongomock (or the MongoDB at MONGODB_URI). The
+affirmation pool and background prefetching are bypassed, so every meme
+pays for a Gemini call and a download. The VADER lexicon must be installed,
+it is never downloaded.
+
+Results are printed as a table and can be written as JSON. Given a baseline
+file, each stage's median is compared against it and the run exits with
+status 1 if any stage got slower than the tolerance allows.
+
+Usage:
+    python -m benchmarks.bench_pipeline [--iterations N] [--stage PREFIX]
+                                        [--output results.json]
+                                        [--baseline benchmarks/baseline.json] [--save-baseline]
+                                        [--tolerance 0.25]
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+from typing import Callable, Dict, List, Optional
+
+from PIL import Image
+
+from benchmarks.stand_ins import AFFIRMATIONS, FakeGeminiModel, LocalImageServer, offline_sentiment, \
+    use_mongo_stand_ins
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), 'baseline.json')
+MEME_TYPES = ('custom_image', 'solid_background', 'gradient')
+# Differences below this many milliseconds are noise, whatever the relative change
+MIN_DELTA_MS = 0.5
+
+
+class Pipeline:
+    """
+    The app's modules and routes.create_meme, wired to the local stand-ins.
+    """
+
+    def __init__(self, image_url: str):
+        use_mongo_stand_ins()
+        from BL import routes
+
+        # DAL modules log every call at INFO, which would end up in the timings
+        logging.getLogger().setLevel(logging.WARNING)
+        routes.gemini_module.model = FakeGeminiModel()
+        offline_sentiment(routes.sentiment_module)
+        # Every meme asks Gemini and filters its answer, as when the affirmation pool runs dry
+        routes.affirmation_pool.get_affirmation = lambda timeout=0.0: None
+        # Every custom_image meme downloads its background, as when no prefetched one is ready
+        routes.background_module.prefetch_size = 0
+        routes.image_path = image_url
+
+        self.routes = routes
+        self.image_url = image_url
+        self.gemini_module = routes.gemini_module
+        self.sentiment_module = routes.sentiment_module
+        self.background_module = routes.background_module
+        self.mem_module = routes.mem_module
+        self.rendition_module = routes.rendition_module
+        self.encoding_module = routes.encoding_module
+        self.mongo_module = routes.mongo_module
+        self.mongo_module.ensure_indexes()
+
+    def create_meme(self, meme_type: str) -> dict:
+        return self.routes.create_meme(meme_type)
+
+
+def measure(fn: Callable[[], object], iterations: int, warmup: int = 2,
+            setup: Optional[Callable[[], None]] = None) -> Dict[str, float]:
+    """
+    Time fn over iterations runs after warmup runs. setup, if given, runs untimed before each run.
+    """
+    for _ in range(warmup):
+        if setup:
+            setup()
+        fn()
+
+    samples = []
+    for _ in range(iterations):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+
+    samples.sort()
+    return {
+        'median_ms': round(statistics.median(samples), 4),
+        'p95_ms': round(samples[min(len(samples) - 1, int(len(samples) * 0.95))], 4),
+        'mean_ms': round(statistics.fmean(samples), 4),
+        'min_ms': round(samples[0], 4),
+        'iterations': iterations
+    }
+
+
+def define_stages(pipeline: Pipeline) -> Dict[str, dict]:
+    """
+    Return the stages to time by name, as keyword arguments of measure.
+    """
+    # Random background colors change how well images compress, fix them across runs
+    random.seed(0)
+    mem_module = pipeline.mem_module
+    image_size = mem_module.image_size
+    texts = iter(range(1 << 62))
+
+    def next_text():
+        return AFFIRMATIONS[next(texts) % len(AFFIRMATIONS)]
+
+    backgrounds = {
+        'custom_image': lambda: pipeline.background_module.get_background(pipeline.image_url, image_size),
+        'solid_background': lambda: Image.new('RGB', image_size, (40, 90, 160)),
+        'gradient': lambda: mem_module.create_gradient_background()
+    }
+    memes = {meme_type: mem_module.create_meme(AFFIRMATIONS[0], meme_type, pipeline.image_url)
+             for meme_type in MEME_TYPES}
+
+    max_width = int(image_size[0] * 0.7)
+    max_height = image_size[1] * 0.9
+    layout = mem_module.text_layout_module.layout(AFFIRMATIONS[1], max_width, max_height)
+    draw_target = backgrounds['gradient']()
+
+    # Seed the database so listings and reads see a realistic page
+    saved = [pipeline.create_meme(MEME_TYPES[index % len(MEME_TYPES)]) for index in range(60)]
+    meme_id = saved[-1]['meme_id']
+    full = pipeline.encoding_module.encode(memes['gradient'])
+    save_counter = iter(range(1 << 62))
+
+    stages = {
+        'affirmation.fetch': {'fn': pipeline.gemini_module.get_affirmation_text},
+        'sentiment.filter': {
+            'fn': lambda: pipeline.sentiment_module.is_positive(next_text()),
+            # Score every text from scratch rather than from the memo
+            'setup': pipeline.sentiment_module.cache.clear
+        },
+        'background.download': {'fn': lambda: pipeline.background_module.fetch(pipeline.image_url, image_size)},
+        'text.wrap': {'fn': lambda: mem_module.text_layout_module.layout(next_text(), max_width, max_height)},
+        'text.draw': {'fn': lambda: mem_module.text_overlay_module.render(layout, mem_module.text_color)
+                      .composite(draw_target)},
+        'renditions': {'fn': lambda: pipeline.rendition_module.render(memes['gradient'])},
+        'mongo.save': {'fn': lambda: pipeline.mongo_module.save_meme(
+            full, image_format='png', text=f'bench {next(save_counter)}')},
+        'mongo.get': {'fn': lambda: pipeline.mongo_module.get_meme_rendition(meme_id)},
+        'mongo.get_thumbnail': {'fn': lambda: pipeline.mongo_module.get_meme_rendition(meme_id, 'thumbnail')},
+        'mongo.list': {'fn': lambda: pipeline.mongo_module.list_memes(limit=50)}
+    }
+    for meme_type in MEME_TYPES:
+        stages[f'background.{meme_type}'] = {'fn': backgrounds[meme_type]}
+        stages[f'encode.png.{meme_type}'] = {
+            'fn': lambda image=memes[meme_type]: pipeline.encoding_module.encode(image, 'png')}
+        stages[f'create_meme.{meme_type}'] = {'fn': lambda meme_type=meme_type: pipeline.create_meme(meme_type)}
+    return dict(sorted(stages.items()))
+
+
+def compare(results: Dict[str, dict], baseline: Dict[str, dict], tolerance: float) -> List[str]:
+    """
+    Print each stage against the baseline and return the stages that regressed.
+    """
+    regressions = []
+    print(f"\n{'stage':<32}{'baseline ms':>14}{'median ms':>12}{'change':>10}")
+    for name, result in results.items():
+        reference = baseline.get(name)
+        if reference is None:
+            print(f"{name:<32}{'-':>14}{result['median_ms']:>12.3f}{'new':>10}")
+            continue
+        before, after = reference['median_ms'], result['median_ms']
+        change = (after - before) / before if before else 0.0
+        regressed = after > before * (1 + tolerance) and after - before > MIN_DELTA_MS
+        marker = '  REGRESSION' if regressed else ''
+        print(f"{name:<32}{before:>14.3f}{after:>12.3f}{change:>+10.1%}{marker}")
+        if regressed:
+            regressions.append(name)
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--iterations', type=int, default=20, help='timed runs per stage')
+    parser.add_argument('--stage', action='append', default=[], help='only run stages starting with this prefix')
+    parser.add_argument('--output', help='write the results as JSON to this file')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help='baseline JSON to compare against')
+    parser.add_argument('--save-baseline', action='store_true', help='store the results as the new baseline')
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help='allowed relative slowdown of a stage median before it counts as a regression')
+    args = parser.parse_args(argv)
+
+    with LocalImageServer(size=(800, 600)) as server:
+        pipeline = Pipeline(server.url)
+        stages = define_stages(pipeline)
+        if args.stage:
+            stages = {name: stage for name, stage in stages.items()
+                      if any(name.startswith(prefix) for prefix in args.stage)}
+
+        print(f"{'stage':<32}{'median ms':>12}{'p95 ms':>12}{'min ms':>12}")
+        results = {}
+        for name, stage in stages.items():
+            results[name] = measure(iterations=args.iterations, **stage)
+            print(f"{name:<32}{results[name]['median_ms']:>12.3f}{results[name]['p95_ms']:>12.3f}"
+                  f"{results[name]['min_ms']:>12.3f}")
+
+    report = {
+        'meta': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'mongo': 'server' if os.environ.get('MONGODB_URI') else 'mongomock',
+            'iterations': args.iterations,
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z')
+        },
+        'stages': results
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    if args.save_baseline:
+        # Keep the baseline of stages that were not run this time
+        if os.path.exists(args.baseline):
+            with open(args.baseline) as f:
+                report['stages'] = {**json.load(f)['stages'], **results}
+        with open(args.baseline, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nSaved baseline to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"\nNo baseline at {args.baseline}, run with --save-baseline to create one")
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    regressions = compare(results, baseline['stages'], args.tolerance)
+    if regressions:
+        print(f"\nFAILED: {len(regressions)} stages regressed by more than {args.tolerance:.0%}: "
+              f"{', '.join(regressions)}")
+        return 1
+    print("\nNo regressions")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,80 @@
+"""
+Microbenchmark for text wrapping and font fitting.
+
+Compares the original prefix-measuring wrap with TextLayoutModule on a short
+affirmation and a long paragraph, cold (empty advance cache) and warm.
+
+Usage:
+    python -m benchmarks.bench_text_layout
+"""
+import time
+
+from BL.modules.text_layout_module import TextLayoutModule
+
+SHORT_TEXT = "Believe in yourself and all that you are."
+LONG_TEXT = " ".join([
+    "Every small step you take today builds the strength you will rely on tomorrow,",
+    "so keep moving forward with patience, courage and kindness toward yourself,",
+    "because progress is not measured by speed but by the persistence to continue",
+    "even when the path is unclear and the finish line is still out of sight.",
+] * 3)
+
+
+def legacy_wrap(font, text, max_width):
+    """The original wrap from MemeImageModule, measuring every prefix."""
+    words = text.split()
+    lines = []
+    current_line = []
+
+    for word in words:
+        current_line.append(word)
+        line = ' '.join(current_line)
+        bbox = font.getbbox(line)
+        if bbox[2] > max_width:
+            if len(current_line) == 1:
+                lines.append(line)
+                current_line = []
+            else:
+                current_line.pop()
+                lines.append(' '.join(current_line))
+                current_line = [word]
+
+    if current_line:
+        lines.append(' '.join(current_line))
+
+    return lines
+
+
+def _per_call(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat
+
+
+def main(max_width=560, max_height=540, repeat=200):
+    engine = TextLayoutModule(min_font_size=20, max_font_size=50)
+    font = engine.get_font(50)
+
+    for label, text in [('short', SHORT_TEXT), ('long', LONG_TEXT)]:
+        legacy = _per_call(lambda: legacy_wrap(font, text, max_width), repeat)
+
+        cold_engine = TextLayoutModule(min_font_size=20, max_font_size=50)
+        start = time.perf_counter()
+        cold_engine.wrap(text, max_width, 50)
+        cold = time.perf_counter() - start
+
+        warm = _per_call(lambda: engine.wrap(text, max_width, 50), repeat)
+        fitted = _per_call(lambda: engine.layout(text, max_width, max_height), repeat)
+        layout = engine.layout(text, max_width, max_height)
+
+        print(f"{label} ({len(text.split())} words)")
+        print(f"  legacy wrap:      {legacy * 1e6:9.1f} us")
+        print(f"  engine wrap cold: {cold * 1e6:9.1f} us")
+        print(f"  engine wrap warm: {warm * 1e6:9.1f} us  ({legacy / warm:,.1f}x)")
+        print(f"  fitted layout:    {fitted * 1e6:9.1f} us  -> size {layout.font_size}, "
+              f"{len(layout.lines)} lines")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+"""
+Checks that exporting memes as a tar archive runs in flat memory.
+
+Seeds a scratch database with synthetic memes of incompressible bytes, then
+streams the whole collection through the export writers of each format. The
+pieces are thrown away as they arrive, like a client receiving them would.
+tracemalloc samples the memory held by the export as entries are written,
+from a tenth of the archive, once the cursor and the writer are set up, to
+the last entry. The growth between the two, per entry written, must stay
+under MAX_BYTES_PER_ENTRY for tar, which holds nothing per entry. zip keeps
+a ZipInfo of every entry for the central directory at the end of the
+archive, so its growth per entry is reported, not checked. A date-filtered
+export is then written to disk and opened with zipfile and tarfile to check
+its entries.
+
+Runs on mongomock without MONGODB_URI. The scratch database is dropped at
+the end.
+
+Usage:
+    [MONGODB_URI=mongodb://localhost:27017] python -m benchmarks.check_export_memory [--memes 5000]
+                                                                                    [--image-kb 32]
+"""
+import argparse
+import logging
+import os
+import sys
+import tarfile
+import tempfile
+import time
+import tracemalloc
+import zipfile
+from typing import Dict
+
+from DAL.archive import ARCHIVE_FORMATS, archive_writer
+from DAL.blob_store import LocalBlobStore
+from DAL.client_registry import MongoClientRegistry
+from DAL.mongo_module import MongoModule
+
+DATABASE = 'meme_check_export_memory'
+# Formats whose memory must not grow with the number of entries
+FLAT_FORMATS = ('tar',)
+# Memory a flat export may gain per entry written, well below the few hundred bytes of a zip entry
+MAX_BYTES_PER_ENTRY = 16
+
+
+def _registry() -> MongoClientRegistry:
+    if os.environ.get('MONGODB_URI'):
+        return MongoClientRegistry()
+    import mongomock
+    client = mongomock.MongoClient()
+    return MongoClientRegistry(client_factory=lambda connection_string, **options: client)
+
+
+def seed(mongo_module: MongoModule, count: int, image_size: int, batch_size: int = 500) -> None:
+    """Save count memes of image_size random bytes with a small thumbnail each."""
+    for offset in range(0, count, batch_size):
+        mongo_module.save_memes([{'image_binary': os.urandom(image_size),
+                                  'renditions': {'thumbnail': os.urandom(1024)}}
+                                 for _ in range(min(batch_size, count - offset))])
+
+
+def measure(mongo_module: MongoModule, archive_format: str, samples: int = 50) -> Dict[str, float]:
+    """
+    Stream a full export, sampling the traced memory every few entries.
+
+    The baseline is taken once a tenth of the entries are written, after the
+    cursor, its first batch and the archive writer are set up. The last
+    sample is taken at the last entry, before the writer finishes the archive.
+    """
+    total = 2 * mongo_module.memes_collection.count_documents(mongo_module.export_query())
+    step = max(total // samples, 1)
+    memory = []
+
+    def sampled(entries):
+        for count, entry in enumerate(entries, 1):
+            if count % step == 0 or count == total:
+                memory.append((count, tracemalloc.get_traced_memory()[0]))
+            yield entry
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    written = 0
+    entries = mongo_module.iter_export_entries(renditions=('full', 'thumbnail'), include_metadata=False)
+    for piece in archive_writer(archive_format)(sampled(entries)):
+        written += len(piece)
+    elapsed = time.perf_counter() - start
+    tracemalloc.stop()
+
+    baseline_entries, baseline = next(sample for sample in memory if sample[0] >= total // 10)
+    last_entries, last = memory[-1]
+    return {
+        'entries': last_entries,
+        'archive_mib': written / 1024 / 1024,
+        'seconds': elapsed,
+        'baseline_kib': baseline / 1024,
+        'growth_kib': (last - baseline) / 1024,
+        'bytes_per_entry': (last - baseline) / max(last_entries - baseline_entries, 1)
+    }
+
+
+def check_date_filter(mongo_module: MongoModule, directory: str) -> None:
+    """Export the middle half of the memes by creation time and compare the entries with the database."""
+    created = sorted(meme['created_at'] for meme in mongo_module.memes_collection.find({}, {'created_at': 1}))
+    start, end = created[len(created) // 4], created[3 * len(created) // 4]
+    expected = mongo_module.memes_collection.count_documents(mongo_module.export_query(start, end))
+
+    for archive_format in ARCHIVE_FORMATS:
+        path = os.path.join(directory, f'export.{archive_format}')
+        with open(path, 'wb') as f:
+            for piece in mongo_module.export_archive(archive_format, start=start, end=end,
+                                                     renditions=('full', 'thumbnail')):
+                f.write(piece)
+
+        if archive_format == 'zip':
+            with zipfile.ZipFile(path) as archive:
+                assert archive.testzip() is None, f'{path} has a corrupt entry'
+                names = archive.namelist()
+        else:
+            with tarfile.open(path) as archive:
+                names = archive.getnames()
+
+        counts = {suffix: sum(name.endswith(suffix) for name in names)
+                  for suffix in ('.json', '-thumbnail.png')}
+        images = len(names) - sum(counts.values())
+        assert counts['.json'] == counts['-thumbnail.png'] == images == expected, (archive_format, counts, images,
+                                                                                  expected)
+        print(f"{archive_format}: {expected} memes from {start} to {end}, {len(names)} valid entries")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--memes', type=int, default=5000, help='memes in the synthetic collection')
+    parser.add_argument('--image-kb', type=int, default=32, help='size of each full image in KiB')
+    args = parser.parse_args(argv)
+
+    # DAL modules log every call at INFO
+    logging.getLogger().setLevel(logging.WARNING)
+    directory = tempfile.mkdtemp(prefix='meme-export-')
+    mongo_module = MongoModule({'database': DATABASE}, os.environ.get('MONGODB_URI', 'mongodb://localhost:5000'),
+                               registry=_registry(), blob_store=LocalBlobStore(os.path.join(directory, 'blobs')))
+    mongo_module.client.drop_database(DATABASE)
+
+    failures = []
+    try:
+        seed(mongo_module, args.memes, args.image_kb * 1024)
+        print(f"{args.memes} memes of {args.image_kb} KiB, {2 * args.memes} entries per archive")
+        print(f"{'format':<8}{'MiB':>9}{'s':>8}{'baseline KiB':>14}{'growth KiB':>12}{'B/entry':>9}")
+        for archive_format in ARCHIVE_FORMATS:
+            result = measure(mongo_module, archive_format)
+            print(f"{archive_format:<8}{result['archive_mib']:>9.1f}{result['seconds']:>8.1f}"
+                  f"{result['baseline_kib']:>14.1f}{result['growth_kib']:>12.1f}{result['bytes_per_entry']:>9.1f}")
+
+            if archive_format in FLAT_FORMATS and result['bytes_per_entry'] > MAX_BYTES_PER_ENTRY:
+                failures.append(f"{archive_format} export grew by {result['bytes_per_entry']:.0f} B per entry, "
+                                f"allowed {MAX_BYTES_PER_ENTRY} B")
+
+        check_date_filter(mongo_module, directory)
+    finally:
+        mongo_module.client.drop_database(DATABASE)
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    if not failures:
+        print(f"{', '.join(FLAT_FORMATS)} export memory is flat")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,77 @@
+"""
+Import-time check for the BL.routes application.
+
+Imports BL.routes in a fresh interpreter with -X importtime, prints the
+slowest modules and exits with status 1 if the import took longer than the
+budget or pulled in a dependency that should only load on first use.
+
+Usage:
+    python -m benchmarks.check_import_time [--budget 1.5] [--top 15]
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+from typing import List, Tuple
+
+# Heavy dependencies loaded lazily: matplotlib by display_meme, the others by warm-up
+LAZY_MODULES = ('matplotlib', 'google.generativeai', 'nltk')
+
+_PROBE = (
+    "import sys\n"
+    "import BL.routes\n"
+    f"print('EAGER', *[name for name in {LAZY_MODULES!r} if name in sys.modules])\n"
+)
+
+
+def parse_importtime(stderr: str) -> List[Tuple[int, str]]:
+    """
+    Return the (cumulative microseconds, module) pairs of -X importtime output, slowest first.
+    """
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        modules.append((int(cumulative), name.rstrip()))
+    return sorted(modules, reverse=True)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--budget', type=float, default=1.5, help='allowed wall time of the import in seconds')
+    parser.add_argument('--top', type=int, default=15, help='number of slowest modules to print')
+    args = parser.parse_args(argv)
+
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', _PROBE], cwd=root,
+                            capture_output=True, text=True)
+    elapsed = time.perf_counter() - start
+    if result.returncode != 0:
+        print(result.stderr[-2000:])
+        print("FAILED: importing BL.routes raised")
+        return 1
+
+    print(f"{'cumulative ms':>14}  module")
+    for cumulative, name in parse_importtime(result.stderr)[:args.top]:
+        print(f"{cumulative / 1000:>14.1f}  {name}")
+
+    failures = []
+    eager = [line for line in result.stdout.splitlines() if line.startswith('EAGER')][-1].split()[1:]
+    if eager:
+        failures.append(f"imported at startup: {', '.join(eager)}")
+    if elapsed > args.budget:
+        failures.append(f"took {elapsed:.2f}s, budget {args.budget:.2f}s")
+
+    print(f"\nImport of BL.routes took {elapsed:.2f}s (interpreter start included)")
+    if failures:
+        print("FAILED: " + '; '.join(failures))
+        return 1
+    print("OK")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,141 @@
+"""
+Memory per gunicorn worker with and without preloading the app in the master.
+
+Starts gunicorn with gunicorn.conf.py, waits for the workers to finish their
+warm-up, sends a few requests to each and reads /proc/<pid>/smaps_rollup of
+the master and every worker. RSS counts shared pages in full for every
+process. PSS splits them between the processes sharing them, so the sum of
+PSS is the real footprint and the difference between RSS and PSS is what
+copy-on-write sharing saves. Linux only.
+
+Usage:
+    python -m benchmarks.measure_worker_rss [--workers 4] [--mode preload|no-preload|both]
+                                            [--settle 15] [--output results.json]
+"""
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+from typing import Dict, List
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIELDS = ('Rss', 'Pss', 'Shared_Clean', 'Shared_Dirty', 'Private_Clean', 'Private_Dirty')
+
+
+def memory_kb(pid: int) -> Dict[str, int]:
+    """Return the FIELDS of /proc/<pid>/smaps_rollup in kB."""
+    values = {}
+    with open(f'/proc/{pid}/smaps_rollup') as f:
+        for line in f:
+            name, _, rest = line.partition(':')
+            if name in FIELDS:
+                values[name] = int(rest.split()[0])
+    return values
+
+
+def child_pids(pid: int) -> List[int]:
+    with open(f'/proc/{pid}/task/{pid}/children') as f:
+        return [int(child) for child in f.read().split()]
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def _get(url: str) -> int:
+    try:
+        with urllib.request.urlopen(url, timeout=30) as response:
+            return response.status
+    except urllib.error.HTTPError as e:
+        return e.code
+    except OSError:
+        return 0
+
+
+def measure(workers: int, preload: bool, settle: float, requests: int) -> Dict[str, object]:
+    port = _free_port()
+    env = {**os.environ, 'MEME_WORKERS': str(workers), 'MEME_PRELOAD': '1' if preload else '0',
+           'MEME_BIND': f'127.0.0.1:{port}'}
+    master = subprocess.Popen([sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'BL.wsgi:app'],
+                              cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    base_url = f'http://127.0.0.1:{port}'
+    try:
+        deadline = time.monotonic() + 120
+        while _get(f'{base_url}/') != 200:
+            if time.monotonic() > deadline or master.poll() is not None:
+                raise RuntimeError('gunicorn did not start')
+            time.sleep(0.5)
+
+        # Let every worker finish its warm-up, then touch the request path of each
+        time.sleep(settle)
+        for _ in range(requests):
+            _get(f'{base_url}/ready')
+            _get(f'{base_url}/metrics')
+
+        pids = child_pids(master.pid)
+        processes = {'master': memory_kb(master.pid)}
+        for index, pid in enumerate(pids):
+            processes[f'worker {index + 1}'] = memory_kb(pid)
+    finally:
+        master.terminate()
+        master.wait()
+
+    worker_values = [values for name, values in processes.items() if name != 'master']
+    return {
+        'preload': preload,
+        'workers': len(worker_values),
+        'processes': processes,
+        'total_pss_kb': sum(values['Pss'] for values in processes.values()),
+        'total_rss_kb': sum(values['Rss'] for values in processes.values()),
+        'mean_worker_pss_kb': round(sum(values['Pss'] for values in worker_values) / max(len(worker_values), 1)),
+        'mean_worker_private_kb': round(sum(values['Private_Clean'] + values['Private_Dirty']
+                                            for values in worker_values) / max(len(worker_values), 1))
+    }
+
+
+def print_result(result: Dict[str, object]) -> None:
+    print(f"\n{'preload' if result['preload'] else 'no preload'}, {result['workers']} workers")
+    print(f"{'process':<12}{'RSS MiB':>10}{'PSS MiB':>10}{'shared MiB':>12}{'private MiB':>13}")
+    for name, values in result['processes'].items():
+        shared = values['Shared_Clean'] + values['Shared_Dirty']
+        private = values['Private_Clean'] + values['Private_Dirty']
+        print(f"{name:<12}{values['Rss'] / 1024:>10.1f}{values['Pss'] / 1024:>10.1f}{shared / 1024:>12.1f}"
+              f"{private / 1024:>13.1f}")
+    print(f"{'total':<12}{result['total_rss_kb'] / 1024:>10.1f}{result['total_pss_kb'] / 1024:>10.1f}")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--workers', type=int, default=4, help='gunicorn workers')
+    parser.add_argument('--mode', choices=('preload', 'no-preload', 'both'), default='both')
+    parser.add_argument('--settle', type=float, default=15.0, help='seconds to let worker warm-ups finish')
+    parser.add_argument('--requests', type=int, default=20, help='requests sent before measuring')
+    parser.add_argument('--output', help='write the results as JSON to this file')
+    args = parser.parse_args(argv)
+
+    modes = {'preload': [True], 'no-preload': [False], 'both': [True, False]}[args.mode]
+    results = []
+    for preload in modes:
+        result = measure(args.workers, preload, args.settle, args.requests)
+        print_result(result)
+        results.append(result)
+
+    if len(results) == 2:
+        saved = results[1]['total_pss_kb'] - results[0]['total_pss_kb']
+        print(f"\nPreloading saves {saved / 1024:.1f} MiB of PSS in total, "
+              f"{saved / 1024 / max(results[0]['workers'], 1):.1f} MiB per worker")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
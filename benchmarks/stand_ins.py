@@ -0,0 +1,164 @@
+"""
+Local stand-ins for the external services used by the meme pipeline.
+"""
+import asyncio
+import http.server
+import io
+import os
+import tempfile
+import threading
+import time
+
+import numpy as np
+from PIL import Image
+
+
+def synthetic_photo(size=(800, 600), seed=0) -> Image.Image:
+    """
+    Build a photo-like image: smooth color blobs plus fine grain, which
+    compresses like a real photograph rather than a flat graphic.
+    """
+    width, height = size
+    rng = np.random.default_rng(seed)
+    coarse = rng.integers(0, 256, (height // 40 + 1, width // 40 + 1, 3), dtype=np.uint8)
+    image = Image.fromarray(coarse).resize(size, Image.Resampling.BICUBIC)
+    grain = rng.normal(0, 12, (height, width, 3))
+    pixels = np.clip(np.asarray(image, dtype=np.float64) + grain, 0, 255).astype(np.uint8)
+    return Image.fromarray(pixels)
+
+
+class LocalImageServer:
+    """
+    A threaded HTTP server that returns a different JPEG photo on every GET,
+    like picsum.photos does.
+    """
+
+    def __init__(self, size=(200, 200), pool_size=16):
+        photos = []
+        for seed in range(pool_size):
+            buffer = io.BytesIO()
+            synthetic_photo(size, seed).save(buffer, format='JPEG', quality=90)
+            photos.append(buffer.getvalue())
+
+        counter = iter(range(1 << 62))
+        lock = threading.Lock()
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                with lock:
+                    body = photos[next(counter) % len(photos)]
+                self.send_response(200)
+                self.send_header('Content-Type', 'image/jpeg')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        return f'http://127.0.0.1:{self.server.server_port}/200'
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+AFFIRMATIONS = [
+    "Believe in yourself and all that you are.",
+    "Every day is a fresh start, take a deep breath and begin again.",
+    "You are stronger than you think and braver than you believe.",
+    "Small steps every day add up to big results.",
+    "Your kindness makes the world a brighter and better place.",
+    "You deserve all the good things that are coming your way.",
+    "Mistakes are proof that you are trying, keep going.",
+    "Today I choose joy, gratitude and peace.",
+    "Nothing ever works out and it is all hopeless.",
+    "You have the power to create change and inspire others.",
+    "Progress, not perfection, is what truly matters.",
+    "Your potential is endless and your future is bright."
+]
+
+
+class FakeGeminiModel:
+    """
+    A stand-in for genai.GenerativeModel that answers from a fixed list of
+    affirmations, one of which is negative so sentiment filtering retries.
+    """
+
+    class Response:
+        def __init__(self, text):
+            self.text = text
+
+    def __init__(self, texts=None, latency=0.0):
+        self.texts = list(texts or AFFIRMATIONS)
+        self.latency = latency
+        self._counter = iter(range(1 << 62))
+        self._lock = threading.Lock()
+
+    def _next(self) -> str:
+        with self._lock:
+            return self.texts[next(self._counter) % len(self.texts)]
+
+    def generate_content(self, prompt: str):
+        if self.latency:
+            time.sleep(self.latency)
+        return self._respond(prompt)
+
+    async def generate_content_async(self, prompt: str):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return self._respond(prompt)
+
+    def _respond(self, prompt: str):
+        if 'one affirmation per line' in prompt:
+            count = int(next((word for word in prompt.split() if word.isdigit()), 10))
+            return FakeGeminiModel.Response('\n'.join(f'{i + 1}. {self._next()}' for i in range(count)))
+        return FakeGeminiModel.Response(self._next())
+
+
+def use_mongo_stand_ins() -> None:
+    """
+    Point the default Mongo client registries at in-memory clients unless MONGODB_URI is set.
+
+    Call before importing BL.routes, whose modules connect through those registries.
+    """
+    if os.environ.get('MONGODB_URI'):
+        return
+    # GridFS needs a real server, keep image bytes on local disk instead
+    os.environ.setdefault('BLOB_STORE_DIR', tempfile.mkdtemp(prefix='meme-bench-'))
+    import mongomock
+    import mongomock_motor
+    from DAL import async_mongo_module, client_registry
+
+    sync_client = mongomock.MongoClient()
+    async_clients = {}
+    client_registry.default_registry.client_factory = lambda connection_string, **options: sync_client
+    async_mongo_module.default_async_registry.client_factory = \
+        lambda connection_string, **options: async_clients.setdefault(
+            connection_string, mongomock_motor.AsyncMongoMockClient(mock_mongo_client=sync_client))
+
+
+def offline_sentiment(sentiment_module) -> None:
+    """
+    Keep sentiment_module from downloading the VADER lexicon and load the local copy.
+
+    Raises:
+        LookupError: If the lexicon is not installed locally
+    """
+    sentiment_module.download = False
+    try:
+        sentiment_module.sia
+    except LookupError:
+        raise LookupError('The VADER lexicon is not installed and benchmarks do not download it. Install it with '
+                          '"python -m nltk.downloader vader_lexicon" or set SENTIMENT_DATA_DIR') from None
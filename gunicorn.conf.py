@@ -0,0 +1,42 @@
+# Production server settings: gunicorn -c gunicorn.conf.py BL.wsgi:app
+import gc
+import os
+
+
+def _core_count() -> int:
+    # Cores this container may use, not the host's
+    if hasattr(os, 'sched_getaffinity'):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+bind = os.environ.get('MEME_BIND', '0.0.0.0:5173')
+workers = int(os.environ.get('MEME_WORKERS') or _core_count())
+# Threads let a worker keep serving while one request waits on Gemini or MongoDB
+worker_class = 'gthread'
+threads = int(os.environ.get('MEME_THREADS', 4))
+# Load the app once in the master so workers share it copy-on-write
+preload_app = os.environ.get('MEME_PRELOAD', '1') != '0'
+# Generating a meme without inventory can take several seconds
+timeout = int(os.environ.get('MEME_WORKER_TIMEOUT', 120))
+graceful_timeout = 30
+accesslog = '-'
+
+
+# The config is read before preload_app imports the app, and on_starting only runs after
+# it, so collection is turned off here: only gunicorn's master ever runs this file.
+# Without collections the master leaves no freed holes in the pages workers share
+gc.disable()
+
+
+def pre_fork(server, worker):
+    # Objects loaded so far are never collected, so collections in workers do not
+    # write to, and thereby copy, the pages they share with the master
+    gc.disable()
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    gc.enable()
+    from BL import wsgi
+    wsgi.post_fork()
@@ -0,0 +1,73 @@
+import logging
+import os
+
+import mongomock
+import pytest
+
+from DAL.blob_store import LocalBlobStore
+from DAL.client_registry import MongoClientRegistry
+from DAL.mongo_module import MongoModule
+
+# DAL modules log every call at DEBUG
+logging.getLogger().setLevel(logging.WARNING)
+
+
+def mongomock_registry() -> MongoClientRegistry:
+    """A client registry handing out one in-memory mongomock client."""
+    client = mongomock.MongoClient()
+    return MongoClientRegistry(client_factory=lambda connection_string, **options: client)
+
+
+def server_registry() -> MongoClientRegistry:
+    """A client registry on the mongod at MONGODB_URI, skipping the test without one."""
+    connection_string = os.environ.get('MONGODB_URI')
+    if not connection_string:
+        pytest.skip('MONGODB_URI is not set')
+    registry = MongoClientRegistry(serverSelectionTimeoutMS=2000)
+    try:
+        registry.get_client(connection_string).admin.command('ping')
+    except Exception as e:
+        registry.close_all()
+        pytest.skip(f'No mongod at MONGODB_URI: {e}')
+    return registry
+
+
+@pytest.fixture
+def mongo_registry():
+    return mongomock_registry()
+
+
+@pytest.fixture
+def blob_store(tmp_path):
+    return LocalBlobStore(str(tmp_path / 'blobs'))
+
+
+@pytest.fixture
+def mongo_module(mongo_registry, blob_store):
+    """A MongoModule on mongomock keeping image bytes on local disk, GridFS needs a real server."""
+    return MongoModule({'database': 'meme_test'}, 'mongodb://mongomock', registry=mongo_registry,
+                       blob_store=blob_store)
+
+
+@pytest.fixture
+def server_mongo_module(blob_store):
+    """A MongoModule on a scratch database of the mongod at MONGODB_URI, dropped afterwards."""
+    registry = server_registry()
+    mongo_module = MongoModule({'database': 'meme_test'}, os.environ['MONGODB_URI'], registry=registry,
+                               blob_store=blob_store)
+    mongo_module.client.drop_database('meme_test')
+    yield mongo_module
+    mongo_module.client.drop_database('meme_test')
+    registry.close_all()
+
+
+@pytest.fixture
+def async_mongo_module(mongo_module):
+    """An AsyncMongoModule on the same mongomock database as mongo_module."""
+    mongomock_motor = pytest.importorskip('mongomock_motor')
+    from DAL.async_mongo_module import AsyncMongoModule
+
+    client = mongo_module.client
+    registry = MongoClientRegistry(client_factory=lambda connection_string, **options:
+                                   mongomock_motor.AsyncMongoMockClient(mock_mongo_client=client))
+    return AsyncMongoModule(mongo_module, registry=registry)
@@ -0,0 +1,41 @@
+import time
+
+from BL.modules.affirmation_pool_module import AffirmationPoolModule
+
+
+class _FailingGemini:
+    def get_affirmation_batch(self, count):
+        raise RuntimeError('Gemini is down')
+
+
+class _Gemini:
+    def __init__(self):
+        self.calls = 0
+
+    def get_affirmation_batch(self, count):
+        self.calls += 1
+        return [f'You are doing great {self.calls}-{index}' for index in range(count)]
+
+
+class _Sentiment:
+    def analyze_many(self, texts):
+        return [{'is_positive': True} for _ in texts]
+
+
+def test_waiters_give_up_when_a_refill_fails():
+    pool = AffirmationPoolModule(_FailingGemini(), _Sentiment())
+    try:
+        for _ in range(3):
+            start = time.monotonic()
+            assert pool.get_affirmation(timeout=2) is None
+            assert time.monotonic() - start < 1
+    finally:
+        pool.stop()
+
+
+def test_waiters_get_the_refilled_affirmations():
+    pool = AffirmationPoolModule(_Gemini(), _Sentiment(), max_size=10, low_water_mark=2, batch_size=5)
+    try:
+        assert pool.get_affirmation(timeout=5).startswith('You are doing great')
+    finally:
+        pool.stop()
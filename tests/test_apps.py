@@ -0,0 +1,201 @@
+import asyncio
+import base64
+import io
+import json
+import os
+import tarfile
+
+import pytest
+from bson.objectid import ObjectId
+
+from DAL.blob_store import BlobReader
+from DAL.client_registry import MongoClientRegistry
+from DAL.mongo_module import MongoModule
+
+APPS = ('flask', 'asgi')
+
+
+@pytest.fixture
+def apps(monkeypatch, mongo_module, mongo_registry, blob_store):
+    """Both apps on the mongomock database of mongo_module, the ASGI app through mongomock-motor."""
+    mongomock_motor = pytest.importorskip('mongomock_motor')
+    from BL import async_routes, routes
+    from DAL.async_mongo_module import AsyncMongoModule
+
+    client = mongo_module.client
+    async_registry = MongoClientRegistry(client_factory=lambda connection_string, **options:
+                                         mongomock_motor.AsyncMongoMockClient(mock_mongo_client=client))
+
+    def mongo_view(data):
+        return MongoModule(data, 'mongodb://mongomock', registry=mongo_registry, blob_store=blob_store)
+
+    for module in (routes, async_routes):
+        monkeypatch.setattr(module, 'mongo_module', mongo_module)
+        monkeypatch.setattr(module, 'mongo_view', mongo_view)
+    monkeypatch.setattr(async_routes, 'async_mongo_module',
+                        AsyncMongoModule(mongo_module, registry=async_registry, executor=async_routes.executor))
+    monkeypatch.setattr(async_routes, '_mongo_view', lambda data: AsyncMongoModule(
+        mongo_view(data), registry=async_registry, executor=async_routes.executor))
+    return {'flask': routes.app, 'asgi': async_routes.app}
+
+
+def call(apps, app_name, method, path, body=None, headers=None):
+    """Send a request with an optional JSON body to one of the apps and return its status, headers and body."""
+    if app_name == 'flask':
+        response = apps['flask'].test_client().open(path, method=method, json=body, headers=headers)
+        return response.status_code, response.headers, response.get_data()
+
+    async def send():
+        response = await apps['asgi'].test_client().open(path, method=method, json=body, headers=headers)
+        return response.status_code, response.headers, await response.get_data()
+    return asyncio.run(send())
+
+
+def call_both(apps, method, path, body=None, headers=None):
+    """Send the same read-only request to both apps, check they answer alike and return the answer."""
+    (status, response_headers, data), (async_status, _, async_data) = [
+        call(apps, app_name, method, path, body, headers) for app_name in APPS]
+    assert (async_status, async_data) == (status, data), path
+    return status, response_headers, data
+
+
+def _b64(data: bytes) -> str:
+    return base64.b64encode(data).decode()
+
+
+@pytest.mark.parametrize('app_name', APPS)
+def test_write_list_and_delete(apps, app_name, mongo_module):
+    status, _, data = call(apps, app_name, 'POST', '/mongodb', {'Document': _b64(b'one'), 'database': 'meme_test'})
+    assert status == 200
+    meme_id = json.loads(data)['meme_id']
+
+    _, _, data = call(apps, app_name, 'POST', '/mongodb',
+                      {'Document': [_b64(b'one'), _b64(b'two')], 'database': 'meme_test'})
+    assert json.loads(data) == [{'status': 'Already Exists', 'meme_id': meme_id},
+                                {'status': 'Successfully Inserted', 'meme_id': json.loads(data)[1]['meme_id']}]
+
+    _, _, data = call(apps, app_name, 'GET', '/memes?limit=1')
+    page = json.loads(data)
+    assert len(page['items']) == 1 and page['next']
+    _, _, data = call(apps, app_name, 'GET', f"/memes?limit=1&after={page['next']}")
+    assert len(json.loads(data)['items']) == 1 and json.loads(data)['next'] is None
+
+    _, _, data = call(apps, app_name, 'DELETE', '/mongodb', {'Delete': meme_id, 'database': 'meme_test'})
+    assert json.loads(data)['status'] == 'Reference Released'
+    assert mongo_module.memes_collection.find_one({'_id': ObjectId(meme_id)})['ref_count'] == 1
+
+
+@pytest.mark.parametrize('method, path, body', [
+    ('POST', '/mongodb', None),
+    ('POST', '/mongodb', {'Document': 'not base64!'}),
+    ('POST', '/mongodb', {'Document': [_b64(b'one'), 42]}),
+    ('DELETE', '/mongodb', {'database': 'meme_test'}),
+    ('DELETE', '/mongodb', {'Delete': 'not an id', 'database': 'meme_test'}),
+    ('DELETE', '/mongodb', {'Delete': [str(ObjectId()), None], 'database': 'meme_test'}),
+    ('GET', '/memes?limit=many', None),
+    ('GET', '/memes?after=garbage', None),
+    ('GET', '/memes/export?format=rar', None),
+    ('GET', '/memes/export?from=yesterday', None),
+    ('GET', '/memes/export?renditions=huge', None),
+    ('GET', '/api/meme?type=bogus', None),
+    ('GET', '/api/memes/batch?count=0', None),
+    ('GET', '/api/memes/batch?count=ten', None),
+    ('POST', '/api/meme/jobs', {'meme_type': 'bogus'})
+])
+def test_both_apps_reject_invalid_requests_alike(apps, mongo_module, method, path, body):
+    status, _, data = call_both(apps, method, path, body)
+    assert status == 400
+    assert list(json.loads(data).values())[0]
+    assert mongo_module.memes_collection.count_documents({}) == 0
+
+
+def test_both_apps_serve_small_images_with_validators(apps, mongo_module):
+    meme_id = mongo_module.save_meme(b'full' * 100, {'thumbnail': b'thumb'})['meme_id']
+
+    status, headers, data = call_both(apps, 'GET', f'/memes/{meme_id}?size=thumbnail', headers={'Accept': 'image/png'})
+    assert (status, data) == (200, b'thumb')
+    assert 'immutable' in headers['Cache-Control']
+
+    status, _, data = call_both(apps, 'GET', f'/memes/{meme_id}?size=thumbnail',
+                                headers={'Accept': 'image/png', 'If-None-Match': headers['ETag']})
+    assert (status, data) == (304, b'')
+
+    status, _, _ = call_both(apps, 'GET', f'/memes/{ObjectId()}')
+    assert status == 404
+
+
+@pytest.mark.parametrize('app_name', APPS)
+def test_cache_misses_stream_and_fill_the_cache(apps, app_name, mongo_module, monkeypatch):
+    from BL import routes
+
+    image = os.urandom(64 * 1024)
+    meme_id = mongo_module.save_meme(image)['meme_id']
+    routes.meme_cache.invalidate(meme_id)
+    monkeypatch.setattr(BlobReader, 'read_all', lambda self: pytest.fail('stored image read whole'))
+    headers = {'Accept': 'image/png'}
+
+    # A range leaves the cache alone, the whole image fills it as it is streamed
+    status, _, data = call(apps, app_name, 'GET', f'/memes/{meme_id}', headers={**headers, 'Range': 'bytes=0-99'})
+    assert (status, data) == (206, image[:100])
+    assert routes.meme_cache.get(meme_id, 'full') is None
+
+    status, _, data = call(apps, app_name, 'GET', f'/memes/{meme_id}', headers=headers)
+    assert (status, data) == (200, image)
+    assert routes.meme_cache.get(meme_id, 'full').data == image
+
+    hits = routes.meme_cache.stats()['hits']
+    status, _, data = call(apps, app_name, 'GET', f'/memes/{meme_id}', headers=headers)
+    assert (status, data) == (200, image)
+    assert routes.meme_cache.stats()['hits'] == hits + 1
+    routes.meme_cache.invalidate(meme_id)
+
+
+@pytest.mark.parametrize('app_name', APPS)
+def test_cached_memes_deleted_by_another_worker_are_not_served(apps, app_name, mongo_module):
+    from BL import routes
+
+    meme_id = mongo_module.save_meme(b'full' * 100)['meme_id']
+    assert call(apps, app_name, 'GET', f'/memes/{meme_id}')[0] == 200
+    assert routes.meme_cache.get(meme_id, 'full') is not None
+
+    # Another worker deletes the meme: its change listeners never run in this process
+    mongo_module.memes_collection.delete_one({'_id': ObjectId(meme_id)})
+
+    assert call(apps, app_name, 'GET', f'/memes/{meme_id}')[0] == 404
+    assert routes.meme_cache.get(meme_id, 'full') is None
+
+
+def test_both_apps_stream_large_images_with_ranges(apps, mongo_module, monkeypatch):
+    from BL import routes
+
+    image = os.urandom(1024 * 1024)
+    meme_id = mongo_module.save_meme(image)['meme_id']
+    # Images over the cache's item limit are streamed from the blob store, never read whole
+    monkeypatch.setattr(routes.meme_cache, 'max_item_bytes', 1024)
+    monkeypatch.setattr(BlobReader, 'read_all', lambda self: pytest.fail('streamed image read whole'))
+    headers = {'Accept': 'image/png'}
+
+    status, response_headers, data = call_both(apps, 'GET', f'/memes/{meme_id}', headers=headers)
+    assert (status, data) == (200, image)
+    assert response_headers['Accept-Ranges'] == 'bytes'
+
+    status, response_headers, data = call_both(apps, 'GET', f'/memes/{meme_id}',
+                                               headers={**headers, 'Range': 'bytes=1000-299999'})
+    assert (status, data) == (206, image[1000:300000])
+    assert response_headers['Content-Range'] == f'bytes 1000-299999/{len(image)}'
+
+    status, response_headers, _ = call_both(apps, 'GET', f'/memes/{meme_id}',
+                                            headers={**headers, 'Range': f'bytes={len(image)}-'})
+    assert status == 416
+    assert response_headers['Content-Range'] == f'bytes */{len(image)}'
+    assert routes.meme_cache.get(meme_id, 'full') is None
+
+
+def test_both_apps_export_tar_by_default(apps, mongo_module):
+    meme_id = mongo_module.save_meme(b'full' * 100)['meme_id']
+
+    status, headers, data = call_both(apps, 'GET', '/memes/export?metadata=0')
+    assert status == 200
+    assert headers['Content-Type'] == 'application/x-tar'
+    with tarfile.open(fileobj=io.BytesIO(data)) as archive:
+        assert archive.getnames() == [f'{meme_id}.png']
@@ -0,0 +1,64 @@
+import io
+
+import pytest
+import requests
+from PIL import Image
+
+from BL.modules.background_module import BackgroundImageModule
+
+IMAGE_URL = 'https://images.example/200'
+SIZE = (40, 30)
+
+
+class _Response:
+    def __init__(self, content):
+        self.content = content
+        self.url = IMAGE_URL
+
+    def raise_for_status(self):
+        pass
+
+
+class _Session:
+    """Returns a photo of a new solid colour on every download, or fails while down."""
+
+    def __init__(self):
+        self.downloads = 0
+        self.down = False
+
+    def get(self, url, timeout=None):
+        if self.down:
+            raise requests.ConnectionError('image source is down')
+        self.downloads += 1
+        buffer = io.BytesIO()
+        Image.new('RGB', SIZE, (self.downloads * 10 % 256, 0, 0)).save(buffer, format='PNG')
+        return _Response(buffer.getvalue())
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def backgrounds():
+    module = BackgroundImageModule(prefetch_size=0)
+    module.session = _Session()
+    yield module
+    module.close()
+
+
+def test_every_background_is_downloaded_fresh(backgrounds):
+    colours = {backgrounds.get_background(IMAGE_URL, SIZE).getpixel((0, 0)) for _ in range(5)}
+    assert backgrounds.session.downloads == 5
+    assert len(colours) == 5
+
+
+def test_cached_backgrounds_are_reused_only_when_the_download_fails(backgrounds):
+    downloaded = {backgrounds.get_background(IMAGE_URL, SIZE).getpixel((0, 0)) for _ in range(3)}
+    backgrounds.session.down = True
+    assert backgrounds.get_background(IMAGE_URL, SIZE).getpixel((0, 0)) in downloaded
+
+
+def test_a_failed_download_without_cache_raises(backgrounds):
+    backgrounds.session.down = True
+    with pytest.raises(requests.ConnectionError):
+        backgrounds.get_background(IMAGE_URL, SIZE)
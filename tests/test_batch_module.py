@@ -0,0 +1,36 @@
+import io
+
+import pytest
+from PIL import Image
+
+from BL.modules.batch_module import BatchRenderModule
+from benchmarks.stand_ins import LocalImageServer
+
+
+@pytest.fixture(scope='module')
+def image_server():
+    with LocalImageServer(size=(200, 200)) as server:
+        yield server
+
+
+def test_workers_are_not_forked_from_the_threaded_app(image_server):
+    batch_module = BatchRenderModule(processes=1, image_url=image_server.url)
+    try:
+        batch_module.render(['Warm up'], 'solid_background')
+        assert batch_module._pool._mp_context.get_start_method() in ('forkserver', 'spawn')
+    finally:
+        batch_module.close()
+
+
+def test_every_custom_image_meme_gets_its_own_background(image_server):
+    batch_module = BatchRenderModule(processes=1, image_url=image_server.url)
+    try:
+        renditions = batch_module.render(['You can do it'] * 4, 'custom_image')
+    finally:
+        batch_module.close()
+
+    corners = set()
+    for meme in renditions:
+        with Image.open(io.BytesIO(meme[batch_module.full_name])) as image:
+            corners.add(image.convert('RGB').getpixel((2, 2)))
+    assert len(corners) == 4
@@ -0,0 +1,91 @@
+import os
+
+import pytest
+
+from DAL.blob_store import BlobStore, GridFSBlobStore, LocalBlobStore
+from DAL.mongo_module import MongoModule
+from tests.conftest import server_registry
+
+DATA = os.urandom(300 * 1024)
+
+
+@pytest.fixture(params=['local', 'gridfs'])
+def store(request, tmp_path):
+    if request.param == 'local':
+        yield LocalBlobStore(str(tmp_path))
+        return
+
+    registry = server_registry()
+    db = registry.get_client(os.environ['MONGODB_URI'])['meme_test_blobs']
+    # Small chunks so ranges cross chunk boundaries
+    yield GridFSBlobStore(lambda: db, chunk_size_bytes=64 * 1024)
+    db.client.drop_database('meme_test_blobs')
+    registry.close_all()
+
+
+def test_put_and_open(store):
+    blob_id = store.put(DATA, filename='meme.png', metadata={'format': 'png'})
+    with store.open(blob_id) as reader:
+        assert reader.length == len(DATA)
+        assert reader.read_all() == DATA
+        # read_all rewinds after a partial read
+        reader.read(10)
+        assert reader.read_all() == DATA
+    assert store.get(blob_id) == DATA
+
+
+@pytest.mark.parametrize('start, stop', [(0, 1), (1000, 70000), (65536, 131072), (250000, None), (0, None)])
+def test_range_reads(store, start, stop):
+    blob_id = store.put(DATA)
+    with store.open(blob_id) as reader:
+        chunks = list(reader.iter_chunks(start, stop, chunk_size=50000))
+    assert all(len(chunk) <= 50000 for chunk in chunks)
+    assert b''.join(chunks) == DATA[start:stop]
+
+
+def test_range_past_the_end_is_clamped(store):
+    blob_id = store.put(DATA)
+    with store.open(blob_id) as reader:
+        assert b''.join(reader.iter_chunks(len(DATA) - 5, len(DATA) + 100)) == DATA[-5:]
+
+
+def test_delete(store):
+    blob_id = store.put(DATA)
+    assert store.delete(blob_id) is True
+    assert store.open(blob_id) is None
+    assert store.get(blob_id) is None
+    assert store.delete(blob_id) is False
+
+
+def test_missing_and_malformed_ids(store):
+    assert store.open('0' * 24) is None
+    assert store.open('not-a-blob-id') is None
+    assert store.delete('not-a-blob-id') is False
+
+
+def test_incomplete_backend_fails_when_created():
+    class ReadOnlyBlobStore(BlobStore):
+        def open(self, blob_id):
+            return None
+
+    with pytest.raises(TypeError, match='put'):
+        ReadOnlyBlobStore()
+
+
+def test_meme_images_in_gridfs():
+    registry = server_registry()
+    mongo_module = MongoModule({'database': 'meme_test_gridfs'}, os.environ['MONGODB_URI'], registry=registry)
+    mongo_module.client.drop_database('meme_test_gridfs')
+    try:
+        meme_id = mongo_module.save_meme(DATA, {'thumbnail': b'thumb'}, text='gridfs')['meme_id']
+        with mongo_module.open_meme_image(meme_id) as reader:
+            assert (reader.length, reader.format) == (len(DATA), 'png')
+            assert reader.content_hash and reader.created_at
+            assert b''.join(reader.iter_chunks(100, 200)) == DATA[100:200]
+        assert mongo_module.get_meme_rendition(meme_id, 'thumbnail')['binary_data'] == b'thumb'
+
+        assert mongo_module.delete_meme(meme_id)['status'] == 'Successfully Deleted'
+        assert mongo_module.db['meme_blobs.files'].count_documents({}) == 0
+    finally:
+        mongo_module.client.drop_database('meme_test_gridfs')
+        registry.close_all()
@@ -0,0 +1,137 @@
+import os
+import threading
+
+import pytest
+from bson.errors import InvalidId
+from bson.objectid import ObjectId
+
+from DAL.write_buffer import MemeWriteBuffer
+
+
+@pytest.fixture
+def mongo_module(mongo_module):
+    # The content address is unique. mongomock ignores partialFilterExpression, a sparse index
+    # enforces the same on documents that have a dedup_key
+    mongo_module.memes_collection.create_index('dedup_key', unique=True, sparse=True)
+    return mongo_module
+
+
+def _blob_count(blob_store):
+    return sum(len(files) for _, _, files in os.walk(blob_store.root))
+
+
+def _meme(index):
+    return {'image_binary': b'full %d' % index * 100, 'renditions': {'thumbnail': b'thumb %d' % index}}
+
+
+def test_close_flushes_pending_saves(mongo_module):
+    write_buffer = MemeWriteBuffer(mongo_module, max_batch=1000, max_delay=3600)
+    futures = [write_buffer.submit(**_meme(index)) for index in range(25)]
+    assert len(write_buffer) == 25
+    assert mongo_module.memes_collection.count_documents({}) == 0
+
+    write_buffer.close()
+
+    results = [future.result(timeout=0) for future in futures]
+    assert all(result['status'] == 'Successfully Inserted' for result in results)
+    assert mongo_module.memes_collection.count_documents({}) == 25
+    assert mongo_module.images_collection.count_documents({}) == 25
+    with pytest.raises(RuntimeError):
+        write_buffer.submit(**_meme(99))
+
+
+def test_concurrent_submits_are_batched_and_all_saved(mongo_module):
+    write_buffer = MemeWriteBuffer(mongo_module, max_batch=10, max_delay=0.01)
+    futures = []
+    lock = threading.Lock()
+
+    def submit(offset):
+        for index in range(offset, offset + 20):
+            future = write_buffer.submit(**_meme(index))
+            with lock:
+                futures.append(future)
+
+    threads = [threading.Thread(target=submit, args=(offset,)) for offset in range(0, 80, 20)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    meme_ids = {future.result(timeout=10)['meme_id'] for future in futures}
+    write_buffer.close()
+
+    assert len(meme_ids) == 80
+    assert mongo_module.memes_collection.count_documents({}) == 80
+
+
+def test_save_memes_references_duplicates(mongo_module):
+    stored_id = mongo_module.save_meme(**_meme(0))['meme_id']
+
+    results = mongo_module.save_memes([_meme(0), _meme(1), _meme(1), _meme(2)])
+
+    assert [result['status'] for result in results] == \
+        ['Already Exists', 'Successfully Inserted', 'Already Exists', 'Successfully Inserted']
+    assert results[0]['meme_id'] == stored_id
+    assert results[1]['meme_id'] == results[2]['meme_id']
+    ref_counts = {str(meme['_id']): meme['ref_count'] for meme in mongo_module.memes_collection.find()}
+    assert ref_counts == {stored_id: 2, results[1]['meme_id']: 2, results[3]['meme_id']: 1}
+
+
+def test_save_memes_rolls_back_only_the_failing_meme(mongo_module, blob_store, monkeypatch):
+    put = blob_store.put
+
+    def failing_put(data, filename=None, metadata=None):
+        if data == _meme(1)['image_binary']:
+            raise OSError('disk full')
+        return put(data, filename, metadata)
+
+    monkeypatch.setattr(blob_store, 'put', failing_put)
+    results = mongo_module.save_memes([_meme(0), _meme(1), _meme(2)])
+
+    assert [result['status'] for result in results] == ['Successfully Inserted', 'Failed', 'Successfully Inserted']
+    assert 'disk full' in results[1]['error']
+    assert mongo_module.memes_collection.count_documents({}) == 2
+    assert mongo_module.images_collection.count_documents({}) == 2
+    assert _blob_count(blob_store) == 2
+
+
+def test_save_memes_references_a_meme_saved_concurrently(mongo_module, blob_store, monkeypatch):
+    put = blob_store.put
+    competitor = {}
+
+    def racing_put(data, filename=None, metadata=None):
+        # Another process stores meme 1 after save_memes looked for it and before it inserts
+        if data == _meme(1)['image_binary'] and not competitor:
+            competitor['meme_id'] = 'pending'
+            competitor['meme_id'] = mongo_module.save_meme(**_meme(1))['meme_id']
+        return put(data, filename, metadata)
+
+    monkeypatch.setattr(blob_store, 'put', racing_put)
+    results = mongo_module.save_memes([_meme(0), _meme(1)])
+
+    assert results[0]['status'] == 'Successfully Inserted'
+    assert results[1] == {'status': 'Already Exists', 'meme_id': competitor['meme_id']}
+    assert mongo_module.memes_collection.find_one({'_id': ObjectId(competitor['meme_id'])})['ref_count'] == 2
+    assert mongo_module.memes_collection.count_documents({}) == 2
+    # The losing copy's documents and blobs are rolled back
+    assert mongo_module.images_collection.count_documents({}) == 2
+    assert _blob_count(blob_store) == 2
+
+
+def test_delete_memes_releases_and_deletes(mongo_module, blob_store):
+    shared_id = mongo_module.save_memes([_meme(0), _meme(0)])[0]['meme_id']
+    single_id = mongo_module.save_meme(**_meme(1))['meme_id']
+
+    result = mongo_module.delete_memes([shared_id, single_id, str(ObjectId())])
+
+    assert result == {'status': 'Successfully Deleted', 'deleted_count': 1, 'released_count': 1,
+                      'deleted_images': 1}
+    assert mongo_module.memes_collection.find_one({'_id': ObjectId(shared_id)})['ref_count'] == 1
+    assert mongo_module.memes_collection.find_one({'_id': ObjectId(single_id)}) is None
+    assert mongo_module.images_collection.count_documents({'meme_id': single_id}) == 0
+    assert _blob_count(blob_store) == 1
+
+
+def test_delete_memes_of_unknown_or_malformed_ids(mongo_module):
+    assert mongo_module.delete_memes([str(ObjectId())])['status'] == 'Memes not found'
+    with pytest.raises(InvalidId):
+        mongo_module.delete_memes(['not-an-id'])
@@ -0,0 +1,55 @@
+from BL.modules.cache_module import LRUCache
+
+
+def test_least_recently_used_entry_is_evicted_first():
+    cache = LRUCache(max_items=3)
+    for key in 'abc':
+        cache.put(key, key.upper())
+
+    assert cache.get('a') == 'A'
+    cache.put('d', 'D')
+
+    assert cache.keys() == ['c', 'a', 'd']
+    assert 'b' not in cache
+    assert cache.stats()['evictions'] == 1
+
+
+def test_replacing_an_entry_marks_it_recently_used():
+    cache = LRUCache(max_items=2)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    cache.put('a', 3)
+    cache.put('c', 4)
+
+    assert cache.keys() == ['a', 'c']
+    assert cache.get('a') == 3
+
+
+def test_byte_bound_evicts_until_the_new_entry_fits():
+    cache = LRUCache(max_items=None, max_bytes=10)
+    cache.put('a', b'1234')
+    cache.put('b', b'1234')
+    cache.put('c', b'123456')
+
+    assert cache.keys() == ['b', 'c']
+    assert cache.current_bytes == 10
+
+    # A value over the bound on its own is not cached and evicts nothing
+    cache.put('d', b'12345678901')
+    assert cache.keys() == ['b', 'c'] and 'd' not in cache
+
+
+def test_pop_clear_and_counters():
+    cache = LRUCache(max_items=None, max_bytes=100)
+    cache.put('a', b'abc')
+
+    assert cache.get('missing', 'default') == 'default'
+    assert cache.get('a') == b'abc'
+    assert cache.pop('a') == b'abc' and cache.pop('a') is None
+    assert cache.current_bytes == 0
+
+    cache.put('b', b'b')
+    cache.clear()
+    assert len(cache) == 0
+    assert cache.stats() == {'hits': 1, 'misses': 1, 'hit_ratio': 0.5, 'evictions': 0, 'size': 0,
+                             'max_items': None, 'bytes': 0, 'max_bytes': 100}
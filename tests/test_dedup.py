@@ -0,0 +1,98 @@
+import asyncio
+import os
+
+import pytest
+from bson.objectid import ObjectId
+from pymongo.errors import DuplicateKeyError
+
+
+@pytest.fixture
+def mongo_module(mongo_module):
+    # mongomock ignores partialFilterExpression, a sparse index enforces the same on documents with a dedup_key
+    mongo_module.memes_collection.create_index('dedup_key', unique=True, sparse=True)
+    return mongo_module
+
+
+def _blob_count(blob_store):
+    return sum(len(files) for _, _, files in os.walk(blob_store.root))
+
+
+def _meme(index):
+    return {'image_binary': b'full %d' % index * 100, 'renditions': {'thumbnail': b'thumb %d' % index}}
+
+
+def _delete_racing_a_save(mongo_module, monkeypatch, save):
+    """Delete a meme, running save after its last reference is released and before it is deleted."""
+    delete_unreferenced = mongo_module._delete_unreferenced
+    results = []
+
+    def racing_delete(meme_id):
+        # The save finishes the delete itself, the racing delete then finds nothing left
+        monkeypatch.setattr(mongo_module, '_delete_unreferenced', delete_unreferenced)
+        results.append(save())
+        return delete_unreferenced(meme_id)
+
+    monkeypatch.setattr(mongo_module, '_delete_unreferenced', racing_delete)
+    return results
+
+
+def test_save_meme_while_its_last_reference_is_deleted(mongo_module, blob_store, monkeypatch):
+    old_id = mongo_module.save_meme(**_meme(0))['meme_id']
+    saves = _delete_racing_a_save(mongo_module, monkeypatch, lambda: mongo_module.save_meme(**_meme(0)))
+
+    assert mongo_module.delete_meme(old_id)['status'] == 'Successfully Deleted'
+
+    assert saves[0]['status'] == 'Successfully Inserted'
+    new_id = saves[0]['meme_id']
+    assert new_id != old_id
+    assert mongo_module.memes_collection.find_one({'_id': ObjectId(old_id)}) is None
+    assert mongo_module.memes_collection.find_one({'_id': ObjectId(new_id)})['ref_count'] == 1
+    assert mongo_module.get_meme_rendition(new_id, 'thumbnail')['binary_data'] == _meme(0)['renditions']['thumbnail']
+    # Only the new copy's images and blob are left
+    assert mongo_module.images_collection.count_documents({}) == 1
+    assert _blob_count(blob_store) == 1
+
+
+def test_save_memes_while_a_last_reference_is_deleted(mongo_module, blob_store, monkeypatch):
+    old_id = mongo_module.save_meme(**_meme(0))['meme_id']
+    saves = _delete_racing_a_save(mongo_module, monkeypatch,
+                                  lambda: mongo_module.save_memes([_meme(0), _meme(0), _meme(1)]))
+
+    mongo_module.delete_meme(old_id)
+
+    results = saves[0]
+    assert [result['status'] for result in results] == ['Successfully Inserted', 'Already Exists',
+                                                        'Successfully Inserted']
+    assert results[0]['meme_id'] == results[1]['meme_id'] != old_id
+    assert mongo_module.memes_collection.find_one({'_id': ObjectId(results[0]['meme_id'])})['ref_count'] == 2
+    assert mongo_module.memes_collection.count_documents({}) == 2
+    assert mongo_module.images_collection.count_documents({}) == 2
+    assert _blob_count(blob_store) == 2
+
+
+def test_save_meme_gives_up_when_the_content_address_stays_taken(mongo_module, blob_store, monkeypatch):
+    old_id = mongo_module.save_meme(**_meme(0))['meme_id']
+    mongo_module.memes_collection.update_one({'_id': ObjectId(old_id)}, {'$set': {'ref_count': 0}})
+    # A tombstone that cannot be deleted keeps the content address taken
+    monkeypatch.setattr(mongo_module, '_delete_unreferenced', lambda meme_id: (None, 0))
+
+    with pytest.raises(DuplicateKeyError):
+        mongo_module.save_meme(**_meme(0))
+
+    assert mongo_module.memes_collection.count_documents({}) == 1
+    assert mongo_module.images_collection.count_documents({}) == 1
+    assert _blob_count(blob_store) == 1
+
+
+def test_async_save_meme_while_its_last_reference_is_deleted(mongo_module, async_mongo_module, blob_store):
+    old_id = mongo_module.save_meme(**_meme(0))['meme_id']
+    # Released by delete_meme, which has not deleted it yet
+    mongo_module.memes_collection.update_one({'_id': ObjectId(old_id)}, {'$set': {'ref_count': 0}})
+
+    result = asyncio.run(async_mongo_module.save_meme(**_meme(0)))
+
+    assert result['status'] == 'Successfully Inserted'
+    assert result['meme_id'] != old_id
+    assert mongo_module.memes_collection.find_one({'_id': ObjectId(old_id)}) is None
+    assert mongo_module.images_collection.count_documents({}) == 1
+    assert _blob_count(blob_store) == 1
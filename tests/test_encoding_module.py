@@ -0,0 +1,76 @@
+import io
+
+import pytest
+from PIL import Image
+from werkzeug.datastructures import MIMEAccept
+
+from BL.modules.encoding_module import EncodingModule
+
+IMAGE = Image.new('RGB', (32, 24), (200, 40, 90))
+
+
+def _decode(data):
+    with Image.open(io.BytesIO(data)) as image:
+        image.load()
+        return image.format, image.size, image.convert('RGB').getpixel((5, 5))
+
+
+@pytest.mark.parametrize('fmt, pil_format', [('png', 'PNG'), ('jpeg', 'JPEG'), ('webp', 'WEBP')])
+def test_encode_round_trips(fmt, pil_format):
+    image_format, size, pixel = _decode(EncodingModule().encode(IMAGE, fmt))
+
+    assert (image_format, size) == (pil_format, IMAGE.size)
+    if fmt == 'png':
+        assert pixel == (200, 40, 90)
+    else:
+        assert all(abs(a - b) <= 8 for a, b in zip(pixel, (200, 40, 90)))
+
+
+def test_jpeg_encodes_images_with_alpha():
+    assert _decode(EncodingModule().encode(IMAGE.convert('RGBA'), 'jpeg'))[0] == 'JPEG'
+
+
+def test_transcode_changes_the_format():
+    encoding_module = EncodingModule()
+    png = encoding_module.encode(IMAGE)
+
+    assert _decode(encoding_module.transcode(png, 'webp'))[:2] == ('WEBP', IMAGE.size)
+
+
+@pytest.mark.parametrize('accept, fmt', [
+    ([], 'png'),
+    ([('*/*', 1)], 'png'),
+    ([('image/jpeg', 1), ('image/webp', 1)], 'webp'),
+    ([('image/jpeg', 1), ('image/webp', 0.5)], 'jpeg'),
+    ([('image/gif', 1)], 'png')
+])
+def test_negotiate(accept, fmt):
+    assert EncodingModule().negotiate(MIMEAccept(accept)) == fmt
+
+
+def test_variants_are_transcoded_once_and_invalidated():
+    encoding_module = EncodingModule()
+    png = encoding_module.encode(IMAGE)
+    loads = []
+
+    def load():
+        loads.append(1)
+        return png, 'png'
+
+    webp = encoding_module.get_variant(('meme', 'full'), 'webp', load)
+    assert encoding_module.get_variant(('meme', 'full'), 'webp', load) is webp
+    assert len(loads) == 1
+
+    # The stored format is served as-is, without a cached copy
+    assert encoding_module.get_variant(('meme', 'full'), 'png', load) is png
+    assert (('meme', 'full'), 'png') not in encoding_module.cache
+
+    encoding_module.invalidate(('meme', 'full'))
+    encoding_module.get_variant(('meme', 'full'), 'webp', load)
+    assert len(loads) == 3
+    assert encoding_module.get_variant(('gone', 'full'), 'webp', lambda: None) is None
+
+
+def test_unsupported_formats_are_rejected():
+    with pytest.raises(ValueError):
+        EncodingModule(canonical_format='gif')
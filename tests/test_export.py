@@ -0,0 +1,43 @@
+import io
+import tarfile
+
+import pytest
+
+from benchmarks.check_export_memory import MAX_BYTES_PER_ENTRY, measure, seed
+from BL import api
+from DAL.blob_store import LocalBlobStore
+from DAL.mongo_module import MongoModule
+from tests.conftest import mongomock_registry
+
+MEMES = 600
+
+
+@pytest.fixture(scope='module')
+def seeded_mongo_module(tmp_path_factory):
+    """A mongomock MongoModule seeded once with MEMES memes, shared by the memory checks."""
+    mongo_module = MongoModule({'database': 'meme_test'}, 'mongodb://mongomock', registry=mongomock_registry(),
+                               blob_store=LocalBlobStore(str(tmp_path_factory.mktemp('blobs'))))
+    seed(mongo_module, MEMES, 1024)
+    return mongo_module
+
+
+def test_tar_export_memory_does_not_grow_per_entry(seeded_mongo_module):
+    result = measure(seeded_mongo_module, 'tar')
+
+    assert result['entries'] == 2 * MEMES
+    assert result['bytes_per_entry'] <= MAX_BYTES_PER_ENTRY, result
+
+
+def test_memory_check_catches_per_entry_growth(seeded_mongo_module):
+    # zip keeps a ZipInfo per entry for its central directory
+    assert measure(seeded_mongo_module, 'zip')['bytes_per_entry'] > MAX_BYTES_PER_ENTRY
+
+
+def test_exports_default_to_tar(seeded_mongo_module):
+    options = api.export_options({}, renditions=['full', 'thumbnail'], full_rendition='full')
+    assert options['archive_format'] == 'tar'
+    assert api.export_headers(options)['Content-Disposition'] == 'attachment; filename="memes.tar"'
+
+    archive = b''.join(seeded_mongo_module.export_archive(include_metadata=False))
+    with tarfile.open(fileobj=io.BytesIO(archive)) as tar:
+        assert len(tar.getnames()) == MEMES
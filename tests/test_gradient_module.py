@@ -0,0 +1,46 @@
+import random
+
+import numpy as np
+import pytest
+
+from benchmarks.bench_gradient import legacy_gradient
+from BL.modules.gradient_module import GradientModule
+
+
+@pytest.mark.parametrize('image_size', [(40, 30), (17, 23), (1, 5)])
+def test_vertical_gradient_matches_the_per_pixel_loop(image_size):
+    engine = GradientModule(image_size)
+    rng = random.Random(1234)
+    for _ in range(5):
+        color1 = tuple(rng.randint(0, 255) for _ in range(3))
+        color2 = tuple(rng.randint(0, 255) for _ in range(3))
+
+        rendered = np.asarray(engine.render([color1, color2]))
+
+        assert rendered.shape == (image_size[1], image_size[0], 3)
+        np.testing.assert_array_equal(rendered, legacy_gradient(image_size, color1, color2))
+
+
+def test_horizontal_gradient_runs_along_the_width():
+    rendered = np.asarray(GradientModule((30, 20)).render([(0, 0, 0), (255, 255, 255)], angle=0))
+
+    assert (rendered == rendered[:1]).all()
+    assert rendered[0, 0].tolist() == [0, 0, 0]
+    assert (np.diff(rendered[0, :, 0].astype(int)) >= 0).all()
+
+
+def test_multi_stop_gradient_passes_through_every_stop():
+    colors = [(255, 0, 0), (0, 255, 0), (0, 0, 255)]
+    rendered = np.asarray(GradientModule((10, 100)).render(colors, positions=[0.0, 0.5, 1.0]))
+
+    assert rendered[0, 0].tolist() == [255, 0, 0]
+    assert rendered[50, 0].tolist() == [0, 255, 0]
+    assert rendered[99, 0, 2] > 245
+
+
+@pytest.mark.parametrize('kwargs', [{'colors': [(0, 0, 0)]},
+                                    {'colors': [(0, 0, 0), (1, 1, 1)], 'positions': [0.0]},
+                                    {'colors': [(0, 0, 0), (1, 1, 1)], 'kind': 'conic'}])
+def test_invalid_gradients_are_rejected(kwargs):
+    with pytest.raises(ValueError):
+        GradientModule((10, 10)).render(**kwargs)
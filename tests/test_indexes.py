@@ -0,0 +1,28 @@
+from pymongo import ASCENDING
+
+from DAL.indexes import INDEXES, TTL_INDEX_NAME, find_collection_scans, query_shapes
+
+
+def test_no_query_scans_a_collection(server_mongo_module):
+    server_mongo_module.ensure_indexes()
+    assert find_collection_scans(server_mongo_module) == []
+
+
+def test_ensure_indexes_drops_the_ttl_index(server_mongo_module):
+    for collection in (server_mongo_module.memes_collection, server_mongo_module.images_collection):
+        collection.create_index([('created_at', ASCENDING)], name=TTL_INDEX_NAME, expireAfterSeconds=60)
+
+    ensured = server_mongo_module.ensure_indexes()
+
+    for collection in (server_mongo_module.memes_collection, server_mongo_module.images_collection):
+        indexes = collection.index_information()
+        assert TTL_INDEX_NAME not in indexes
+        assert set(ensured[collection.name]) == {index.document['name'] for index in INDEXES[collection.name]}
+        assert set(ensured[collection.name]) <= set(indexes)
+
+
+def test_list_query_shapes_match_the_listing_queries(mongo_module):
+    shapes = {shape['name']: shape['filter'] for shape in query_shapes(mongo_module)}
+    assert shapes['list memes'] == mongo_module.LISTED
+    assert shapes['list memes after cursor'].items() >= mongo_module.LISTED.items()
+    assert '$or' in shapes['list memes after cursor']
@@ -0,0 +1,89 @@
+import asyncio
+import os
+
+from BL.modules import MemeInventoryModule
+
+MEME_TYPES = ('custom_image', 'gradient')
+
+
+def _create_meme(mongo_module):
+    def create_meme(meme_type):
+        return mongo_module.save_meme(os.urandom(64), text=meme_type)
+    return create_meme
+
+
+def _stock(mongo_module, meme_type):
+    meme_id = _create_meme(mongo_module)(meme_type)['meme_id']
+    mongo_module.add_to_inventory(meme_id, meme_type)
+    return meme_id
+
+
+def test_replenish_tops_every_meme_type_up_to_target_size(mongo_module):
+    _stock(mongo_module, 'gradient')
+    inventory = MemeInventoryModule(_create_meme(mongo_module), mongo_module, meme_types=MEME_TYPES,
+                                    target_size=3, low_water_mark=1)
+
+    assert inventory.replenish() == {'custom_image': 3, 'gradient': 2}
+    assert inventory.levels() == {'custom_image': 3, 'gradient': 3}
+    assert inventory.replenish() == {'custom_image': 0, 'gradient': 0}
+
+
+def test_replenish_counts_stock_added_by_other_processes(mongo_module):
+    create_meme = _create_meme(mongo_module)
+
+    def create_meme_while_another_process_replenishes(meme_type):
+        # Another process stocks a meme of the same type while this one is generating
+        _stock(mongo_module, meme_type)
+        return create_meme(meme_type)
+
+    inventory = MemeInventoryModule(create_meme_while_another_process_replenishes, mongo_module,
+                                    meme_types=('gradient',), target_size=6, low_water_mark=2)
+
+    assert inventory.replenish() == {'gradient': 3}
+    assert mongo_module.count_inventory('gradient') == 6
+
+
+def test_replenish_gives_up_on_a_failing_meme_type(mongo_module):
+    create_meme = _create_meme(mongo_module)
+    calls = []
+
+    def create_meme_failing_gradients(meme_type):
+        calls.append(meme_type)
+        if meme_type == 'gradient':
+            raise RuntimeError('renderer crashed')
+        return create_meme(meme_type)
+
+    inventory = MemeInventoryModule(create_meme_failing_gradients, mongo_module, meme_types=MEME_TYPES,
+                                    target_size=4, low_water_mark=1, max_failures=2)
+
+    assert inventory.replenish() == {'custom_image': 4, 'gradient': 0}
+    assert calls.count('gradient') == 2
+    assert inventory.stats()['gradient']['failures'] == 2
+
+
+def test_claim_hands_out_the_oldest_meme_once(mongo_module):
+    first, second = _stock(mongo_module, 'gradient'), _stock(mongo_module, 'gradient')
+    inventory = MemeInventoryModule(_create_meme(mongo_module), mongo_module, meme_types=MEME_TYPES,
+                                    target_size=3, low_water_mark=1)
+
+    assert [inventory.claim('gradient') for _ in range(3)] == [first, second, None]
+    assert inventory.claim('unknown') is None
+    assert inventory.stats()['gradient'] == {'level': 0, 'hits': 2, 'misses': 1, 'replenished': 0, 'failures': 0}
+
+
+def test_unclaimed_inventory_is_not_listed_or_exported(mongo_module, async_mongo_module):
+    saved = mongo_module.save_meme(os.urandom(64))['meme_id']
+    claimed, unclaimed = _stock(mongo_module, 'gradient'), _stock(mongo_module, 'gradient')
+    assert mongo_module.claim_from_inventory('gradient') == claimed
+
+    listed = {saved, claimed}
+    assert {meme['_id'] for meme in mongo_module.list_memes()['items']} == listed
+    assert {meme['_id'] for meme in mongo_module.get_all_memes()} == listed
+    assert {entry.name.split('.')[0] for entry in mongo_module.iter_export_entries()} == listed
+
+    async def list_async():
+        return {meme['_id'] async for meme in async_mongo_module.iter_memes()}
+    assert asyncio.run(list_async()) == listed
+
+    assert mongo_module.claim_from_inventory('gradient') == unclaimed
+    assert {meme['_id'] for meme in mongo_module.iter_memes()} == listed | {unclaimed}
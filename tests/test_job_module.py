@@ -0,0 +1,97 @@
+import threading
+import time
+
+import pytest
+
+from BL.modules.job_module import Job, JobQueueModule, QueueFullError
+
+
+def _wait_for(job, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not job.done:
+        assert time.monotonic() < deadline, f'job still {job.status}'
+        time.sleep(0.01)
+    return job
+
+
+@pytest.fixture
+def blocked_queue():
+    """A queue with one worker held inside its first job until release is set."""
+    release = threading.Event()
+    running = threading.Event()
+
+    def handler(value):
+        running.set()
+        release.wait(5)
+        return value * 2
+
+    jobs = JobQueueModule(handler, workers=1, max_queue_size=2)
+    jobs.running, jobs.release = running, release
+    yield jobs
+    release.set()
+    jobs.stop()
+
+
+def test_job_runs_and_reports_its_result():
+    jobs = JobQueueModule(lambda value: value * 2, workers=1)
+    try:
+        job = _wait_for(jobs.submit(value=21))
+    finally:
+        jobs.stop()
+
+    assert jobs.get(job.id) is job
+    described = job.to_dict()
+    assert described['status'] == Job.SUCCEEDED and described['result'] == 42
+    assert described['timings_ms']['total'] >= described['timings_ms']['running']
+
+
+def test_failing_job_reports_its_error():
+    def handler():
+        raise RuntimeError('renderer crashed')
+
+    jobs = JobQueueModule(handler, workers=1)
+    try:
+        job = _wait_for(jobs.submit())
+    finally:
+        jobs.stop()
+
+    assert (job.status, job.error, job.result) == (Job.FAILED, 'renderer crashed', None)
+
+
+def test_submit_raises_when_the_queue_is_full(blocked_queue):
+    running = blocked_queue.submit(value=1)
+    assert blocked_queue.running.wait(5)
+    queued = [blocked_queue.submit(value=value) for value in (2, 3)]
+
+    with pytest.raises(QueueFullError):
+        blocked_queue.submit(value=4)
+
+    assert running.status == Job.RUNNING and all(job.status == Job.QUEUED for job in queued)
+    assert blocked_queue.stats()['queued'] == 2 and blocked_queue.stats()['tracked_jobs'] == 3
+
+    blocked_queue.release.set()
+    assert [_wait_for(job).result for job in [running, *queued]] == [2, 4, 6]
+
+
+def test_jobs_waiting_past_the_queue_timeout_expire(blocked_queue):
+    blocked_queue.queue_timeout = 0.05
+    blocked_queue.submit(value=1)
+    assert blocked_queue.running.wait(5)
+    late = blocked_queue.submit(value=2)
+
+    time.sleep(0.1)
+    blocked_queue.release.set()
+
+    assert _wait_for(late).status == Job.EXPIRED
+    assert late.result is None and 'queue' in late.error
+
+
+def test_finished_jobs_are_pruned_after_retention():
+    jobs = JobQueueModule(lambda: None, workers=1, retention=0.0)
+    try:
+        job = _wait_for(jobs.submit())
+        jobs.submit()
+    finally:
+        jobs.stop()
+
+    assert jobs.get(job.id) is None
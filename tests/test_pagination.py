@@ -0,0 +1,86 @@
+import os
+import random
+from datetime import datetime, timedelta
+
+import pytest
+from bson.objectid import ObjectId
+
+from DAL.mongo_module import InvalidCursorError, MongoModule
+from tests.conftest import mongomock_registry, server_registry
+
+MEMES = 20000
+# Ten memes per millisecond, so pages start and end inside runs of equal created_at
+TIMESTAMPS = 2000
+
+
+def _seed(mongo_module, count, timestamps):
+    start = datetime(2024, 1, 1)
+    ids = [ObjectId() for _ in range(count)]
+    # _id order must not follow created_at order for ties to be broken by _id alone
+    random.Random(7).shuffle(ids)
+    mongo_module.memes_collection.insert_many([
+        {'_id': meme_id, 'created_at': start + timedelta(milliseconds=index % timestamps), 'format': 'png'}
+        for index, meme_id in enumerate(ids)
+    ])
+    return {str(meme_id) for meme_id in ids}
+
+
+@pytest.fixture(scope='module', params=['mongomock', 'mongod'])
+def seeded(request):
+    registry = mongomock_registry() if request.param == 'mongomock' else server_registry()
+    mongo_module = MongoModule({'database': 'meme_test_pagination'},
+                               os.environ.get('MONGODB_URI', 'mongodb://mongomock'), registry=registry)
+    mongo_module.client.drop_database('meme_test_pagination')
+    if request.param == 'mongod':
+        mongo_module.ensure_indexes()
+    ids = _seed(mongo_module, MEMES, TIMESTAMPS)
+    yield mongo_module, ids
+    mongo_module.client.drop_database('meme_test_pagination')
+    registry.close_all()
+
+
+def _page_through(mongo_module, limit):
+    seen = []
+    after = None
+    while True:
+        page = mongo_module.list_memes(limit=limit, after=after)
+        assert len(page['items']) <= limit
+        seen.extend(meme['_id'] for meme in page['items'])
+        after = page['next']
+        if after is None:
+            return seen
+
+
+def test_paging_visits_every_meme_once(seeded):
+    mongo_module, ids = seeded
+    # Not a multiple of the run length, so page boundaries split runs of ties
+    seen = _page_through(mongo_module, limit=1997)
+    assert len(seen) == len(set(seen)) == MEMES
+    assert set(seen) == ids
+
+
+def test_small_pages_visit_every_meme_once(mongo_module):
+    ids = _seed(mongo_module, 1000, 300)
+    seen = _page_through(mongo_module, limit=7)
+    assert len(seen) == len(set(seen)) == 1000
+    assert set(seen) == ids
+
+
+def test_streaming_is_in_list_order(seeded):
+    mongo_module, _ = seeded
+    keys = [(meme['created_at'], ObjectId(meme['_id'])) for meme in mongo_module.iter_memes(batch_size=1000)]
+    assert len(keys) == MEMES
+    assert keys == sorted(keys, reverse=True)
+
+
+def test_streaming_after_a_cursor_continues_where_the_page_ended(seeded):
+    mongo_module, ids = seeded
+    first = mongo_module.list_memes(limit=1234)
+    rest = [meme['_id'] for meme in mongo_module.iter_memes(after=first['next'])]
+    assert len(first['items']) + len(rest) == MEMES
+    assert {meme['_id'] for meme in first['items']} | set(rest) == ids
+
+
+def test_a_malformed_cursor_is_rejected(mongo_module):
+    with pytest.raises(InvalidCursorError):
+        mongo_module.list_memes(after='not-a-cursor')
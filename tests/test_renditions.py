@@ -0,0 +1,25 @@
+from DAL.mongo_module import MongoModule
+
+
+def _save(mongo_module):
+    return mongo_module.save_meme(b'large image', {'small': b'small image'}, text='rendition names')['meme_id']
+
+
+def test_the_full_rendition_is_the_meme_itself(mongo_module):
+    meme_id = _save(mongo_module)
+    assert mongo_module.get_meme_rendition(meme_id)['binary_data'] == b'large image'
+    assert mongo_module.get_meme_rendition(meme_id, 'full')['binary_data'] == b'large image'
+    assert mongo_module.get_meme_rendition(meme_id, 'small')['binary_data'] == b'small image'
+
+
+def test_a_configured_full_rendition_name_is_looked_up_in_the_meme(mongo_registry, blob_store):
+    mongo_module = MongoModule({'database': 'meme_test'}, 'mongodb://mongomock', registry=mongo_registry,
+                               blob_store=blob_store, full_rendition='large')
+    meme_id = _save(mongo_module)
+    assert mongo_module.get_meme_rendition(meme_id, 'large')['binary_data'] == b'large image'
+    assert mongo_module.get_meme_rendition(meme_id)['binary_data'] == b'large image'
+    assert mongo_module.get_meme_rendition(meme_id, 'full') is None
+
+    names = [entry.name for entry in mongo_module.iter_export_entries(renditions=['large', 'small'],
+                                                                      include_metadata=False)]
+    assert names == [f'{meme_id}.png', f'{meme_id}-small.png']
@@ -0,0 +1,92 @@
+import os
+from datetime import datetime, timedelta
+
+import pytest
+from bson.objectid import ObjectId
+
+from BL.modules import MemeRetentionModule
+
+
+@pytest.fixture
+def mongo_module(mongo_module):
+    # mongomock ignores partialFilterExpression, a sparse index enforces the same on documents with a dedup_key
+    mongo_module.memes_collection.create_index('dedup_key', unique=True, sparse=True)
+    return mongo_module
+
+
+def _blob_count(blob_store):
+    return sum(len(files) for _, _, files in os.walk(blob_store.root))
+
+
+def _save(mongo_module, name, age, saves=1):
+    for _ in range(saves):
+        meme_id = mongo_module.save_meme(b'%s full' % name * 100, {'thumbnail': b'%s thumb' % name * 100},
+                                         text=name.decode())['meme_id']
+    mongo_module.memes_collection.update_one({'_id': ObjectId(meme_id)}, {'$set': {'created_at': datetime.now() - age}})
+    return meme_id
+
+
+def test_expire_memes_deletes_old_memes_with_images_and_blobs(mongo_module, blob_store):
+    old = _save(mongo_module, b'old', timedelta(days=10))
+    new = _save(mongo_module, b'new', timedelta(hours=1))
+    assert _blob_count(blob_store) == 2
+
+    result = mongo_module.expire_memes(datetime.now() - timedelta(days=1), batch_size=1)
+
+    assert result == {'expired': 1}
+    assert mongo_module.get_meme(old) is None
+    assert mongo_module.images_collection.count_documents({'meme_id': old}) == 0
+    assert mongo_module.get_meme(new) is not None
+    assert _blob_count(blob_store) == 1
+
+
+def test_expire_memes_keeps_referenced_memes(mongo_module):
+    shared = _save(mongo_module, b'shared', timedelta(days=10), saves=2)
+
+    assert mongo_module.expire_memes(datetime.now() - timedelta(days=1)) == {'expired': 0}
+    assert mongo_module.get_meme(shared)['ref_count'] == 2
+
+    # Once the other save is released, the meme expires with the next sweep
+    assert mongo_module.delete_meme(shared)['status'] == 'Reference Released'
+    assert mongo_module.expire_memes(datetime.now() - timedelta(days=1)) == {'expired': 1}
+    assert mongo_module.get_meme(shared) is None
+
+
+def test_expire_memes_counts_claimed_memes_from_their_claim(mongo_module):
+    claimed = _save(mongo_module, b'claimed', timedelta(days=10))
+    mongo_module.add_to_inventory(claimed, 'gradient')
+    assert mongo_module.claim_from_inventory('gradient') == claimed
+
+    assert mongo_module.expire_memes(datetime.now() - timedelta(days=1)) == {'expired': 0}
+    assert mongo_module.expire_memes(datetime.now() + timedelta(seconds=1)) == {'expired': 1}
+
+
+def test_expire_memes_deletes_memes_saved_before_reference_counting(mongo_module):
+    legacy = _save(mongo_module, b'legacy', timedelta(days=10))
+    mongo_module.memes_collection.update_one({'_id': ObjectId(legacy)}, {'$unset': {'ref_count': ''}})
+
+    assert mongo_module.expire_memes(datetime.now() - timedelta(days=1)) == {'expired': 1}
+
+
+def test_a_save_after_expiry_stores_a_fresh_copy(mongo_module):
+    old = _save(mongo_module, b'again', timedelta(days=10))
+    mongo_module.expire_memes(datetime.now() - timedelta(days=1))
+
+    result = mongo_module.save_meme(b'again full' * 100, {'thumbnail': b'again thumb' * 100}, text='again')
+
+    assert result['status'] == 'Successfully Inserted'
+    assert result['meme_id'] != old
+    assert mongo_module.get_meme_rendition(result['meme_id'], 'thumbnail')['binary_data'] == b'again thumb' * 100
+
+
+def test_retention_module_sweeps_in_the_background(mongo_module):
+    old = _save(mongo_module, b'old', timedelta(days=10))
+    retention = MemeRetentionModule(mongo_module, max_age=24 * 60 * 60, interval=3600)
+
+    retention.start()
+    retention.stop()
+
+    assert mongo_module.get_meme(old) is None
+    assert retention.stats() == {'sweeps': 1, 'expired': 1, 'failures': 0}
+    with pytest.raises(ValueError):
+        MemeRetentionModule(mongo_module, max_age=0)
@@ -0,0 +1,106 @@
+import os
+import threading
+from collections import Counter
+
+import mongomock
+import pytest
+
+from DAL.command_monitor import CommandCounter
+from DAL.mongo_module import MongoModule
+from tests.conftest import server_registry
+
+OPERATIONS = ('find', 'find_one', 'aggregate', 'count_documents', 'insert_one', 'insert_many',
+              'update_one', 'update_many', 'bulk_write', 'find_one_and_update', 'find_one_and_delete',
+              'delete_one', 'delete_many')
+
+
+@pytest.fixture
+def operations(monkeypatch):
+    """
+    Count the collection operations mongomock serves, by (collection, operation).
+
+    mongomock has no command monitoring. Each top-level operation stands in for
+    one command; operations mongomock runs internally, e.g. find inside find_one,
+    are not counted again.
+    """
+    counts = Counter()
+    depth = threading.local()
+
+    def counted(name, method):
+        def operation(self, *args, **kwargs):
+            if not getattr(depth, 'value', 0):
+                counts[(self.name, name)] += 1
+            depth.value = getattr(depth, 'value', 0) + 1
+            try:
+                return method(self, *args, **kwargs)
+            finally:
+                depth.value -= 1
+        return operation
+
+    for name in OPERATIONS:
+        monkeypatch.setattr(mongomock.collection.Collection, name,
+                            counted(name, getattr(mongomock.collection.Collection, name)))
+    return counts
+
+
+def _seed(mongo_module, count):
+    results = mongo_module.save_memes([{'image_binary': b'meme %d' % index,
+                                        'renditions': {'thumbnail': b'thumb %d' % index}}
+                                       for index in range(count)])
+    return [result['meme_id'] for result in results]
+
+
+def test_a_page_of_memes_is_one_query(mongo_module, operations):
+    _seed(mongo_module, 120)
+    operations.clear()
+
+    page = mongo_module.list_memes(limit=50)
+    assert operations == {('memes', 'find'): 1}
+
+    operations.clear()
+    mongo_module.list_memes(limit=50, after=page['next'])
+    assert operations == {('memes', 'find'): 1}
+
+
+def test_images_of_a_listing_are_fetched_once_per_batch(mongo_module, operations):
+    _seed(mongo_module, 120)
+    operations.clear()
+
+    memes = list(mongo_module.iter_memes(include_images=True, batch_size=50))
+    assert len(memes) == 120 and all(meme['image_data'].startswith(b'thumb') for meme in memes)
+    assert operations == {('memes', 'find'): 1, ('images', 'find'): 3}
+
+
+def test_a_meme_is_one_query(mongo_module, operations):
+    meme_id, = _seed(mongo_module, 1)
+    operations.clear()
+
+    assert 'image_data' not in mongo_module.get_meme(meme_id)
+    assert operations == {('memes', 'find_one'): 1}
+
+
+def test_round_trips_on_a_server(blob_store):
+    registry = server_registry()
+    counter = CommandCounter()
+    mongo_module = MongoModule({'database': 'meme_test_round_trips'}, os.environ['MONGODB_URI'],
+                               registry=registry, client_options={'event_listeners': [counter]},
+                               blob_store=blob_store)
+    mongo_module.client.drop_database('meme_test_round_trips')
+    try:
+        meme_ids = _seed(mongo_module, 120)
+
+        counter.reset()
+        mongo_module.list_memes(limit=50)
+        assert counter.counts == {'find': 1}
+
+        # mongomock has no pipeline $lookup, so the meme with its image is only counted here
+        counter.reset()
+        assert mongo_module.get_meme(meme_ids[0], include_image=True)['image_data'] == b'thumb 0'
+        assert counter.counts == {'aggregate': 1}
+
+        counter.reset()
+        assert 'image_data' not in mongo_module.get_meme(meme_ids[0], include_image=True, rendition='missing')
+        assert counter.counts == {'aggregate': 1}
+    finally:
+        mongo_module.client.drop_database('meme_test_round_trips')
+        registry.close_all()
@@ -0,0 +1,65 @@
+import pytest
+
+from BL.modules.text_layout_module import TextLayoutModule
+
+TEXT = 'You are capable of amazing things when you believe in yourself every single day'
+
+
+@pytest.fixture
+def layout_module():
+    return TextLayoutModule(min_font_size=10, max_font_size=40)
+
+
+def test_wrapped_lines_fit_the_width_and_keep_every_word(layout_module):
+    lines, widths = layout_module.wrap(TEXT, 200, 20)
+
+    assert len(lines) > 1
+    assert ' '.join(lines) == TEXT
+    assert all(width <= 200 for width in widths)
+    assert widths == [layout_module.get_font(20).getlength(line) for line in lines]
+
+
+def test_a_word_wider_than_the_line_gets_a_line_of_its_own(layout_module):
+    lines, widths = layout_module.wrap('a Supercalifragilisticexpialidocious b', 50, 20)
+
+    assert lines == ['a', 'Supercalifragilisticexpialidocious', 'b']
+    assert widths[1] > 50
+
+
+def test_layout_picks_the_largest_size_that_fits(layout_module):
+    layout = layout_module.layout(TEXT, 300, max_height=120)
+
+    assert layout.width <= 300 and layout.height <= 120
+    assert layout.font_size < layout_module.max_font_size
+    larger = layout_module.layout_at(TEXT, 300, layout.font_size + 1)
+    assert larger.width > 300 or larger.height > 120
+
+
+def test_short_text_uses_the_largest_size(layout_module):
+    assert layout_module.layout('Hi', 500, max_height=500).font_size == layout_module.max_font_size
+
+
+def test_text_that_never_fits_falls_back_to_the_smallest_size(layout_module):
+    layout = layout_module.layout(TEXT, 300, max_height=1)
+
+    assert layout.font_size == layout_module.min_font_size
+
+
+def test_fixed_font_size_and_line_positions(layout_module):
+    layout = layout_module.layout('one two', 1000, font_size=20)
+
+    assert layout.font_size == 20 and layout.lines == ('one two',)
+    assert layout.line_spacing == 20 * layout_module.line_spacing
+    (x, y), = layout.line_positions(1000, 100)
+    assert x == (1000 - layout.width) / 2
+    assert y == (100 - layout.height) / 2
+
+
+def test_fonts_are_loaded_once_per_size(layout_module):
+    assert layout_module.get_font(20) is layout_module.get_font(20)
+    assert layout_module.get_font(20) is not layout_module.get_font(21)
+
+
+def test_size_limits_are_validated():
+    with pytest.raises(ValueError):
+        TextLayoutModule(min_font_size=50, max_font_size=20)
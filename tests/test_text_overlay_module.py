@@ -0,0 +1,44 @@
+from PIL import Image
+
+from BL.modules.text_layout_module import TextLayoutModule
+from BL.modules.text_overlay_module import TextOverlayModule
+
+
+def _overlay_module():
+    return TextOverlayModule(TextLayoutModule(min_font_size=10, max_font_size=30))
+
+
+def _colors(image):
+    return {color for _, color in image.getcolors(image.width * image.height)}
+
+
+def test_overlays_are_rendered_once_per_text_and_color():
+    overlay_module = _overlay_module()
+
+    overlay = overlay_module.get_overlay('Keep going', (255, 255, 255), 200)
+
+    assert overlay_module.get_overlay('Keep going', (255, 255, 255), 200) is overlay
+    assert overlay_module.get_overlay('Keep going', (255, 0, 0), 200) is not overlay
+    assert overlay_module.get_overlay('Keep going', (255, 255, 255), 100) is not overlay
+
+
+def test_overlay_holds_the_text_and_its_shadow_on_a_transparent_block():
+    overlay = _overlay_module().get_overlay('Keep going', (255, 255, 255), 200)
+    colors = _colors(overlay.image)
+
+    assert overlay.image.mode == 'RGBA'
+    assert overlay.image.width >= overlay.layout.width + 2 * overlay.margin
+    assert overlay.image.getpixel((0, 0)) == (0, 0, 0, 0)
+    assert (255, 255, 255, 255) in colors and (0, 0, 0, 255) in colors
+
+
+def test_composite_centers_the_overlay_in_place():
+    overlay = _overlay_module().get_overlay('Hi', (255, 255, 255), 200)
+    background = Image.new('RGB', (300, 200), (0, 128, 0))
+
+    assert overlay.composite(background) is background
+    x, y = overlay.position(300, 200)
+    assert x == round((300 - overlay.layout.width) / 2 - overlay.margin)
+    assert y == round((200 - overlay.layout.height) / 2 - overlay.margin)
+    assert background.getpixel((0, 0)) == (0, 128, 0)
+    assert (255, 255, 255) in _colors(background.crop((x, y, x + overlay.image.width, y + overlay.image.height)))
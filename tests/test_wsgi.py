@@ -0,0 +1,23 @@
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_importing_the_entrypoint_leaves_garbage_collection_on():
+    # Only gunicorn.conf.py turns collection off, importing the app elsewhere must not
+    subprocess.run([sys.executable, '-c', 'import gc, BL.wsgi; assert gc.isenabled()'], cwd=ROOT, check=True,
+                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, timeout=300)
+
+
+def test_gunicorn_config_turns_collection_off_until_workers_fork():
+    script = ('import gc, runpy; config = runpy.run_path("gunicorn.conf.py"); assert not gc.isenabled(); '
+              'config["pre_fork"](None, None); assert not gc.isenabled()')
+    subprocess.run([sys.executable, '-c', script], cwd=ROOT, check=True, timeout=60)
+
+
+def test_importing_the_app_leaves_logging_to_the_entry_points():
+    script = ('import logging, DAL.mongo_module, BL.routes; '
+              'assert not logging.getLogger().handlers and logging.getLogger().level == logging.WARNING')
+    subprocess.run([sys.executable, '-c', script], cwd=ROOT, check=True, timeout=300)